@@ -0,0 +1,204 @@
+"""
+部分匹配扩张基准 (旧版 `ExpandGraph` + `deepcopy` vs. `Embedding` 结构共享)
+
+- 运行: `uv run python -m bench.partial_match_extension [repeat]`
+- 在最小化的 bi-6 数据集上执行计划, 由各个部分匹配 (按 `matching_order`) 还原出
+  `扩张一步` 的输入: 已匹配部分, 连接下一个模式点的半垂悬边, 以及扩张终点
+- 旧版: `ExpandGraph(deepcopy(matched_dg))`, 再由 `to_dyn_graph_cloned` 复制一次
+- 新版: `Expanding` 只引用已匹配部分 (不可变元组), 点 / 边实体留在 `EntityStore` 中
+"""
+
+import contextlib
+import io
+import statistics
+import sys
+import time
+from copy import deepcopy
+from typing import Optional
+
+from config import SCRIPT_DIR
+from executor import ExecEngine
+from executor.matching_ctx import MatchingCtx
+from executor.matching_ctx.embedding import CandidateIndex, Embedding, Expanding
+from schema import DataEdge, DataVertex
+from sqlite_dg_builder.bi_6 import BI6Builder
+from storage.sqlite import SQLiteStorageAdapter
+from utils.dyn_graph import DynGraph
+from utils.expanding_graph import ExpandGraph
+
+PLAN_FILE = SCRIPT_DIR / "resources" / "plan" / "ldbc-bi-6.json"
+REPEAT = 2_000
+ROUNDS = 5
+
+
+class Step:
+    """扩张一步的输入"""
+
+    __slots__ = (
+        "base",
+        "base_dg",
+        "dangling",
+        "target",
+        "candidates",
+        "v_slot",
+        "v_pat",
+    )
+
+    def __init__(
+        self,
+        base: Embedding,
+        base_dg: DynGraph,
+        dangling: list[tuple[int, DataEdge, str]],
+        target: DataVertex,
+        v_slot: int,
+        v_pat: str,
+    ) -> None:
+        self.base = base
+        self.base_dg = base_dg
+        self.dangling = dangling
+        self.target = target
+        self.candidates = CandidateIndex([target])
+        self.v_slot = v_slot
+        self.v_pat = v_pat
+
+
+def collect_steps(ctx: MatchingCtx, partials: list[Embedding]) -> list[Step]:
+    """按 `matching_order` 逐个放入模式点, 还原出每一步扩张"""
+
+    layout, store = ctx.layout, ctx.store
+    e_ends = {pat: {e.src_vid, e.dst_vid} for pat, e in ctx.pattern_es.items()}
+    steps: list[Step] = []
+
+    for embedding in partials:
+        order = [
+            pat
+            for pat in ctx.plan_data.matching_order
+            if embedding[layout.v_slots[pat]] is not None
+        ]
+        base = layout.empty()
+        for k, pat in enumerate(order):
+            v_slot = layout.v_slots[pat]
+            prev_pats = set(order[:k])
+            dangling = [
+                (slot, store.edges[eid], e_pat)
+                for e_pat, slot in layout.e_slots.items()
+                if (eid := embedding[slot]) is not None
+                and pat in e_ends[e_pat]
+                and e_ends[e_pat] & prev_pats
+            ]
+            if dangling:
+                steps.append(
+                    Step(
+                        base,
+                        layout.to_dyn_graph(base, store),
+                        dangling,
+                        store.vertices[embedding[v_slot]],
+                        v_slot,
+                        pat,
+                    )
+                )
+            base = layout.bind(base, v_slot, embedding[v_slot])
+            for slot, e, _ in dangling:
+                base = layout.bind(base, slot, e.eid)
+
+    return steps
+
+
+def extend_legacy(step: Step) -> DynGraph:
+    expanding = ExpandGraph(deepcopy(step.base_dg))
+    expanding.update_valid_dangling_edges(
+        [e for _, e, _ in step.dangling], [pat for _, _, pat in step.dangling]
+    )
+    expanding.update_valid_target_vertices([step.target], [step.v_pat])
+    return expanding.to_dyn_graph_cloned()
+
+
+def extend_embedding(step: Step, ctx: MatchingCtx) -> Optional[Embedding]:
+    layout, store = ctx.layout, ctx.store
+    expanding = Expanding.with_dangling_edges(
+        step.base, [(slot, e.eid) for slot, e, _ in step.dangling], layout, store
+    )
+    expanding.update_valid_targets(step.candidates, step.v_slot, layout, store)
+    return expanding.to_embedding(layout, store)
+
+
+def deep_size(obj, seen: set[int]) -> int:
+    """粗略估计对象占用的内存 (`seen` 中的对象不计入, 用于排除共享的实体)"""
+
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def measure(extend, steps: list[Step], repeat: int) -> list[float]:
+    """返回每轮中 `扩张一步` 的平均耗时 (微秒)"""
+
+    per_step: list[float] = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for step in steps:
+                extend(step)
+        per_step.append((time.perf_counter() - start) * 1e6 / (repeat * len(steps)))
+    return per_step
+
+
+def main(repeat: Optional[str] = None):
+    BI6Builder().build()
+    engine = ExecEngine.from_json(PLAN_FILE.read_text(), SQLiteStorageAdapter())
+    with contextlib.redirect_stdout(io.StringIO()):  # 不打印执行过程
+        unjoined = engine.exec_without_final_join()
+    ctx = engine.matching_ctx
+    partials = [embedding for group in unjoined for embedding in group]
+    steps = collect_steps(ctx, partials)
+    if not steps:
+        raise RuntimeError("No expansion step found in the bi-6 plan.")
+
+    # 两种实现的扩张结果必须一致
+    for step in steps:
+        legacy, embedding = extend_legacy(step), extend_embedding(step, ctx)
+        assert embedding is not None
+        assert set(legacy.v_entities) == {
+            vid for vid in ctx.layout.vs(embedding) if vid is not None
+        }
+        assert set(legacy.e_entities) == {
+            eid for eid in ctx.layout.es(embedding) if eid is not None
+        }
+
+    repeat_times = int(repeat) if repeat else REPEAT
+    before = measure(extend_legacy, steps, repeat_times)
+    after = measure(lambda step: extend_embedding(step, ctx), steps, repeat_times)
+
+    shared = {id(v) for v in ctx.store.vertices.values()}
+    shared |= {id(e) for e in ctx.store.edges.values()}
+    legacy_size = statistics.fmean(
+        deep_size(ctx.layout.to_dyn_graph(embedding, ctx.store), set(shared))
+        for embedding in partials
+    )
+    embedding_size = statistics.fmean(
+        deep_size(embedding, set(shared)) for embedding in partials
+    )
+
+    print(f"{len(steps)} 步扩张 x {repeat_times} 次, 取 {ROUNDS} 轮中位数")
+    print(f"{'before':<10} {statistics.median(before):8.2f} us / step")
+    print(f"{'after':<10} {statistics.median(after):8.2f} us / step")
+    print(
+        f"speed-up (median) = "
+        f"{statistics.median(before) / statistics.median(after):.2f}x"
+    )
+    print(
+        f"每个部分匹配 (不含共享实体): DynGraph {legacy_size:.0f} B, "
+        f"Embedding {embedding_size:.0f} B"
+    )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
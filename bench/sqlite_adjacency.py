@@ -0,0 +1,146 @@
+"""
+邻居查询延迟基准 (旧版单列索引 vs. `ADJACENCY_INDEXES`)
+
+- 运行: `uv run python -m bench.sqlite_adjacency [db_url]`
+- 不指定 `db_url` 时, 在临时目录中生成一张合成图 (幂律度分布, 多种边标签)
+- 指定 `db_url` 时, 会先退回旧版索引再重建 `QUERY_INDEXES` (结束后索引布局与迁移后一致)
+- 查询语句与 `SQLiteStorageAdapter.load_e_by_src_vid / load_e_by_dst_vid` 一致
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import Engine, insert
+from sqlmodel import create_engine, text
+
+from storage.sqlite.db_entity import (
+    ADJACENCY_INDEXES,
+    LEGACY_INDEXES,
+    DB_Edge,
+    DB_Vertex,
+    create_query_indexes,
+    init_db_with_clear,
+)
+
+V_COUNT = 50_000
+E_COUNT = 500_000
+E_LABELS = ("knows", "likes", "hasCreator", "hasTag")
+SAMPLE_SIZE = 2_000
+SEED = 42
+
+SRC_QUERY = text(
+    "SELECT eid, label, src_vid, dst_vid FROM db_edge "
+    "WHERE label = :label AND src_vid = :vid"
+)
+DST_QUERY = text(
+    "SELECT eid, label, src_vid, dst_vid FROM db_edge "
+    "WHERE label = :label AND dst_vid = :vid"
+)
+
+
+def build_synthetic_db(db_url: str) -> Engine:
+    """生成合成图 (不建查询索引, 相当于 `批量导入刚结束`)"""
+
+    rng = random.Random(SEED)
+    engine = init_db_with_clear(db_url)
+    vids = [f"Person^{i}" for i in range(V_COUNT)]
+    # 幂律分布的端点, 制造少量 `超级点`
+    weights = [1 / (rank + 1) for rank in range(V_COUNT)]
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(DB_Vertex), [{"vid": vid, "label": "Person"} for vid in vids]
+        )
+        srcs = rng.choices(vids, weights, k=E_COUNT)
+        dsts = rng.choices(vids, weights, k=E_COUNT)
+        conn.execute(
+            insert(DB_Edge),
+            [
+                {
+                    "eid": f"{src} -> {dst} @ {i}",
+                    "label": rng.choice(E_LABELS),
+                    "src_vid": src,
+                    "dst_vid": dst,
+                }
+                for i, (src, dst) in enumerate(zip(srcs, dsts))
+            ],
+        )
+    return engine
+
+
+def use_legacy_indexes(engine: Engine):
+    """还原旧版 `DB_Edge` 的索引布局: `label` / `src_vid` / `dst_vid` 各自单列索引"""
+
+    with engine.begin() as conn:
+        for name in ADJACENCY_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for name in LEGACY_INDEXES:
+            column = name.removeprefix("ix_db_edge_")
+            conn.execute(
+                text(f"CREATE INDEX IF NOT EXISTS {name} ON db_edge ({column})")
+            )
+        conn.execute(text("ANALYZE"))
+
+
+def measure(engine: Engine, samples: list[tuple[str, str]]):
+    """返回每次邻居查询的延迟 (微秒), 正向 / 反向各查一次"""
+
+    latencies: list[float] = []
+    with engine.connect() as conn:
+        for vid, label in samples:
+            for query in (SRC_QUERY, DST_QUERY):
+                start = time.perf_counter()
+                conn.execute(query, {"label": label, "vid": vid}).all()
+                latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(title: str, latencies: list[float]):
+    ordered = sorted(latencies)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(
+        f"{title:<10} mean = {statistics.fmean(ordered):8.1f} us, "
+        f"p50 = {statistics.median(ordered):8.1f} us, p99 = {p99:8.1f} us"
+    )
+
+
+def main(db_url: str | None = None):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if db_url:
+            engine = create_engine(db_url)
+        else:
+            db_path = Path(tmp_dir) / "adjacency_bench.db"
+            print(f"生成合成图: {V_COUNT} 点, {E_COUNT} 边 ...")
+            engine = build_synthetic_db(f"sqlite:///{db_path}")
+
+        with engine.connect() as conn:
+            vids = [row[0] for row in conn.execute(text("SELECT vid FROM db_vertex"))]
+            labels = [
+                row[0]
+                for row in conn.execute(text("SELECT DISTINCT label FROM db_edge"))
+            ]
+        rng = random.Random(SEED)
+        samples = [(rng.choice(vids), rng.choice(labels)) for _ in range(SAMPLE_SIZE)]
+
+        use_legacy_indexes(engine)
+        measure(engine, samples[:100])  # 预热
+        before = measure(engine, samples)
+
+        create_query_indexes(engine)
+        measure(engine, samples[:100])  # 预热
+        after = measure(engine, samples)
+
+        report("before", before)
+        report("after", after)
+        print(
+            f"speed-up (mean) = {statistics.fmean(before) / statistics.fmean(after):.2f}x"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
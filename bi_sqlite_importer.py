@@ -7,7 +7,13 @@ from sqlalchemy import Engine
 from sqlmodel import Session, text
 from tqdm import tqdm
 
-from storage.sqlite.db_entity import DB_Edge, DB_Vertex, init_db_with_clear
+from storage.csr.stats import write_stats_for
+from storage.sqlite.db_entity import (
+    DB_Edge,
+    DB_Vertex,
+    create_query_indexes,
+    init_db_with_clear,
+)
 
 ROOT = Path(__file__).parent.absolute()
 BI_DATA_DIR = ROOT / "data" / "ldbc-sn-bi-sf1"
@@ -257,5 +263,11 @@ if __name__ == "__main__":
             if relationship_folder.is_dir():
                 process_folder(relationship_folder, session, load_e)
 
+    # 导入结束后再统一建立查询索引
+    create_query_indexes(engine)
+
+    # 生成统计信息目录 (供计划优化器使用)
+    write_stats_for(DB_URL)
+
     end_time = time.time()
     print(f"导入完成! 总耗时: {end_time - start_time:.2f} 秒")
@@ -10,8 +10,8 @@ SCRIPT_DIR = Path(__file__).parent.parent.absolute()
 SIMPLE_TEST_SQL_DB_URL = "sqlite:///simple_test_data_graph.db"
 LDBC_SNB_INTERACTIVE_SQL_DB_URL = "sqlite:///ldbc_sn_interactive_sf01.db"
 
-WHICH_DB: Literal["SQLite", "Neo4j"] = "Neo4j"
-""" 使用的数据库类型 ("SQLite" / "Neo4j") """
+WHICH_DB: Literal["SQLite", "Neo4j", "CSR"] = "Neo4j"
+""" 使用的数据库类型 ("SQLite" / "Neo4j" / "CSR": 由 SQLite 数据库载入内存的 CSR 图) """
 
 SQLITE_SCHEMA_USE_RELATIONSHIP = False
 """ SQLite 实体类定义 是否添加 `Relationship` 字段 """
@@ -19,9 +19,39 @@ SQLITE_SCHEMA_USE_RELATIONSHIP = False
 SQLITE_ATTR_USE_FOREIGN_KEY = SQLITE_SCHEMA_USE_RELATIONSHIP or False
 """ SQLite `Attribute` 是否使用外键约束 """
 
+SQLITE_MMAP_SIZE = 1 << 30
+""" 查询期 SQLite `PRAGMA mmap_size` (字节) """
+
+SQLITE_CACHE_SIZE = -(256 << 10)
+""" 查询期 SQLite `PRAGMA cache_size` (负数表示 KiB, 每个连接各自一份) """
+
+SQLITE_IMMUTABLE = False
+""" 是否以 `immutable=1` 的 URI 打开 SQLite (仅当查询期间数据库文件绝不会被修改时开启) """
+
 USE_CORE_MODE = False
 """ 是否使用 `SQLAlchemy Core` """
 
+OPTIMIZE_PLAN = True
+""" 执行前是否用 `planner` 按代价重新选择匹配顺序 (并重新生成指令) """
+
+SHARD_BATCH_SIZE = 1024
+""" 分片执行 (`count` / `iter_matches`) 时, 每个分片的首个 Init 的点数 (流水线执行时, 每块部分匹配数的上限) """
+
+INSTR_SCHEDULER_WORKERS = 1
+""" 同时执行的指令数 (`1`: 按计划中的顺序逐条执行; 大于 1 时按 `depend_on` 调度, 见 `executor.scheduler`) """
+
+GETADJ_PREFETCH_WORKERS = 0
+""" GetAdj 预取邻接边的线程数 (`0`: 不使用线程池, 当场一次加载; 后端查询延迟较高时再开启) """
+
+GETADJ_PREFETCH_CHUNK_SIZE = 256
+""" GetAdj 预取时, 每个查询携带的 `边缘点` 数 (边缘点不多于此数时当场一次加载) """
+
+ASYNC_MAX_IN_FLIGHT = 16
+""" 异步执行时, 同时进行的存储查询数上限 """
+
+ASYNC_FRONTIER_CHUNK_SIZE = 256
+""" 异步执行时, GetAdj 每个查询携带的 `边缘点` 数 (边缘点按此切块, 各块同时查询) """
+
 DIRECTED_EDGE_SUPPORT = True
 """ 是否支持有向边 """
 
@@ -1,18 +1,53 @@
 import json
+import os
 from dataclasses import dataclass
-from itertools import product
-from typing import Iterable, cast
+from functools import cached_property
+from itertools import chain, islice, repeat
+from typing import Callable, Iterable, Iterator, Optional, cast
 
+from config import (
+    DIRECTED_EDGE_SUPPORT,
+    INSTR_SCHEDULER_WORKERS,
+    OPTIMIZE_PLAN,
+    SHARD_BATCH_SIZE,
+)
+from executor.final_join import count_all, join_all
 from executor.instr_ops.abc import InstrOperator
 from executor.instr_ops.factory import OperatorFactory
-from executor.matching_ctx import MatchingCtx
-from schema import PlanData
+from executor.instr_ops.init import InitOperator
+from executor.matching_ctx import MatchingCtx, resolve_var_name
+from executor.matching_ctx.embedding import Embedding, Multiplicities
+from executor.parallel import (
+    SHARDS_PER_WORKER,
+    AdapterFactory,
+    ShardResult,
+    plan_shards,
+    run_parallel,
+)
+from executor.scheduler import InstrDag
+from planner import PlanOptimizer
+from planner.compiler import compile_plan
+from schema import DataVertex, InstructionType, PatternVertex, PlanData, Vid
 from schema.json_repr_typed_dict import PlanDict
 from storage.abc import StorageAdapter
 from utils import dbg
 from utils.dyn_graph import DynGraph
 
 
+def fixed_chunk_sizes() -> Iterator[int]:
+    """分片: 每片 `SHARD_BATCH_SIZE`"""
+    return repeat(SHARD_BATCH_SIZE)
+
+
+def growing_chunk_sizes() -> Iterator[int]:
+    """流水线: 1, 2, 4, ... 至 `SHARD_BATCH_SIZE` 后保持不变"""
+
+    size = 1
+    while True:
+        yield size
+        size = min(size * 2, SHARD_BATCH_SIZE)
+
+
 @dataclass
 class ExecEngine:
     """执行引擎"""
@@ -21,33 +56,82 @@ class ExecEngine:
     matching_ctx: MatchingCtx
     storage_adapter: StorageAdapter
 
+    def __post_init__(self):
+        # 执行器内部只使用 `稠密整数 id`, 到 `exec` 输出时再还原为字符串 id
+        self.storage_adapter = self.storage_adapter.interned()
+
     @classmethod
-    def from_json(cls, plan_json: str, storage_adapter: StorageAdapter):
+    def from_json(
+        cls,
+        plan_json: str,
+        storage_adapter: StorageAdapter,
+        optimize: bool = OPTIMIZE_PLAN,
+    ):
         plan_json_raw = json.loads(plan_json)
         plan_dict = cast(PlanDict, plan_json_raw)
+        return cls.from_plan_dict(plan_dict, storage_adapter, optimize)
+
+    @classmethod
+    def from_query(
+        cls,
+        query_text: str,
+        storage_adapter: StorageAdapter,
+        optimize: bool = OPTIMIZE_PLAN,
+    ):
+        """由模式文件 (`resources/queries` 的格式) 在进程内编译计划"""
+        return cls.from_plan_dict(compile_plan(query_text), storage_adapter, optimize)
+
+    @classmethod
+    def from_plan_dict(
+        cls,
+        plan_dict: PlanDict,
+        storage_adapter: StorageAdapter,
+        optimize: bool = OPTIMIZE_PLAN,
+    ):
         plan_data = PlanData.from_plan_dict(plan_dict)
+        if optimize:
+            # 计划中的 `matching_order` 未必合理, 按代价重新选择并重新生成指令
+            plan_data = PlanOptimizer(storage_adapter).optimize(plan_data)
         matching_ctx = MatchingCtx(plan_data)
         return cls(plan_data, matching_ctx, storage_adapter)
 
-    def exec_without_final_join(self):
-        """执行计划, 返回匹配结果 (有嵌套的返回, 并不执行最终的 Join)"""
+    def exec_without_final_join(self, matching_ctx: Optional[MatchingCtx] = None):
+        """
+        执行计划, 返回匹配结果 (有嵌套的返回, 并不执行最终的 Join)
 
-        unjoined_result: list[list[DynGraph]] = []
+        - 每组为 `{ 部分匹配 -> 重数 }`, 部分匹配中的 id 为执行器内部的稠密整数
+        """
+
+        matching_ctx = matching_ctx or self.matching_ctx
+        unjoined_result: list[Multiplicities] = []
         instructions = self.plan_data.instructions
         operators: list[InstrOperator] = []
 
         for instr in instructions:
             instr_operator = OperatorFactory.create(
-                instr, self.storage_adapter, self.matching_ctx
+                instr, self.storage_adapter, matching_ctx
             )
             operators.append(instr_operator)
 
         assert len(operators) == len(instructions)
+        if INSTR_SCHEDULER_WORKERS > 1:
+            # 按 `depend_on` 调度, 相互独立的子链同时执行
+            self.instr_dag.run_in_threads(
+                lambda i: operators[i].execute(instructions[i], unjoined_result),
+                INSTR_SCHEDULER_WORKERS,
+            )
+            return unjoined_result
+
         for operator, instr in zip(operators, instructions):
             operator.execute(instr, unjoined_result)
 
         return unjoined_result
 
+    @cached_property
+    def instr_dag(self) -> InstrDag:
+        """指令依赖图 (详见 `executor.scheduler`)"""
+        return InstrDag(self.plan_data.instructions)
+
     def exec(self):
         unjoined = [partial for partial in self.exec_without_final_join() if partial]
 
@@ -58,37 +142,256 @@ class ExecEngine:
         # dbg.pprint(unjoined)
         preview_scale()
 
-        result: list[DynGraph] = []
-
         if not unjoined:
-            return result
+            return []
 
-        plan_v_pat_cnt = {v_pat: 1 for v_pat in self.plan_data.pattern_vs}
-        plan_e_pat_cnt = {e_pat: 1 for e_pat in self.plan_data.pattern_es}
+        # 按共享模式哈希连接, 合并好的部分匹配, 规模应该完全与 `pattern` 一致
+        return [
+            self.to_output(embedding, self.matching_ctx)
+            for embedding in join_all(unjoined, self.matching_ctx.layout.width)
+        ]
 
-        @staticmethod
-        def could_match_the_whole_pattern(graph: DynGraph):
-            graph_v_pat_cnt = {
-                v_pat: len(vs) for v_pat, vs in graph.pattern_2_vs.items()
-            }
-            graph_e_pat_cnt = {
-                e_pat: len(es) for e_pat, es in graph.pattern_2_es.items()
-            }
+    def iter_matches(self, limit: Optional[int] = None) -> Iterator[DynGraph]:
+        """
+        流式返回匹配结果 (已还原为字符串 id)
+
+        - 按首个 Init 的点分批 (每批 `SHARD_BATCH_SIZE` 个点), 每批独立执行
+          `Init -> GetAdj -> Intersect -> Foreach`, 连接完成即产出
+        - 给定 `limit` 时流水线执行 (见 `iter_unjoined`): 首批只有一个部分匹配, 取满 `limit` 个之后,
+          不再执行剩余的块 (也不再访问存储); 首个 Init 很有选择性时同样有效
+        """
+
+        if limit is None:
+            return self.iter_all_matches()
+        return islice(self.iter_all_matches(pipelined=True), limit)
+
+    def iter_all_matches(self, pipelined: bool = False) -> Iterator[DynGraph]:
+        for matching_ctx, unjoined in self.iter_unjoined(pipelined=pipelined):
+            for embedding in join_all(unjoined, matching_ctx.layout.width):
+                yield self.to_output(embedding, matching_ctx)
+
+    def count(self) -> int:
+        """
+        只计数, 不构造匹配结果 (与 `len(self.exec())` 相同)
+
+        - 按分片执行, 中间结果只与单个分片有关, 与结果数无关
+        - 最后一层 Foreach 直接数候选, 最终 Join 只传播各部分匹配的重数
+        """
 
-            return (
-                plan_v_pat_cnt == graph_v_pat_cnt and plan_e_pat_cnt == graph_e_pat_cnt
+        total = 0
+        for matching_ctx, unjoined in self.iter_unjoined(count_only=True):
+            total += count_all(unjoined, matching_ctx.layout.width)
+        return total
+
+    def iter_unjoined(
+        self, count_only: bool = False, pipelined: bool = False
+    ) -> Iterator[tuple[MatchingCtx, list[Multiplicities]]]:
+        """
+        分片执行, 逐片返回 (上下文, 未连接的结果)
+
+        - 首个 Init 的点按 `SHARD_BATCH_SIZE` 分批, 每批各自执行余下的指令:
+          完整匹配中首个 Init 的模式点恰好绑定一个数据点, 且只能来自该 Init,
+          不同分片的部分匹配在该模式点上绑定不同, 相互之间不会连接,
+          所以各分片结果的并集就是完整结果
+        - `pipelined`: 每条 Init / Foreach 之后都分块 (1, 2, 4, ... 至 `SHARD_BATCH_SIZE`
+          个部分匹配), 各块深度优先地执行余下的指令. 每个完整匹配恰由 f 桶中的一个部分匹配扩张而来,
+          同理, 各块结果的并集就是完整结果
+        """
+
+        instructions = self.plan_data.instructions
+        split_types = (
+            (InstructionType.Init, InstructionType.Foreach)
+            if pipelined
+            else (InstructionType.Init,)
+        )
+        split_at = [instr.type in split_types for instr in instructions]
+        if not pipelined:
+            # 只按首个 Init 分片
+            first_init = next(
+                (i for i, split in enumerate(split_at) if split), len(split_at)
             )
+            split_at = [i == first_init for i in range(len(split_at))]
+
+        chunk_sizes = growing_chunk_sizes if pipelined else fixed_chunk_sizes
+        matching_ctx = MatchingCtx(
+            self.plan_data,
+            count_only=count_only,
+            candidate_indexes=self.matching_ctx.candidate_indexes,
+        )
+        return self.exec_split(matching_ctx, 0, split_at, chunk_sizes, [])
+
+    def exec_split(
+        self,
+        matching_ctx: MatchingCtx,
+        start: int,
+        split_at: list[bool],
+        chunk_sizes: Callable[[], Iterator[int]],
+        unjoined: list[Multiplicities],
+    ) -> Iterator[tuple[MatchingCtx, list[Multiplicities]]]:
+        """
+        从第 `start` 条指令起逐条执行; 执行完 `split_at` 的指令后, 其 f 桶多于一块时,
+        按 `chunk_sizes()` 切块, 各块在复制的上下文中递归执行余下的指令
+
+        - `unjoined`: 之前已汇总的结果; 切块时每块各带一份副本
+          (最终 Join 对切开的 f 桶满足分配律, 各块连接结果的并集不变)
+        """
+
+        instructions = self.plan_data.instructions
+        for i in range(start, len(instructions)):
+            instr = instructions[i]
+            operator = OperatorFactory.create(instr, self.storage_adapter, matching_ctx)
+            operator.execute(instr, unjoined)
+            if not split_at[i]:
+                continue
+
+            key = resolve_var_name(instr.target_var)
+            f_bucket = matching_ctx.F_pool[key]
+            sizes = chunk_sizes()
+            first_size = next(sizes)
+            if len(f_bucket.all_matched) <= first_size:
+                continue
+
+            for chunk in f_bucket.split(chain([first_size], sizes)):
+                forked = matching_ctx.fork()
+                forked.F_pool[key] = chunk
+                yield from self.exec_split(
+                    forked, i + 1, split_at, chunk_sizes, list(unjoined)
+                )
+            return
+
+        yield matching_ctx, unjoined
+
+    def first_init_pattern_v(self) -> Optional[PatternVertex]:
+        """首个 Init 的模式点 (分片依据)"""
+
+        first_init = next(
+            (
+                instr
+                for instr in self.plan_data.instructions
+                if instr.type == InstructionType.Init
+            ),
+            None,
+        )
+        return self.plan_data.pattern_vs[first_init.vid] if first_init else None
+
+    """ ========== 多进程并行 (详见 `executor.parallel`) ========== """
+
+    def exec_parallel(
+        self, adapter_factory: AdapterFactory, max_workers: Optional[int] = None
+    ) -> list[DynGraph]:
+        """
+        多进程执行, 结果与 `exec()` 相同 (顺序按分片)
+
+        - `adapter_factory`: 在每个工作进程中构造存储适配器, 须可 pickle
+        """
+
+        shard_results = self.exec_shards_in_pool(adapter_factory, max_workers, False)
+        return [match for matches in shard_results for match in cast(list, matches)]
+
+    def count_parallel(
+        self, adapter_factory: AdapterFactory, max_workers: Optional[int] = None
+    ) -> int:
+        """多进程计数, 结果与 `count()` 相同"""
+
+        shard_results = self.exec_shards_in_pool(adapter_factory, max_workers, True)
+        return sum(cast(int, count) for count in shard_results)
+
+    def exec_shards_in_pool(
+        self,
+        adapter_factory: AdapterFactory,
+        max_workers: Optional[int],
+        count_only: bool,
+    ) -> list[ShardResult]:
+        pattern_v = self.first_init_pattern_v()
+        if pattern_v is None:
+            # 没有可分片的 Init, 退回单进程
+            return [self.count() if count_only else self.exec()]
+
+        n_workers = max_workers or os.cpu_count() or 1
+        weights = self.init_weights(pattern_v)
+        shards = plan_shards(weights, n_workers * SHARDS_PER_WORKER)
+        if not shards:
+            return []
+        return run_parallel(
+            self.plan_data, shards, adapter_factory, n_workers, count_only
+        )
+
+    def init_weights(self, pattern_v: PatternVertex) -> dict[Vid, int]:
+        """
+        首个 Init 的各个点 (字符串 id) -> 权重 (`1 + 沿相邻模式边的度数`)
+
+        - 每条相邻的模式边 (及方向) 各一次批量查询, 只取边数
+        """
+
+        adapter = self.storage_adapter
+        data_vs = InitOperator(adapter, self.matching_ctx).load_vertices(pattern_v)
+        vids = [v.vid for v in data_vs]
+        weights = dict.fromkeys(vids, 1)
+
+        for pat_e in self.plan_data.pattern_es.values():
+            directions = {
+                is_src
+                for is_src, end in ((True, pat_e.src_vid), (False, pat_e.dst_vid))
+                if end == pattern_v.vid
+            }
+            if directions and not DIRECTED_EDGE_SUPPORT:
+                directions = {True, False}
+            for is_src in directions:
+                load = (
+                    adapter.load_e_by_src_vids if is_src else adapter.load_e_by_dst_vids
+                )
+                for vid, es in load(vids, pat_e.label, pat_e.attr).items():
+                    weights[vid] += len(es)
+
+        return {adapter.external_vid(vid): weight for vid, weight in weights.items()}
+
+    def exec_shard(self, vids: list[Vid], count_only: bool = False) -> ShardResult:
+        """执行一个分片: 首个 Init 只使用 `vids` (字符串 id) 中的点, 返回匹配结果或匹配数"""
+
+        pattern_v = self.first_init_pattern_v()
+        if pattern_v is None:
+            raise RuntimeError("Plan has no Init instruction to shard on.")
+
+        init_vs = [self.init_vertices_by_external_vid[vid] for vid in vids]
+        matching_ctx = MatchingCtx(
+            self.plan_data,
+            init_vs={pattern_v.vid: init_vs},
+            count_only=count_only,
+            candidate_indexes=self.matching_ctx.candidate_indexes,
+        )
+        unjoined = self.exec_without_final_join(matching_ctx)
+        if count_only:
+            return count_all(unjoined, matching_ctx.layout.width)
+        return [
+            self.to_output(embedding, matching_ctx)
+            for embedding in join_all(unjoined, matching_ctx.layout.width)
+        ]
+
+    @cached_property
+    def init_vertices_by_external_vid(self) -> dict[Vid, DataVertex]:
+        """首个 Init 的点: 字符串 id -> 点 (稠密 id), 供 `exec_shard` 还原分片"""
+
+        pattern_v = self.first_init_pattern_v()
+        if pattern_v is None:
+            return {}
+        init_operator = InitOperator(self.storage_adapter, self.matching_ctx)
+        return {
+            self.storage_adapter.external_vid(v.vid): v
+            for v in init_operator.load_vertices(pattern_v)
+        }
+
+    def to_output(self, embedding: Embedding, matching_ctx: MatchingCtx) -> DynGraph:
+        """完整匹配 -> `DynGraph` (只在输出时构造, 并还原为字符串 id)"""
+
+        graph = matching_ctx.layout.to_dyn_graph(embedding, matching_ctx.store)
+        return self.to_external_ids(graph)
 
-        # 全排列组合
-        for combination in product(*unjoined):
-            curr = combination[0]
-            for next in combination[1:]:
-                new = curr | next
-                curr = new
-            result.append(curr)
+    def to_external_ids(self, graph: DynGraph):
+        """执行器内部的稠密整数 id -> 存储中的字符串 id"""
 
-        # 这里最后再过滤一遍, 合并好的图, 规模应该完全与 `pattern` 一致
-        return list(graph for graph in result if could_match_the_whole_pattern(graph))
+        return graph.remap_ids(
+            self.storage_adapter.external_vid, self.storage_adapter.external_eid
+        )
 
     @staticmethod
     def project_all_ids(merged_result: Iterable[DynGraph]):
@@ -0,0 +1,124 @@
+"""
+异步执行引擎: 存储查询 `await` 异步存储适配器 (详见 `storage.aio`)
+
+- 指令按 `depend_on` 调度 (见 `executor.scheduler`), 相互独立的子链交替执行;
+  GetAdj 把边缘点切块, 各块的邻接边同时查询,
+  同时进行的查询数不超过 `max_in_flight` (适合 Neo4j 等延迟受限的后端)
+- 计划优化器需要同步的统计接口: 需要优化时, 向 `from_*` 传入同步的 `stats_adapter`
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional, cast
+
+from config import ASYNC_FRONTIER_CHUNK_SIZE, ASYNC_MAX_IN_FLIGHT
+from executor.final_join import count_all, join_all
+from executor.instr_ops.aio import AsyncOperatorFactory
+from executor.matching_ctx import MatchingCtx
+from executor.matching_ctx.embedding import Embedding, Multiplicities
+from executor.scheduler import InstrDag
+from planner import PlanOptimizer
+from schema import PlanData
+from schema.json_repr_typed_dict import PlanDict
+from storage.abc import StorageAdapter
+from storage.aio import AsyncStorageAdapter
+from utils.dyn_graph import DynGraph
+
+
+@dataclass
+class AsyncExecEngine:
+    """异步执行引擎"""
+
+    plan_data: PlanData
+    matching_ctx: MatchingCtx
+    storage_adapter: AsyncStorageAdapter
+    max_in_flight: int = ASYNC_MAX_IN_FLIGHT
+    frontier_chunk_size: int = ASYNC_FRONTIER_CHUNK_SIZE
+
+    def __post_init__(self):
+        # 执行器内部只使用 `稠密整数 id`, 到输出时再还原为字符串 id
+        self.storage_adapter = self.storage_adapter.interned()
+
+    @classmethod
+    def from_json(
+        cls,
+        plan_json: str,
+        storage_adapter: AsyncStorageAdapter,
+        stats_adapter: Optional[StorageAdapter] = None,
+    ):
+        plan_json_raw = json.loads(plan_json)
+        plan_dict = cast(PlanDict, plan_json_raw)
+        return cls.from_plan_dict(plan_dict, storage_adapter, stats_adapter)
+
+    @classmethod
+    def from_plan_dict(
+        cls,
+        plan_dict: PlanDict,
+        storage_adapter: AsyncStorageAdapter,
+        stats_adapter: Optional[StorageAdapter] = None,
+    ):
+        plan_data = PlanData.from_plan_dict(plan_dict)
+        if stats_adapter is not None:
+            plan_data = PlanOptimizer(stats_adapter).optimize(plan_data)
+        return cls(plan_data, MatchingCtx(plan_data), storage_adapter)
+
+    async def exec_without_final_join(
+        self, matching_ctx: Optional[MatchingCtx] = None
+    ) -> list[Multiplicities]:
+        """同 `ExecEngine.exec_without_final_join`"""
+
+        matching_ctx = matching_ctx or self.matching_ctx
+        unjoined_result: list[Multiplicities] = []
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        instructions = self.plan_data.instructions
+        operators = [
+            AsyncOperatorFactory.create(
+                instr,
+                self.storage_adapter,
+                matching_ctx,
+                semaphore,
+                self.frontier_chunk_size,
+            )
+            for instr in instructions
+        ]
+
+        # 按 `depend_on` 调度: 相互独立的子链交替执行, 各自的查询同时进行
+        await self.instr_dag.run_async(
+            lambda i: operators[i].execute_async(instructions[i], unjoined_result)
+        )
+        return unjoined_result
+
+    @cached_property
+    def instr_dag(self) -> InstrDag:
+        """指令依赖图 (详见 `executor.scheduler`)"""
+        return InstrDag(self.plan_data.instructions)
+
+    async def exec(self) -> list[DynGraph]:
+        """执行计划, 结果与 `ExecEngine.exec()` 相同"""
+
+        unjoined = await self.exec_without_final_join()
+        return [
+            self.to_output(embedding, self.matching_ctx)
+            for embedding in join_all(unjoined, self.matching_ctx.layout.width)
+        ]
+
+    async def count(self) -> int:
+        """只计数, 结果与 `ExecEngine.count()` 相同"""
+
+        matching_ctx = MatchingCtx(
+            self.plan_data,
+            count_only=True,
+            candidate_indexes=self.matching_ctx.candidate_indexes,
+        )
+        unjoined = await self.exec_without_final_join(matching_ctx)
+        return count_all(unjoined, matching_ctx.layout.width)
+
+    def to_output(self, embedding: Embedding, matching_ctx: MatchingCtx) -> DynGraph:
+        """完整匹配 -> `DynGraph` (还原为字符串 id)"""
+
+        graph = matching_ctx.layout.to_dyn_graph(embedding, matching_ctx.store)
+        return graph.remap_ids(
+            self.storage_adapter.external_vid, self.storage_adapter.external_eid
+        )
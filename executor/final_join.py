@@ -0,0 +1,158 @@
+"""
+最终 Join: 把 `exec_without_final_join` 返回的各组部分匹配拼成完整匹配
+
+- 各组以 `{ 部分匹配 -> 重数 }` 表示, 相同的部分匹配只保留一份
+- 组与组之间按 `共享的槽位 (模式点 / 模式边)` 做哈希连接, 键为其上绑定的数据 id;
+  绑定不一致的组合在合并之前即被剔除, 不再枚举全排列组合
+- 完全不共享模式的 `连通分量` 之间才做笛卡尔积, 且按需 (惰性) 生成
+"""
+
+from itertools import product
+from typing import Iterator, Optional
+
+from executor.matching_ctx.embedding import Embedding, Multiplicities
+
+type Signature = tuple[int, ...]
+""" 部分匹配中 `已绑定的槽位` """
+
+
+def signature_of(embedding: Embedding) -> Signature:
+    return tuple(slot for slot, data_id in enumerate(embedding) if data_id is not None)
+
+
+def merge(left: Embedding, right: Embedding) -> Embedding:
+    """合并两个在共享槽位上一致的部分匹配"""
+    return tuple(r if l is None else l for l, r in zip(left, right))
+
+
+def group_by_signature(
+    multiplicities: Multiplicities,
+) -> dict[Signature, list[tuple[Embedding, int]]]:
+    """按 `已绑定的槽位` 分组 (同一组内的部分匹配未必覆盖相同的模式)"""
+
+    grouped: dict[Signature, list[tuple[Embedding, int]]] = {}
+    for embedding, cnt in multiplicities.items():
+        grouped.setdefault(signature_of(embedding), []).append((embedding, cnt))
+    return grouped
+
+
+def hash_join(left: Multiplicities, right: Multiplicities) -> Multiplicities:
+    """以共享槽位上绑定的数据 id 为键做哈希连接, 重数相乘"""
+
+    joined: Multiplicities = {}
+    right_grouped = group_by_signature(right)
+
+    for left_sig, left_partials in group_by_signature(left).items():
+        for right_sig, right_partials in right_grouped.items():
+            shared = sorted(set(left_sig) & set(right_sig))
+
+            table: dict[tuple[int, ...], list[tuple[Embedding, int]]] = {}
+            for embedding, cnt in right_partials:
+                key = tuple(embedding[slot] for slot in shared)
+                table.setdefault(key, []).append((embedding, cnt))
+
+            for l_embedding, l_cnt in left_partials:
+                key = tuple(l_embedding[slot] for slot in shared)
+                for r_embedding, r_cnt in table.get(key, []):
+                    merged = merge(l_embedding, r_embedding)
+                    joined[merged] = joined.get(merged, 0) + l_cnt * r_cnt
+
+    return joined
+
+
+def slots_of(multiplicities: Multiplicities) -> set[int]:
+    return {slot for embedding in multiplicities for slot in signature_of(embedding)}
+
+
+def split_components(groups: list[Multiplicities]) -> list[list[Multiplicities]]:
+    """
+    按共享槽位把各组划分为连通分量
+
+    - 每个分量内的组已排好连接顺序: 每一组都与之前的某一组共享槽位
+    """
+
+    remaining = [(slots_of(group), group) for group in groups]
+    components: list[list[Multiplicities]] = []
+
+    while remaining:
+        covered, first = remaining.pop(0)
+        component = [first]
+        extended = True
+        while extended:
+            extended = False
+            for i, (slots, group) in enumerate(remaining):
+                if slots & covered:
+                    covered |= slots
+                    component.append(group)
+                    remaining.pop(i)
+                    extended = True
+                    break
+        components.append(component)
+
+    return components
+
+
+def join_component(component: list[Multiplicities]) -> Multiplicities:
+    """
+    连接一个连通分量内的各组
+
+    - 只保留绑定了分量内全部槽位的组合: 各分量不共享槽位,
+      缺少的槽位不可能再由其他分量补上
+    """
+
+    slots = set().union(*(slots_of(group) for group in component))
+    joined = component[0]
+    for group in component[1:]:
+        if not joined:
+            return {}
+        joined = hash_join(joined, group)
+    return {
+        embedding: cnt
+        for embedding, cnt in joined.items()
+        if len(signature_of(embedding)) == len(slots)
+    }
+
+
+def join_components(
+    unjoined: list[Multiplicities], width: int
+) -> Optional[list[Multiplicities]]:
+    """各组按连通分量连接; 各组合起来也覆盖不了全部槽位时, 不可能有完整匹配"""
+
+    groups = [group for group in unjoined if group]
+    if not groups:
+        return None
+    if len(set().union(*(slots_of(group) for group in groups))) != width:
+        return None
+    return [join_component(component) for component in split_components(groups)]
+
+
+def join_all(unjoined: list[Multiplicities], width: int) -> Iterator[Embedding]:
+    """
+    最终 Join (惰性): 依次产出完整匹配 (重数为几, 就产出几次)
+
+    - 连通分量内部逐组哈希连接; 分量之间做笛卡尔积, 每次只生成一个组合
+    """
+
+    joined_components = join_components(unjoined, width)
+    if not joined_components:
+        return
+
+    for combination in product(*(group.items() for group in joined_components)):
+        curr, total = combination[0]
+        for embedding, cnt in combination[1:]:
+            curr, total = merge(curr, embedding), total * cnt
+        for _ in range(total):
+            yield curr
+
+
+def count_all(unjoined: list[Multiplicities], width: int) -> int:
+    """最终 Join 的计数版本: 分量之间只需把各自的匹配数相乘"""
+
+    joined_components = join_components(unjoined, width)
+    if not joined_components:
+        return 0
+
+    total = 1
+    for group in joined_components:
+        total *= sum(group.values())
+    return total
@@ -2,10 +2,10 @@ from abc import abstractmethod
 from functools import lru_cache
 
 from executor.matching_ctx import MatchingCtx
+from executor.matching_ctx.embedding import Multiplicities
 from schema import Instruction
 from schema.basic import STR_TUPLE_SPLITTER, VarPrefix
 from storage.abc import StorageAdapter
-from utils.dyn_graph import DynGraph
 
 
 class InstrOperator:
@@ -22,5 +22,5 @@ class InstrOperator:
         return VarPrefix(var_type), var_name
 
     @abstractmethod
-    def execute(self, instr: Instruction, result: list[list[DynGraph]] = []):
+    def execute(self, instr: Instruction, result: list[Multiplicities] = []):
         """执行指令"""
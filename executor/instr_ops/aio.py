@@ -0,0 +1,156 @@
+"""
+异步指令算子 (供 `executor.aio` 使用)
+
+- 各算子同时继承对应的同步算子: 只有访问存储的部分改为 `await` 异步存储适配器,
+  桶的构造与更新沿用同步实现
+- GetAdj: 边缘点切块后同时查询; Init / Intersect: 加载点集
+- 同时进行的存储查询数由 `semaphore` 限制 (同一次执行的所有算子共用)
+"""
+
+import asyncio
+from typing import override
+
+from executor.instr_ops.abc import InstrOperator
+from executor.instr_ops.foreach import ForeachOperator
+from executor.instr_ops.get_adj import GetAdjOperator
+from executor.instr_ops.init import InitOperator
+from executor.instr_ops.intersect import IntersectOperator
+from executor.instr_ops.report import ReportOperator
+from executor.matching_ctx import MatchingCtx
+from executor.matching_ctx.embedding import CandidateIndex, Multiplicities
+from schema import DataVertex, Instruction, InstructionType, PatternVertex
+from storage.aio import AsyncStorageAdapter
+from utils import dbg
+
+
+class AsyncInstrOperator(InstrOperator):
+    """
+    异步指令算子 (抽象基类)
+
+    - 不持有同步的存储适配器: 子类须覆盖所有访问存储的路径
+    """
+
+    def __init__(
+        self,
+        storage_adapter: AsyncStorageAdapter,
+        ctx: MatchingCtx,
+        semaphore: asyncio.Semaphore,
+        frontier_chunk_size: int,
+    ) -> None:
+        self.async_storage_adapter = storage_adapter
+        self.ctx = ctx
+        self.semaphore = semaphore
+        self.frontier_chunk_size = frontier_chunk_size
+
+    async def execute_async(
+        self, instr: Instruction, result: list[Multiplicities] = []
+    ):
+        """执行指令 (默认: 不访问存储, 直接执行同步版本)"""
+        self.execute(instr, result)
+
+    async def load_vertices_async(self, pattern_v: PatternVertex) -> list[DataVertex]:
+        label, attr = pattern_v.label, pattern_v.attr
+        async with self.semaphore:
+            return await (
+                self.async_storage_adapter.load_v(label)
+                if not attr
+                else self.async_storage_adapter.load_v_with_attr(label, attr)
+            )
+
+
+class AsyncInitOperator(AsyncInstrOperator, InitOperator):
+    """Init 指令算子 (异步)"""
+
+    @override
+    async def execute_async(
+        self, instr: Instruction, result: list[Multiplicities] = []
+    ):
+        dbg.pprint_instr(instr)
+
+        pattern_v = self.ctx.get_pattern_v(instr.vid)
+
+        # 加载顶点 (分片执行时, 只使用给定的点)
+        matched_vs = self.ctx.init_vs.get(pattern_v.vid)
+        if matched_vs is None:
+            matched_vs = await self.load_vertices_async(pattern_v)
+
+        self.bind_vertices(instr, pattern_v, matched_vs)
+
+
+class AsyncGetAdjOperator(AsyncInstrOperator, GetAdjOperator):
+    """GetAdj 指令算子 (异步): 边缘点切块, 各块的邻接边同时查询"""
+
+    @override
+    async def execute_async(
+        self, instr: Instruction, result: list[Multiplicities] = []
+    ):
+        dbg.pprint_instr(instr)
+
+        A_bucket, pattern_es = self.prepare(instr)
+        adj_es = await A_bucket.prefetch_adj_edges_async(
+            pattern_es,
+            self.ctx.pattern_vs,
+            self.async_storage_adapter,
+            self.ctx.store,
+            self.semaphore,
+            self.frontier_chunk_size,
+        )
+        self.expand(instr, A_bucket, pattern_es, adj_es)
+
+
+class AsyncIntersectOperator(AsyncInstrOperator, IntersectOperator):
+    """
+    Intersect 指令算子 (异步)
+
+    - 单输入的 Intersect 需要候选点集: 先 `await` 加载, 放入上下文的候选点集索引缓存,
+      再执行同步版本 (`load_candidates` 直接命中缓存)
+    """
+
+    @override
+    async def execute_async(
+        self, instr: Instruction, result: list[Multiplicities] = []
+    ):
+        if instr.is_single_op():
+            pattern_v = self.ctx.get_pattern_v(instr.vid)
+            key = (pattern_v.label, pattern_v.attr)
+            if key not in self.ctx.candidate_indexes:
+                loaded_vs = await self.load_vertices_async(pattern_v)
+                # 等待期间, 同一 (标签, 属性) 的其他指令可能已经放入
+                self.ctx.candidate_indexes.setdefault(key, CandidateIndex(loaded_vs))
+        self.execute(instr, result)
+
+
+class AsyncForeachOperator(AsyncInstrOperator, ForeachOperator):
+    """Foreach 指令算子 (异步; 不访问存储)"""
+
+
+class AsyncReportOperator(AsyncInstrOperator, ReportOperator):
+    """Report 指令算子 (异步; 不访问存储)"""
+
+
+class AsyncOperatorFactory:
+    """异步指令算子工厂"""
+
+    _operators: dict[InstructionType, type[AsyncInstrOperator]] = {
+        InstructionType.Init: AsyncInitOperator,
+        InstructionType.Foreach: AsyncForeachOperator,
+        InstructionType.GetAdj: AsyncGetAdjOperator,
+        InstructionType.Intersect: AsyncIntersectOperator,
+        InstructionType.Report: AsyncReportOperator,
+    }
+
+    @classmethod
+    def create(
+        cls,
+        instr: Instruction,
+        storage_adapter: AsyncStorageAdapter,
+        ctx: MatchingCtx,
+        semaphore: asyncio.Semaphore,
+        frontier_chunk_size: int,
+    ) -> AsyncInstrOperator:
+        """创建异步指令算子"""
+
+        operator_cls = cls._operators.get(instr.type)
+        if operator_cls is None:
+            raise ValueError(f"Unknown instruction type: {instr.type}")
+        return operator_cls(storage_adapter, ctx, semaphore, frontier_chunk_size)
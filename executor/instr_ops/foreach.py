@@ -2,16 +2,16 @@ from typing import override
 
 from executor.instr_ops.abc import InstrOperator
 from executor.matching_ctx.buckets import f_Bucket
+from executor.matching_ctx.embedding import Multiplicities
 from schema import Instruction
 from utils import dbg
-from utils.dyn_graph import DynGraph
 
 
 class ForeachOperator(InstrOperator):
     """Foreach 指令算子"""
 
     @override
-    def execute(self, instr: Instruction, result: list[list[DynGraph]] = []):
+    def execute(self, instr: Instruction, result: list[Multiplicities] = []):
         """执行指令"""
 
         dbg.pprint_instr(instr)
@@ -23,5 +23,10 @@ class ForeachOperator(InstrOperator):
         if not C_bucket:
             return
 
-        f_bucket = f_Bucket.from_C_bucket(C_bucket)
+        layout, store = self.ctx.layout, self.ctx.store
+        if self.ctx.count_only and instr.target_var in self.ctx.reported_f_vars:
+            # 计数模式: 最后一层只数候选, 不保留部分匹配
+            f_bucket = f_Bucket.counted_from_C_bucket(C_bucket, layout, store)
+        else:
+            f_bucket = f_Bucket.from_C_bucket(C_bucket, layout, store)
         self.ctx.update_f_pool(instr.target_var, f_bucket)
@@ -1,35 +1,72 @@
-from typing import override
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, override
 
+import config
 from executor.instr_ops.abc import InstrOperator
 from executor.matching_ctx import A_Bucket
-from schema import Instruction
+from executor.matching_ctx.buckets import PrefetchedAdjEdges
+from executor.matching_ctx.embedding import Multiplicities
+from schema import Instruction, PatternEdge
 from utils import dbg
-from utils.dyn_graph import DynGraph
+
+
+@lru_cache
+def prefetch_pool(workers: int) -> Optional[ThreadPoolExecutor]:
+    """GetAdj 预取邻接边的线程池 (进程内按线程数共用, 按需创建)"""
+
+    if workers <= 0:
+        return None
+    return ThreadPoolExecutor(workers, thread_name_prefix="getadj-prefetch")
 
 
 class GetAdjOperator(InstrOperator):
     """GetAdj 指令算子"""
 
     @override
-    def execute(self, instr: Instruction, result: list[list[DynGraph]] = []):
+    def execute(self, instr: Instruction, result: list[Multiplicities] = []):
         """执行指令"""
 
         dbg.pprint_instr(instr)
 
+        A_bucket, pattern_es = self.prepare(instr)
+        # 边缘点分块提交到线程池预取, 扩张按块的顺序取用 (I/O 与扩张重叠)
+        adj_es = A_bucket.prefetch_adj_edges(
+            pattern_es,
+            self.ctx.pattern_vs,
+            self.storage_adapter,
+            self.ctx.store,
+            prefetch_pool(config.GETADJ_PREFETCH_WORKERS),
+        )
+        self.expand(instr, A_bucket, pattern_es, adj_es)
+
+    def prepare(self, instr: Instruction) -> tuple[A_Bucket, list[PatternEdge]]:
+        """由 f 桶构造 A 桶, 并初始化 ctx 中 A_pool 对应位置"""
+
         # 解析出, 当前的 `模式顶点`
         _, curr_pat_vid = self.resolve_var(instr.single_op)
 
         pattern_es = self.ctx.get_pattern_e_batch(instr.expand_eid_list)
-        pattern_vs = self.ctx.pattern_vs
         f_bucket = self.ctx.resolve_f_pool(instr.single_op or "")
         A_bucket = A_Bucket.from_f_bucket(curr_pat_vid, f_bucket)
 
         # 先初始化 ctx 中 A_pool 对应位置
         self.ctx.init_A_pool(instr.target_var)
 
+        return A_bucket, pattern_es
+
+    def expand(
+        self,
+        instr: Instruction,
+        A_bucket: A_Bucket,
+        pattern_es: list[PatternEdge],
+        adj_es: PrefetchedAdjEdges,
+    ):
+        """由预取的邻接边扩张, 更新容器"""
+
         # 直接调用新的 `增量边载入` 逻辑
         formalized_data_vids = A_bucket.incremental_load_new_edges(
-            pattern_es, pattern_vs, self.storage_adapter
+            pattern_es, adj_es, self.ctx.layout, self.ctx.store
         )
 
         # 更新容器 (以及 `已被扩张的点集`)
@@ -1,9 +1,9 @@
 from typing import override
 
 from executor.instr_ops.abc import InstrOperator
-from schema import Instruction
+from executor.matching_ctx.embedding import Multiplicities
+from schema import DataVertex, Instruction, PatternVertex
 from utils import dbg
-from utils.dyn_graph import DynGraph
 
 
 class InitOperator(InstrOperator):
@@ -14,28 +14,42 @@ class InitOperator(InstrOperator):
     """
 
     @override
-    def execute(self, instr: Instruction, result: list[list[DynGraph]] = []):
+    def execute(self, instr: Instruction, result: list[Multiplicities] = []):
         """执行指令"""
 
         dbg.pprint_instr(instr)
 
         pattern_v = self.ctx.get_pattern_v(instr.vid)
-        label, attr = pattern_v.label, pattern_v.attr
 
-        # 加载顶点
-        matched_vs = (
-            self.storage_adapter.load_v(label)
-            if not attr
-            else self.storage_adapter.load_v_with_attr(label, attr)
-        )
+        # 加载顶点 (分片执行时, 只使用给定的点)
+        matched_vs = self.ctx.init_vs.get(pattern_v.vid)
+        if matched_vs is None:
+            matched_vs = self.load_vertices(pattern_v)
+
+        self.bind_vertices(instr, pattern_v, matched_vs)
+
+    def bind_vertices(
+        self, instr: Instruction, pattern_v: PatternVertex, matched_vs: list[DataVertex]
+    ):
+        """每个点各自构成一个部分匹配, 放入 f_pool"""
 
         # 这里一定先 `初始化` f_pool 对应位置
         self.ctx.init_f_pool(instr.target_var)
 
         # 更新容器
+        v_slot = self.ctx.layout.v_slots[pattern_v.vid]
         for data_v in matched_vs:
             # 如果这个点已经被 `扩张` 过了, 那么就不应该被 `重复更新`
             # if data_v.vid in self.ctx.formalized_data_vids:
             #     continue
-            matched_dg = DynGraph().update_v(data_v, pattern_v.vid)
-            self.ctx.append_to_f_pool(instr.target_var, matched_dg, data_v.vid)
+            self.ctx.store.add_v(data_v)
+            matched = self.ctx.layout.bind(self.ctx.layout.empty(), v_slot, data_v.vid)
+            self.ctx.append_to_f_pool(instr.target_var, matched, data_v.vid)
+
+    def load_vertices(self, pattern_v: PatternVertex) -> list[DataVertex]:
+        label, attr = pattern_v.label, pattern_v.attr
+        return (
+            self.storage_adapter.load_v(label)
+            if not attr
+            else self.storage_adapter.load_v_with_attr(label, attr)
+        )
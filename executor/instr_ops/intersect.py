@@ -2,17 +2,17 @@ from typing import override
 
 from executor.instr_ops.abc import InstrOperator
 from executor.matching_ctx.buckets import C_Bucket, T_Bucket
+from executor.matching_ctx.embedding import CandidateIndex, Multiplicities
 from schema import DataVertex, Instruction
 from schema.basic import VarPrefix
 from utils import dbg
-from utils.dyn_graph import DynGraph
 
 
 class IntersectOperator(InstrOperator):
     """Intersect 指令算子"""
 
     @override
-    def execute(self, instr: Instruction, result: list[list[DynGraph]] = []):
+    def execute(self, instr: Instruction, result: list[Multiplicities] = []):
         """执行指令"""
 
         dbg.pprint_instr(instr)
@@ -40,12 +40,12 @@ class IntersectOperator(InstrOperator):
             # 如果 A_bucket 为空, 说明没有邻接点, 那么就直接返回
             return
 
-        loaded_vs, loaded_v_pat_strs = self.load_vertices(instr)
         C_bucket = C_Bucket.build_from_A(
             A_bucket,
             curr_pat_vid=instr.vid,
-            loaded_vs=loaded_vs,
-            loaded_v_pat_strs=loaded_v_pat_strs,
+            candidates=self.load_candidates(instr),
+            layout=self.ctx.layout,
+            store=self.ctx.store,
         )
         self.ctx.update_C_pool(instr.target_var, C_bucket)
 
@@ -61,13 +61,14 @@ class IntersectOperator(InstrOperator):
         if not A1 or not A2:
             return
 
-        T_bucket = T_Bucket.build_from_A_A(A1, A2, instr.vid)
+        layout, store = self.ctx.layout, self.ctx.store
+        T_bucket = T_Bucket.build_from_A_A(A1, A2, instr.vid, layout, store)
         if len(A_buckets) > 2:
             prev_T = T_bucket
             for A_bucket in A_buckets[2:]:
                 if not A_bucket:
                     return
-                T_bucket = T_Bucket.build_from_T_A(prev_T, A_bucket)
+                T_bucket = T_Bucket.build_from_T_A(prev_T, A_bucket, layout, store)
                 prev_T = T_bucket
 
             if not prev_T:
@@ -82,12 +83,17 @@ class IntersectOperator(InstrOperator):
         # 初始化 ctx 中 C_pool 对应位置
         self.ctx.init_C_pool(instr.target_var)
 
-        loaded_vs, loaded_v_pat_strs = self.load_vertices(instr)
         T_bucket = self.ctx.resolve_T_pool(instr.single_op or "")
-        if not T_Bucket:
+        if not T_bucket:
             return
 
-        C_bucket = C_Bucket.build_from_T(T_bucket, loaded_vs, loaded_v_pat_strs)
+        C_bucket = C_Bucket.build_from_T(
+            T_bucket,
+            instr.vid,
+            self.load_candidates(instr),
+            self.ctx.layout,
+            self.ctx.store,
+        )
         self.ctx.update_C_pool(instr.target_var, C_bucket)
 
     """ ========== Helpers ========== """
@@ -100,5 +106,19 @@ class IntersectOperator(InstrOperator):
             loaded_vs = self.storage_adapter.load_v(label)
         else:
             loaded_vs = self.storage_adapter.load_v_with_attr(label, attr)
-        loaded_v_pat_strs = [pattern_v.vid for _ in range(len(loaded_vs))]
-        return loaded_vs, loaded_v_pat_strs
+        return loaded_vs
+
+    def load_candidates(self, instr: Instruction) -> CandidateIndex:
+        """
+        候选点集 (建好索引后, 由该指令涉及的所有部分匹配共用)
+
+        - 按 (标签, 属性) 缓存在上下文中: 分片执行时, 各分片不再重复构造
+        """
+
+        pattern_v = self.ctx.get_pattern_v(instr.vid)
+        key = (pattern_v.label, pattern_v.attr)
+        candidates = self.ctx.candidate_indexes.get(key)
+        if candidates is None:
+            candidates = CandidateIndex(self.load_vertices(instr))
+            self.ctx.candidate_indexes[key] = candidates
+        return candidates
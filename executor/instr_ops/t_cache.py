@@ -2,8 +2,8 @@ from typing import override
 from warnings import deprecated
 
 from executor.instr_ops.abc import InstrOperator
+from executor.matching_ctx.embedding import Multiplicities
 from schema import Instruction
-from utils.dyn_graph import DynGraph
 
 DEPRECATED_REASON = "TCache 暂时不会出现, 后续考虑如何进行 `三角形优化`"
 
@@ -14,5 +14,5 @@ class TCacheOperator(InstrOperator):
 
     @deprecated(DEPRECATED_REASON)
     @override
-    def execute(self, instr: Instruction, result: list[list[DynGraph]] = []):
+    def execute(self, instr: Instruction, result: list[Multiplicities] = []):
         """执行指令"""
@@ -1,11 +1,17 @@
 from dataclasses import dataclass, field
-from functools import lru_cache
+from functools import cached_property, lru_cache
+from typing import Optional
 
 from executor.matching_ctx.buckets import A_Bucket, C_Bucket, T_Bucket, f_Bucket
+from executor.matching_ctx.embedding import (
+    CandidateIndex,
+    Embedding,
+    EmbeddingLayout,
+    EntityStore,
+)
 from executor.matching_ctx.type_aliases import DgVid, PgEid, PgVid
-from schema import PlanData
+from schema import DataVertex, InstructionType, Label, PatternAttr, PlanData
 from schema.basic import STR_TUPLE_SPLITTER
-from utils.dyn_graph import DynGraph
 
 
 @lru_cache
@@ -21,6 +27,18 @@ class MatchingCtx:
     plan_data: PlanData
     """ 执行计划 """
 
+    init_vs: dict[PgVid, list[DataVertex]] = field(default_factory=dict)
+    """
+    预先给定的 Init 点 (按 Init 的点分片执行时使用)
+    - { 点模式标签 pg_vid -> [data_v] }, 未给定的模式点仍从存储中载入
+    """
+
+    count_only: bool = False
+    """ 计数模式: 最后一层 Foreach 只数候选, 不再构造部分匹配 """
+
+    store: EntityStore = field(default_factory=EntityStore)
+    """ 点 / 边实体仓库 (部分匹配中只保存 id) """
+
     formalized_data_vids: set[DgVid] = field(default_factory=set)
     """ 已经在 GetAdj 步骤中, 匹配到 pattern 的数据图点集 """
 
@@ -52,9 +70,70 @@ class MatchingCtx:
     - { 点模式标签 pg_vid -> T_bucket }
     """
 
+    candidate_indexes: dict[tuple[Label, Optional[PatternAttr]], CandidateIndex] = (
+        field(default_factory=dict)
+    )
+    """
+    Intersect 的候选点集索引
+    - { (点标签, 点属性) -> 索引 }, 同一引擎的各个分片共用, 每组只构造一次
+    """
+
     def __post_init__(self):
         self.pattern_vs = self.plan_data.pattern_vs
         self.pattern_es = self.plan_data.pattern_es
+        self.layout = EmbeddingLayout(self.pattern_vs, self.pattern_es)
+
+    def fork(self) -> "MatchingCtx":
+        """
+        复制容器 (流水线执行时, 各块由此各自执行余下的指令)
+
+        - 部分匹配不可变, 直接共用; 只复制会被 `pop` 的字典 (包括 A 桶的分组)
+        - 实体仓库与候选点集索引在各块之间共用
+        """
+
+        return MatchingCtx(
+            self.plan_data,
+            init_vs=self.init_vs,
+            count_only=self.count_only,
+            store=self.store,
+            formalized_data_vids=self.formalized_data_vids,
+            F_pool=dict(self.F_pool),
+            A_pool={key: A_bucket.fork() for key, A_bucket in self.A_pool.items()},
+            C_pool=dict(self.C_pool),
+            T_pool=dict(self.T_pool),
+            candidate_indexes=self.candidate_indexes,
+        )
+
+    @cached_property
+    def reported_f_vars(self) -> set[str]:
+        """不会再被 GetAdj 扩张的 f 变量 (其中的匹配原样交给 Report)"""
+
+        instructions = self.plan_data.instructions
+        expanded = {
+            instr.single_op
+            for instr in instructions
+            if instr.type == InstructionType.GetAdj
+        }
+        return {
+            instr.target_var
+            for instr in instructions
+            if instr.type == InstructionType.Foreach
+            and instr.target_var not in expanded
+        }
+
+    @cached_property
+    def f_keys_in_plan_order(self) -> list[PgVid]:
+        """
+        f 容器的键, 按计划中产出的顺序 (Report 按此顺序汇总)
+
+        - 与逐条执行时 F_pool 的插入顺序相同; 按 `depend_on` 调度时, 插入顺序不再确定
+        """
+
+        return [
+            resolve_var_name(instr.target_var)
+            for instr in self.plan_data.instructions
+            if instr.type in (InstructionType.Init, InstructionType.Foreach)
+        ]
 
     """ ========== """
 
@@ -66,14 +145,14 @@ class MatchingCtx:
     def append_to_f_pool(
         self,
         target_var: str,
-        matched_dg: DynGraph,
+        matched: Embedding,
         pivot: DgVid,
     ):
         """Init: 更新 f_pool 成功匹配部分"""
         key = resolve_var_name(target_var)
         next_idx = len(self.F_pool[key].all_matched)
         f_bucket = self.F_pool[key]
-        f_bucket.all_matched.append(matched_dg)
+        f_bucket.all_matched.append(matched)
         f_bucket.matched_with_frontiers.setdefault(next_idx, []).append(pivot)
 
     def update_f_pool(self, target_var: str, f_bucket: f_Bucket):
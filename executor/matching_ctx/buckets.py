@@ -1,77 +1,173 @@
-from copy import deepcopy
-from dataclasses import dataclass, field
+import asyncio
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field, replace
+from itertools import chain
+from typing import Iterable, Iterator, Optional
 
+import config
 from config import DIRECTED_EDGE_SUPPORT
+from executor.matching_ctx.embedding import (
+    CandidateIndex,
+    Embedding,
+    EmbeddingLayout,
+    EntityStore,
+    Expanding,
+    Multiplicities,
+    to_multiplicities,
+)
 from executor.matching_ctx.type_aliases import DgVid, PgVid
-from schema import DataEdge, DataVertex, PatternEdge, PatternVertex
-from schema.basic import str_op_to_operator
-from storage.abc import StorageAdapter
-from utils.dyn_graph import DynGraph
-from utils.expanding_graph import ExpandGraph
-
-
-def does_data_v_satisfy_pattern(
-    dg_vid: DgVid,
-    pat_vid: PgVid,
-    pattern_vs: dict[PgVid, PatternVertex],
-    storage_adapter: StorageAdapter,
-) -> bool:
-    pattern_v = pattern_vs[pat_vid]
-    data_v = storage_adapter.get_v(dg_vid)
-
-    # 比较标签
-    if pattern_v.label != data_v.label:
-        return False
-
-    # 比较属性
-    if not pattern_v.attr:
-        # 模式点未规定属性
-        return True
-    elif not data_v.attrs:
-        # 模式点规定了属性, 但是数据点没有属性
-        return False
-    else:
-        operator = str_op_to_operator(pattern_v.attr.op)
-        if pattern_v.attr.key not in data_v.attrs:
-            # 模式点规定了属性, 但是数据点没有这个属性
-            return False
-        data_value = data_v.attrs[pattern_v.attr.key]
-        if type(data_value) is not type(pattern_v.attr.value):
-            # 模式点规定了属性, 但是数据点的属性类型不匹配
-            return False
-        return operator(data_value, pattern_v.attr.value)
+from schema import DataEdge, Label, PatternAttr, PatternEdge, PatternVertex
+from storage.abc import AdjWithEndpoints, StorageAdapter, merge_adj_with_endpoints
+from storage.aio import AsyncStorageAdapter
+
+type AdjEdges = dict[DgVid, list[DataEdge]]
+""" 边缘点 -> 邻接边 (批量加载的结果) """
+
+type AdjLookup = tuple[bool, Label, Label, Optional[PatternAttr], Optional[PatternAttr]]
+""" 一次批量邻接边查询: (边缘点是否为 `src`, 边标签, 远端点标签, 边属性, 远端点属性) """
+
+type Signature = tuple[int, ...]
+""" 部分匹配中 `已绑定的槽位` """
+
+type PendingKey = tuple[DgVid, tuple[int, ...]]
+""" (未连接的点, 共享槽位上的 id) """
+
+
+def bound_slots(embedding: Embedding) -> Signature:
+    return tuple(slot for slot, data_id in enumerate(embedding) if data_id is not None)
 
 
 @dataclass
 class f_Bucket:
     """枚举目标 (f) 桶"""
 
-    all_matched: list[DynGraph] = field(default_factory=list)
+    all_matched: list[Embedding] = field(default_factory=list)
     matched_with_frontiers: dict[int, list[DgVid]] = field(default_factory=dict)
 
+    counted: Multiplicities = field(default_factory=dict)
+    """ 计数模式下, 最后一层 Foreach 只记录 { 部分匹配 -> 重数 } """
+
     @classmethod
-    def from_C_bucket(cls, C_bucket: "C_Bucket"):
-        all_matched: list[DynGraph] = []
+    def counted_from_C_bucket(
+        cls, C_bucket: "C_Bucket", layout: EmbeddingLayout, store: EntityStore
+    ):
+        return cls(
+            counted=to_multiplicities(
+                expanding.to_embedding(layout, store)
+                for expanding in C_bucket.all_expanded
+            )
+        )
+
+    def multiplicities(self) -> Multiplicities:
+        if not self.all_matched:
+            return self.counted
+        return to_multiplicities(self.all_matched)
+
+    def split(self, sizes: Iterable[int]) -> Iterator["f_Bucket"]:
+        """依次切出 `sizes` 个部分匹配 (计数模式下只有重数的桶不能切分)"""
+
+        start, n = 0, len(self.all_matched)
+        for size in sizes:
+            if start >= n:
+                return
+            end = min(start + size, n)
+            yield f_Bucket(
+                self.all_matched[start:end],
+                {
+                    idx - start: self.matched_with_frontiers[idx]
+                    for idx in range(start, end)
+                    if idx in self.matched_with_frontiers
+                },
+            )
+            start = end
+
+    @classmethod
+    def from_C_bucket(
+        cls, C_bucket: "C_Bucket", layout: EmbeddingLayout, store: EntityStore
+    ):
+        all_matched: list[Embedding] = []
+        matched_with_frontiers: dict[int, list[DgVid]] = {}
 
         # 现在的算法, 会在 C_bucket 阶段, 直接完成基于 `下一个数据点` 的 `分裂`
-        all_matched = [g.to_dyn_graph_cloned() for g in C_bucket.all_expanded]
-        matched_with_frontiers = {
-            idx: C_bucket.expanded_idx_with_frontiers[idx]
-            for idx, _ in enumerate(C_bucket.all_expanded)
-        }
+        for idx, expanding in enumerate(C_bucket.all_expanded):
+            embedding = expanding.to_embedding(layout, store)
+            if embedding is None:
+                continue
+            matched_with_frontiers[len(all_matched)] = (
+                C_bucket.expanded_idx_with_frontiers[idx]
+            )
+            all_matched.append(embedding)
 
         return cls(all_matched, matched_with_frontiers)
 
 
+class PrefetchedAdjEdges:
+    """
+    GetAdj 预取的邻接边 (与 `pattern_es` 一一对应: (正向邻接边, 反向邻接边))
+
+    - `边缘点` 按首次出现的顺序切块, 每块一个 `Future` (各模式边及方向的查询结果);
+      部分匹配也按同样的顺序扩张, 扩张时只等待其边缘点所在的块 (及之前的块),
+      之后的块仍在线程池中加载, 查询的 I/O 与 Python 侧的扩张相互重叠
+    - 各块按顺序合并, 远端点在合并时放入 `store` (只在调用方线程中修改)
+    """
+
+    __slots__ = ("chunk_of", "futures", "store", "n_merged", "adj_es")
+
+    def __init__(
+        self,
+        chunks: list[list[DgVid]],
+        futures: list[Future[list[tuple[AdjWithEndpoints, AdjWithEndpoints]]]],
+        store: EntityStore,
+    ) -> None:
+        self.chunk_of = {vid: i for i, chunk in enumerate(chunks) for vid in chunk}
+        self.futures = futures
+        self.store = store
+        self.n_merged = 0
+        self.adj_es: list[tuple[AdjEdges, AdjEdges]] = []
+
+    @classmethod
+    def loaded(
+        cls,
+        frontier_vids: list[DgVid],
+        loaded: list[tuple[AdjWithEndpoints, AdjWithEndpoints]],
+        store: EntityStore,
+    ):
+        """已全部加载 (单块 / 异步执行): 不再等待"""
+
+        future: Future[list[tuple[AdjWithEndpoints, AdjWithEndpoints]]] = Future()
+        future.set_result(loaded)
+        return cls([frontier_vids], [future], store)
+
+    def wait_for(self, vid: DgVid) -> list[tuple[AdjEdges, AdjEdges]]:
+        """等待 `vid` 所在的块 (及之前的块) 加载完成, 返回目前已合并的邻接边"""
+
+        chunk = self.chunk_of[vid]
+        while self.n_merged <= chunk:
+            self.merge(self.futures[self.n_merged].result())
+            self.n_merged += 1
+        return self.adj_es
+
+    def merge(self, loaded: list[tuple[AdjWithEndpoints, AdjWithEndpoints]]):
+        if not self.adj_es:
+            self.adj_es = [({}, {}) for _ in loaded]
+        for (forward, backward), (loaded_forward, loaded_backward) in zip(
+            self.adj_es, loaded
+        ):
+            forward.update(loaded_forward[0])
+            backward.update(loaded_backward[0])
+            for v in chain(loaded_forward[1].values(), loaded_backward[1].values()):
+                self.store.add_v(v)
+
+
 @dataclass
 class A_Bucket:
     """邻接组合 (A) 桶"""
 
     curr_pat_vid: PgVid
-    all_matched: list[DynGraph] = field(default_factory=list)
+    all_matched: list[Embedding] = field(default_factory=list)
     matched_with_frontiers: dict[int, list[DgVid]] = field(default_factory=dict)
 
-    next_pat_grouped_expanding: dict[PgVid, list[ExpandGraph]] = field(
+    next_pat_grouped_expanding: dict[PgVid, list[Expanding]] = field(
         default_factory=dict
     )
 
@@ -83,74 +179,207 @@ class A_Bucket:
             f_bucket.matched_with_frontiers,
         )
 
-    def incremental_load_new_edges(
+    def fork(self) -> "A_Bucket":
+        """复制分组字典 (各分组会被 Intersect `pop`), 分组中的部分匹配直接共用"""
+        return replace(
+            self, next_pat_grouped_expanding=dict(self.next_pat_grouped_expanding)
+        )
+
+    def frontier_vids(self) -> list[DgVid]:
+        """所有部分匹配上的 `边缘点` (去重, 保持顺序)"""
+
+        return list(
+            dict.fromkeys(
+                vid for vids in self.matched_with_frontiers.values() for vid in vids
+            )
+        )
+
+    def adj_lookups(
+        self,
+        pattern_es: list[PatternEdge],
+        pattern_vs: dict[PgVid, PatternVertex],
+    ) -> list[tuple[AdjLookup, Optional[AdjLookup]]]:
+        """
+        与 `pattern_es` 一一对应的批量查询: (正向查询, 反向查询)
+
+        - 正向: 从 `curr_pat_vid` 沿 `模式边` 方向出发的边
+        - 反向: 只在不支持有向边时需要, 否则为 `None`
+        """
+
+        lookups: list[tuple[AdjLookup, Optional[AdjLookup]]] = []
+        for pat_e in pattern_es:
+            is_src = self.curr_pat_vid == pat_e.src_vid
+            next_pat_v = pattern_vs[pat_e.dst_vid if is_src else pat_e.src_vid]
+            args = (pat_e.label, next_pat_v.label, pat_e.attr, next_pat_v.attr)
+            forward: AdjLookup = (is_src, *args)
+            # 如果不支持有向边, 就该把 `反方向` 的边也加载进来
+            backward: Optional[AdjLookup] = (
+                (not is_src, *args) if not DIRECTED_EDGE_SUPPORT else None
+            )
+            lookups.append((forward, backward))
+        return lookups
+
+    @staticmethod
+    def load_adj_chunk(
+        lookups: list[tuple[AdjLookup, Optional[AdjLookup]]],
+        storage_adapter: StorageAdapter,
+        frontier_vids: list[DgVid],
+    ) -> list[tuple[AdjWithEndpoints, AdjWithEndpoints]]:
+        """一块 `边缘点`: 每条模式边 (及方向) 各一次批量查询"""
+
+        def load(lookup: Optional[AdjLookup]) -> AdjWithEndpoints:
+            if lookup is None:
+                return {}, {}
+            from_src, *args = lookup
+            load_adj = (
+                storage_adapter.load_e_by_src_vids_to
+                if from_src
+                else storage_adapter.load_e_by_dst_vids_from
+            )
+            return load_adj(frontier_vids, *args)
+
+        return [(load(forward), load(backward)) for forward, backward in lookups]
+
+    def prefetch_adj_edges(
         self,
         pattern_es: list[PatternEdge],
         pattern_vs: dict[PgVid, PatternVertex],
         storage_adapter: StorageAdapter,
+        store: EntityStore,
+        pool: Optional[Executor] = None,
+        chunk_size: Optional[int] = None,
+    ) -> PrefetchedAdjEdges:
+        """
+        批量加载 `所有边缘点` 的邻接边
+
+        - 先收集全部 `边缘点`, 再按 `模式边` (及方向) 批量查询, 而不是逐点逐边查询
+        - 只加载 `远端点` 满足 `下一个模式点` (标签及属性) 的边, 由存储层完成过滤;
+          远端点随同一批查询返回, 放入 `store`
+        - 给定 `pool` 且边缘点多于 `chunk_size` 时, 按块提交到线程池, 不等待加载完成
+          (见 `PrefetchedAdjEdges`); 否则当场一次加载
+        - `chunk_size` 缺省时, 在调用时读取 `config.GETADJ_PREFETCH_CHUNK_SIZE`
+        """
+
+        if chunk_size is None:
+            chunk_size = config.GETADJ_PREFETCH_CHUNK_SIZE
+        frontier_vids = self.frontier_vids()
+        lookups = self.adj_lookups(pattern_es, pattern_vs)
+        if pool is None or len(frontier_vids) <= chunk_size:
+            loaded = self.load_adj_chunk(lookups, storage_adapter, frontier_vids)
+            return PrefetchedAdjEdges.loaded(frontier_vids, loaded, store)
+
+        chunks = [
+            frontier_vids[i : i + chunk_size]
+            for i in range(0, len(frontier_vids), chunk_size)
+        ]
+        futures = [
+            pool.submit(self.load_adj_chunk, lookups, storage_adapter, chunk)
+            for chunk in chunks
+        ]
+        return PrefetchedAdjEdges(chunks, futures, store)
+
+    async def prefetch_adj_edges_async(
+        self,
+        pattern_es: list[PatternEdge],
+        pattern_vs: dict[PgVid, PatternVertex],
+        storage_adapter: AsyncStorageAdapter,
+        store: EntityStore,
+        semaphore: asyncio.Semaphore,
+        chunk_size: int,
+    ) -> PrefetchedAdjEdges:
+        """
+        同 `prefetch_adj_edges`, 但 `边缘点` 按 `chunk_size` 切块,
+        各模式边 (及方向) 的各块同时查询, 同时进行的查询数由 `semaphore` 限制
+
+        - 同一个边缘点只出现在一块中, 按块的顺序合并后与同步版本的结果相同
+        """
+
+        frontier_vids = self.frontier_vids()
+        chunks = [
+            frontier_vids[i : i + chunk_size]
+            for i in range(0, len(frontier_vids), chunk_size)
+        ]
+
+        async def load_chunk(lookup: AdjLookup, chunk: list[DgVid]):
+            from_src, *args = lookup
+            load_adj = (
+                storage_adapter.load_e_by_src_vids_to
+                if from_src
+                else storage_adapter.load_e_by_dst_vids_from
+            )
+            async with semaphore:
+                return await load_adj(chunk, *args)
+
+        async def load(lookup: Optional[AdjLookup]) -> AdjWithEndpoints:
+            if lookup is None:
+                return {}, {}
+            parts = await asyncio.gather(
+                *(load_chunk(lookup, chunk) for chunk in chunks)
+            )
+            return merge_adj_with_endpoints(parts)
+
+        async def load_both(forward: AdjLookup, backward: Optional[AdjLookup]):
+            forward_loaded, backward_loaded = await asyncio.gather(
+                load(forward), load(backward)
+            )
+            return forward_loaded, backward_loaded
+
+        loaded = await asyncio.gather(
+            *(
+                load_both(forward, backward)
+                for forward, backward in self.adj_lookups(pattern_es, pattern_vs)
+            )
+        )
+        return PrefetchedAdjEdges.loaded(frontier_vids, loaded, store)
+
+    def incremental_load_new_edges(
+        self,
+        pattern_es: list[PatternEdge],
+        adj_es: PrefetchedAdjEdges,
+        layout: EmbeddingLayout,
+        store: EntityStore,
     ):
+        """
+        由预取的邻接边 (`prefetch_adj_edges(_async)` 的结果) 构造 `扩张中` 的部分匹配
+
+        - 按顺序逐个部分匹配扩张, 每个边缘点只等待其所在的块加载完成
+        """
+
         formalized_data_vids: set[DgVid] = set()
 
         # 迭代 `已匹配` 的数据图
         for idx, frontier_vids in self.matched_with_frontiers.items():
-            matched_dg = self.all_matched[idx]
+            matched = self.all_matched[idx]
+            matched_eids = set(layout.es(matched))
 
             # 迭代 `边缘点` (当前 `数据图` 上)
             for frontier_vid in frontier_vids:
                 is_pivot_vid_formalized = False
 
                 # 迭代 `模式边`
-                for pat_e in pattern_es:
+                adj = adj_es.wait_for(frontier_vid)
+                for pat_e, (forward, backward) in zip(pattern_es, adj):
                     # 如果 `matched_dg` 中已经包含 `pat_e` 这条模式边, 应该跳过
-                    # if pat_e.eid in matched_dg.get_e_pat_str_set():
+                    # if matched[layout.e_slots[pat_e.eid]] is not None:
                     #     continue
 
-                    label, attr = pat_e.label, pat_e.attr
                     next_vid_grouped_conn_es: dict[DgVid, list[DataEdge]] = {}
                     next_vid_grouped_conn_pat_strs: dict[DgVid, list[str]] = {}
 
                     if self.curr_pat_vid == pat_e.src_vid:
                         next_pat_vid = pat_e.dst_vid
-                        # 挑选 `可连接到下一个模式点` 的边
+                        # 挑选 `可连接到下一个模式点` 的边 (远端点已由存储层过滤)
                         matched_data_es = [
                             e
-                            for e in (
-                                storage_adapter.load_e_by_src_vid(frontier_vid, label)
-                                if not attr
-                                else storage_adapter.load_e_by_src_vid_with_attr(
-                                    frontier_vid, label, attr
-                                )
-                            )
-                            if does_data_v_satisfy_pattern(
-                                e.dst_vid,
-                                next_pat_vid,
-                                pattern_vs,
-                                storage_adapter,
-                            )
-                            and e.eid not in matched_dg.e_entities
+                            for e in forward[frontier_vid]
+                            if e.eid not in matched_eids
+                        ]
+                        # 挑选 `可连接到下一个模式点` 的反向边 (仅当不支持有向边)
+                        matched_data_es += [
+                            e
+                            for e in backward.get(frontier_vid, [])
+                            if e.eid not in matched_eids
                         ]
-                        if not DIRECTED_EDGE_SUPPORT:
-                            # 如果不支持有向边, 就该把 `反方向` 的边也加载进来
-                            # 挑选 `可连接到下一个模式点` 的边
-                            matched_data_es += [
-                                e
-                                for e in (
-                                    storage_adapter.load_e_by_dst_vid(
-                                        frontier_vid, label
-                                    )
-                                    if not attr
-                                    else storage_adapter.load_e_by_dst_vid_with_attr(
-                                        frontier_vid, label, attr
-                                    )
-                                )
-                                if does_data_v_satisfy_pattern(
-                                    e.src_vid,
-                                    next_pat_vid,
-                                    pattern_vs,
-                                    storage_adapter,
-                                )
-                                and e.eid not in matched_dg.e_entities
-                            ]
                         # 按照 `下一个数据点` 分组
                         for e in matched_data_es:
                             next_vid_grouped_conn_es.setdefault(e.dst_vid, []).append(e)
@@ -159,46 +388,18 @@ class A_Bucket:
                             ).append(pat_e.eid)
                     else:
                         next_pat_vid = pat_e.src_vid
-                        # 挑选 `可连接到下一个模式点` 的边
+                        # 挑选 `可连接到下一个模式点` 的边 (远端点已由存储层过滤)
                         matched_data_es = [
                             e
-                            for e in (
-                                storage_adapter.load_e_by_dst_vid(frontier_vid, label)
-                                if not attr
-                                else storage_adapter.load_e_by_dst_vid_with_attr(
-                                    frontier_vid, label, attr
-                                )
-                            )
-                            if does_data_v_satisfy_pattern(
-                                e.src_vid,
-                                next_pat_vid,
-                                pattern_vs,
-                                storage_adapter,
-                            )
-                            and e.eid not in matched_dg.e_entities
+                            for e in forward[frontier_vid]
+                            if e.eid not in matched_eids
+                        ]
+                        # 挑选 `可连接到下一个模式点` 的反向边 (仅当不支持有向边)
+                        matched_data_es += [
+                            e
+                            for e in backward.get(frontier_vid, [])
+                            if e.eid not in matched_eids
                         ]
-                        if not DIRECTED_EDGE_SUPPORT:
-                            # 如果不支持有向边, 就该把 `反方向` 的边也加载进来
-                            # 挑选 `可连接到下一个模式点` 的边
-                            matched_data_es += [
-                                e
-                                for e in (
-                                    storage_adapter.load_e_by_src_vid(
-                                        frontier_vid, label
-                                    )
-                                    if not attr
-                                    else storage_adapter.load_e_by_src_vid_with_attr(
-                                        frontier_vid, label, attr
-                                    )
-                                )
-                                if does_data_v_satisfy_pattern(
-                                    e.dst_vid,
-                                    next_pat_vid,
-                                    pattern_vs,
-                                    storage_adapter,
-                                )
-                                and e.eid not in matched_dg.e_entities
-                            ]
                         # 按照 `下一个数据点` 分组
                         for e in matched_data_es:
                             next_vid_grouped_conn_es.setdefault(e.src_vid, []).append(e)
@@ -214,13 +415,23 @@ class A_Bucket:
 
                     # 开始构造 `扩张图`
                     # 注意! 对每一个 `下一个数据点`, 都要各自构造一个 `扩张图`
+                    # (部分匹配不可变, 各个 `扩张图` 直接共享 `matched`, 不必复制)
                     for key, edges in next_vid_grouped_conn_es.items():
-                        expanding_dg = ExpandGraph(deepcopy(matched_dg))
                         pat_strs = next_vid_grouped_conn_pat_strs[key]
-                        expanding_dg.update_valid_dangling_edges(edges, pat_strs)
+                        for e in edges:
+                            store.add_e(e)
+                        expanding = Expanding.with_dangling_edges(
+                            matched,
+                            [
+                                (layout.e_slots[pat_str], e.eid)
+                                for e, pat_str in zip(edges, pat_strs)
+                            ],
+                            layout,
+                            store,
+                        )
                         self.next_pat_grouped_expanding.setdefault(
                             next_pat_vid, []
-                        ).append(expanding_dg)
+                        ).append(expanding)
 
                 # 如果当前 `数据图` 上的 `边缘点` 连接了 `模式边`, 那么就要更新 `已连接点集`
                 if is_pivot_vid_formalized:
@@ -237,7 +448,7 @@ class A_Bucket:
 class C_Bucket:
     """候选集 (C) 桶"""
 
-    all_expanded: list[ExpandGraph] = field(default_factory=list)
+    all_expanded: list[Expanding] = field(default_factory=list)
     expanded_idx_with_frontiers: dict[int, list[DgVid]] = field(default_factory=dict)
 
     @classmethod
@@ -245,63 +456,65 @@ class C_Bucket:
         cls,
         A_bucket: A_Bucket,
         curr_pat_vid: PgVid,
-        loaded_vs: list[DataVertex],
-        loaded_v_pat_strs: list[str],
+        candidates: CandidateIndex,
+        layout: EmbeddingLayout,
+        store: EntityStore,
     ):
-        # 从 A_bucket 中弹出当前分组
-        # curr_group = A_bucket.next_pat_grouped_expanding.pop(curr_pat_vid, [])
-        curr_group = A_bucket.next_pat_grouped_expanding.pop(curr_pat_vid)
+        # 从 A_bucket 中弹出当前分组 (没有任何扩张时, 分组不存在)
+        curr_group = A_bucket.next_pat_grouped_expanding.pop(curr_pat_vid, [])
         if not curr_group:
             return cls()
 
-        all_expanded: list[ExpandGraph] = []
-        expanded_with_frontiers: dict[int, list[DgVid]] = {}
-
-        for idx, expanding in enumerate(curr_group):
-            # 与给定点集 `loaded_vertices` 求交
-            valid_targets = expanding.update_valid_target_vertices(
-                loaded_vs, loaded_v_pat_strs
-            )
-
-            # 更新 `all_expanded`
-            all_expanded.append(expanding)
-
-            # 更新 `expanded_with_pivots`
-            expanded_with_frontiers.setdefault(idx, []).extend(
-                [target.vid for target in valid_targets]
-            )
-
         # 从 `A_bucket` 构造的图, 后续还需要 `进一步枚举`
-        return cls(all_expanded, expanded_with_frontiers)
+        return cls.build_from_group(
+            curr_group, layout.v_slots[curr_pat_vid], candidates, layout, store
+        )
 
     @classmethod
     def build_from_T(
         cls,
         T_bucket: "T_Bucket",
-        loaded_vertices: list[DataVertex],
-        loaded_v_pat_strs: list[str],
+        curr_pat_vid: PgVid,
+        candidates: CandidateIndex,
+        layout: EmbeddingLayout,
+        store: EntityStore,
     ):
         if not T_bucket.expanding_graphs:
             return cls()
 
-        all_expanded: list[ExpandGraph] = []
+        # 从 `T_bucket` 构造的图, 已经被 `完全枚举`
+        return cls.build_from_group(
+            T_bucket.expanding_graphs,
+            layout.v_slots[curr_pat_vid],
+            candidates,
+            layout,
+            store,
+        )
+
+    @classmethod
+    def build_from_group(
+        cls,
+        group: list[Expanding],
+        v_slot: int,
+        candidates: CandidateIndex,
+        layout: EmbeddingLayout,
+        store: EntityStore,
+    ):
+        all_expanded: list[Expanding] = []
         expanded_with_frontiers: dict[int, list[DgVid]] = {}
 
-        for idx, expanding in enumerate(T_bucket.expanding_graphs):
-            # 与给定点集 `loaded_vertices` 求交
-            valid_targets = expanding.update_valid_target_vertices(
-                loaded_vertices, loaded_v_pat_strs
+        for idx, expanding in enumerate(group):
+            # 与候选点集求交 (只查 `半垂悬边` 上尚未匹配的点)
+            valid_targets = expanding.update_valid_targets(
+                candidates, v_slot, layout, store
             )
 
             # 更新 `all_expanded`
             all_expanded.append(expanding)
 
             # 更新 `expanded_with_pivots`
-            expanded_with_frontiers.setdefault(idx, []).extend(
-                [target.vid for target in valid_targets]
-            )
+            expanded_with_frontiers.setdefault(idx, []).extend(valid_targets)
 
-        # 从 `T_bucket` 构造的图, 已经被 `完全枚举`
         return cls(all_expanded, expanded_with_frontiers)
 
 
@@ -315,38 +528,107 @@ class T_Bucket:
     """
 
     target_pat_vid: PgVid
-    expanding_graphs: list[ExpandGraph] = field(default_factory=list)
+    expanding_graphs: list[Expanding] = field(default_factory=list)
 
     @classmethod
-    def build_from_A_A(cls, left: A_Bucket, right: A_Bucket, target_pat_vid: PgVid):
-        left_group = left.next_pat_grouped_expanding.pop(target_pat_vid)
-        right_group = right.next_pat_grouped_expanding.pop(target_pat_vid)
-        expanding_graphs = cls.expand_edges_of_two(left_group, right_group)
+    def build_from_A_A(
+        cls,
+        left: A_Bucket,
+        right: A_Bucket,
+        target_pat_vid: PgVid,
+        layout: EmbeddingLayout,
+        store: EntityStore,
+    ):
+        left_group = left.next_pat_grouped_expanding.pop(target_pat_vid, [])
+        right_group = right.next_pat_grouped_expanding.pop(target_pat_vid, [])
+        expanding_graphs = cls.expand_edges_of_two(
+            left_group, right_group, layout, store
+        )
         return cls(target_pat_vid, expanding_graphs)
 
     @classmethod
-    def build_from_T_A(cls, left: "T_Bucket", right: A_Bucket):
+    def build_from_T_A(
+        cls,
+        left: "T_Bucket",
+        right: A_Bucket,
+        layout: EmbeddingLayout,
+        store: EntityStore,
+    ):
         left_group = left.expanding_graphs
-        right_group = right.next_pat_grouped_expanding.pop(left.target_pat_vid)
-        expanding_graphs = cls.expand_edges_of_two(left_group, right_group)
+        right_group = right.next_pat_grouped_expanding.pop(left.target_pat_vid, [])
+        expanding_graphs = cls.expand_edges_of_two(
+            left_group, right_group, layout, store
+        )
         return cls(left.target_pat_vid, expanding_graphs)
 
     @staticmethod
     def expand_edges_of_two(
-        left_group: list[ExpandGraph],
-        right_group: list[ExpandGraph],
+        left_group: list[Expanding],
+        right_group: list[Expanding],
+        layout: EmbeddingLayout,
+        store: EntityStore,
     ):
-        """分 `有公共点` 和 `无公共点`, 将两张图 `枚举式` 的拓展成新图"""
+        """
+        分 `有公共点` 和 `无公共点`, 将两张图 `枚举式` 的拓展成新图
+
+        - 哈希连接: 以 (`未连接的点`, 两侧都已绑定的槽位上的 id) 为键,
+          只合并落在同一个桶中的两侧 (其余组合合并后必然被放弃)
+        - 结果的顺序与两两比较时一致
+        """
 
-        result: list[ExpandGraph] = []
+        result: list[Expanding] = []
 
         outer_, inner_ = left_group, right_group
         if len(outer_) > len(inner_):
             outer_, inner_ = inner_, outer_
 
+        inner_grouped = [
+            inner.group_dangling_by_pending_v(layout, store) for inner in inner_
+        ]
+        inner_by_sig: dict[Signature, list[int]] = {}
+        for idx, inner in enumerate(inner_):
+            inner_by_sig.setdefault(bound_slots(inner.base), []).append(idx)
+
+        # (共享槽位, 内侧签名) -> { (未连接的点, 共享槽位上的 id) -> [内侧下标] }
+        tables: dict[tuple[Signature, Signature], dict[PendingKey, list[int]]] = {}
+
+        def table_of(shared: Signature, inner_sig: Signature):
+            table = tables.get((shared, inner_sig))
+            if table is None:
+                table = tables[(shared, inner_sig)] = {}
+                for idx in inner_by_sig[inner_sig]:
+                    bound = tuple(inner_[idx].base[slot] for slot in shared)
+                    for pending_vid in inner_grouped[idx]:
+                        table.setdefault((pending_vid, bound), []).append(idx)
+            return table
+
         for outer in outer_:
-            for inner in inner_:
-                unions = ExpandGraph.union_then_intersect_on_connective_v(outer, inner)
-                result.extend(unions)
+            outer_grouped = outer.group_dangling_by_pending_v(layout, store)
+            outer_sig = set(bound_slots(outer.base))
+
+            # 内侧下标 -> 两侧共有的 `未连接的点` (按外侧的顺序)
+            paired: dict[int, list[DgVid]] = {}
+            for inner_sig in inner_by_sig:
+                shared = tuple(slot for slot in inner_sig if slot in outer_sig)
+                table = table_of(shared, inner_sig)
+                bound = tuple(outer.base[slot] for slot in shared)
+                for pending_vid in outer_grouped:
+                    for idx in table.get((pending_vid, bound), []):
+                        paired.setdefault(idx, []).append(pending_vid)
+
+            for idx in sorted(paired):
+                base = layout.union(outer.base, inner_[idx].base)
+                if base is None:
+                    continue
+                for pending_vid in paired[idx]:
+                    result.append(
+                        Expanding.with_dangling_edges(
+                            base,
+                            outer_grouped[pending_vid]
+                            + inner_grouped[idx][pending_vid],
+                            layout,
+                            store,
+                        )
+                    )
 
         return result
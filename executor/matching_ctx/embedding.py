@@ -0,0 +1,254 @@
+"""
+轻量的部分匹配表示 (代替桶中的 `DynGraph` / `ExpandGraph`)
+
+- `Embedding`: 定长元组, 按槽位记录每个模式点 / 模式边绑定的数据 id (`None` 表示未绑定)
+    - 槽位顺序: 先模式点, 后模式边 (见 `EmbeddingLayout`)
+- 点 / 边实体只在 `EntityStore` 中保存一份, 部分匹配之间只共享 id
+- 元组不可变, 扩张时直接共享前缀, 不再 `deepcopy`
+- 只有在输出时, 才由 `EmbeddingLayout.to_dyn_graph` 还原为 `DynGraph`
+"""
+
+from operator import itemgetter
+from typing import Iterable, Optional
+
+from executor.matching_ctx.type_aliases import DgEid, DgVid, PgEid, PgVid
+from schema import DataEdge, DataVertex, PatternEdge, PatternVertex
+from utils.dyn_graph import DynGraph, VNode
+
+type Embedding = tuple[Optional[int], ...]
+""" { 槽位 -> 数据 id }, 槽位由 `EmbeddingLayout` 分配 """
+
+type Multiplicities = dict[Embedding, int]
+""" { 部分匹配 -> 重数 } (Report 的结果, 最终 Join 的输入) """
+
+
+def to_multiplicities(embeddings: Iterable[Optional[Embedding]]) -> Multiplicities:
+    """相同的部分匹配只保留一份, 记录重数 (`None` 被丢弃)"""
+
+    multiplicities: Multiplicities = {}
+    for embedding in embeddings:
+        if embedding is not None:
+            multiplicities[embedding] = multiplicities.get(embedding, 0) + 1
+    return multiplicities
+
+
+class EntityStore:
+    """点 / 边实体仓库 (同一个 `MatchingCtx` 内共享)"""
+
+    __slots__ = ("vertices", "edges")
+
+    def __init__(self) -> None:
+        self.vertices: dict[DgVid, DataVertex] = {}
+        self.edges: dict[DgEid, DataEdge] = {}
+
+    def add_v(self, vertex: DataVertex):
+        self.vertices.setdefault(vertex.vid, vertex)
+
+    def add_e(self, edge: DataEdge):
+        self.edges.setdefault(edge.eid, edge)
+
+
+class CandidateIndex:
+    """
+    `Intersect` 的候选点集 (每条指令只构造一次)
+
+    - { vid -> (载入顺序, 点) }, 与 `半垂悬边` 的未匹配端点求交只需查表
+    """
+
+    __slots__ = ("vertices",)
+
+    def __init__(self, vertices: Iterable[DataVertex]) -> None:
+        self.vertices: dict[DgVid, tuple[int, DataVertex]] = {}
+        for i, v in enumerate(vertices):
+            self.vertices.setdefault(v.vid, (i, v))
+
+    def select(self, vids: Iterable[DgVid]) -> list[DataVertex]:
+        """`vids` ∩ 候选点集 (按载入顺序)"""
+
+        hits = [self.vertices[vid] for vid in vids if vid in self.vertices]
+        hits.sort(key=itemgetter(0))
+        return [v for _, v in hits]
+
+
+class EmbeddingLayout:
+    """模式点 / 模式边 -> 槽位"""
+
+    __slots__ = ("v_pats", "e_pats", "v_slots", "e_slots", "n_vs", "width")
+
+    def __init__(
+        self,
+        pattern_vs: dict[PgVid, PatternVertex],
+        pattern_es: dict[PgEid, PatternEdge],
+    ) -> None:
+        self.v_pats = list(pattern_vs)
+        self.e_pats = list(pattern_es)
+        self.n_vs = len(self.v_pats)
+        self.width = self.n_vs + len(self.e_pats)
+        self.v_slots = {pat: i for i, pat in enumerate(self.v_pats)}
+        self.e_slots = {pat: self.n_vs + i for i, pat in enumerate(self.e_pats)}
+
+    def empty(self) -> Embedding:
+        return (None,) * self.width
+
+    def vs(self, embedding: Embedding) -> tuple[Optional[DgVid], ...]:
+        return embedding[: self.n_vs]
+
+    def es(self, embedding: Embedding) -> tuple[Optional[DgEid], ...]:
+        return embedding[self.n_vs :]
+
+    def bind(self, embedding: Embedding, slot: int, data_id: int) -> Embedding:
+        return embedding[:slot] + (data_id,) + embedding[slot + 1 :]
+
+    def is_complete(self, embedding: Embedding) -> bool:
+        return None not in embedding
+
+    def union(self, left: Embedding, right: Embedding) -> Optional[Embedding]:
+        """
+        两个部分匹配的并集 (`Intersect(T, A)` 使用)
+
+        - 两侧都绑定的槽位必须绑定同一个 id, 否则返回 `None`
+        - 与 `DynGraph.update_v / update_e` 相同: 同一个 id 在两侧绑定到不同槽位时,
+          以右侧为准, 左侧的槽位变为未绑定
+        """
+
+        merged = list(left)
+        for slot, (l_id, r_id) in enumerate(zip(left, right)):
+            if r_id is None or l_id == r_id:
+                continue
+            if l_id is not None:
+                return None
+            start, stop = (0, self.n_vs) if slot < self.n_vs else (self.n_vs, None)
+            for other, other_id in enumerate(left[start:stop], start):
+                if other_id == r_id:
+                    merged[other] = None
+            merged[slot] = r_id
+        return tuple(merged)
+
+    def to_dyn_graph(self, embedding: Embedding, store: EntityStore) -> DynGraph:
+        """输出: 部分匹配 -> `DynGraph` (id 仍为稠密整数)"""
+
+        graph = DynGraph()
+        for pat, vid in zip(self.v_pats, self.vs(embedding)):
+            if vid is None:
+                continue
+            graph.v_entities[vid] = store.vertices[vid]
+            graph.v_2_pattern[vid] = pat
+            graph.pattern_2_vs.setdefault(pat, set()).add(vid)
+            graph.adj_table.setdefault(vid, VNode())
+        for pat, eid in zip(self.e_pats, self.es(embedding)):
+            if eid is None:
+                continue
+            edge = store.edges[eid]
+            graph.e_entities[eid] = edge
+            graph.e_2_pattern[eid] = pat
+            graph.pattern_2_es.setdefault(pat, set()).add(eid)
+            graph.adj_table.setdefault(edge.src_vid, VNode()).e_out.add(eid)
+            graph.adj_table.setdefault(edge.dst_vid, VNode()).e_in.add(eid)
+        return graph
+
+
+class Expanding:
+    """
+    `扩张中` 的部分匹配 (代替 `ExpandGraph`)
+
+    - `base`: 已匹配部分
+    - `dangling`: 半垂悬边 `(槽位, eid)`, 恰有一个端点在 `base` 中
+    - `targets`: 合法的扩张终点 `(槽位, vid)`
+    """
+
+    __slots__ = ("base", "dangling", "targets")
+
+    def __init__(
+        self,
+        base: Embedding,
+        dangling: tuple[tuple[int, DgEid], ...] = (),
+        targets: tuple[tuple[int, DgVid], ...] = (),
+    ) -> None:
+        self.base = base
+        self.dangling = dangling
+        self.targets = targets
+
+    @classmethod
+    def with_dangling_edges(
+        cls,
+        base: Embedding,
+        dangling: Iterable[tuple[int, DgEid]],
+        layout: EmbeddingLayout,
+        store: EntityStore,
+    ):
+        """只保留 `合法半垂悬边`: 尚未匹配, 且恰有一个端点已匹配"""
+
+        vs, es = layout.vs(base), layout.es(base)
+        legal: dict[DgEid, int] = {}
+        for slot, eid in dangling:
+            edge = store.edges[eid]
+            if eid not in es and (edge.src_vid in vs) != (edge.dst_vid in vs):
+                legal[eid] = slot
+        return cls(base, tuple((slot, eid) for eid, slot in legal.items()))
+
+    def pending_vid(self, eid: DgEid, layout: EmbeddingLayout, store: EntityStore):
+        """半垂悬边上 `尚未匹配` 的端点"""
+
+        edge = store.edges[eid]
+        return edge.dst_vid if edge.src_vid in layout.vs(self.base) else edge.src_vid
+
+    def group_dangling_by_pending_v(
+        self, layout: EmbeddingLayout, store: EntityStore
+    ) -> dict[DgVid, list[tuple[int, DgEid]]]:
+        grouped: dict[DgVid, list[tuple[int, DgEid]]] = {}
+        for slot, eid in self.dangling:
+            grouped.setdefault(self.pending_vid(eid, layout, store), []).append(
+                (slot, eid)
+            )
+        return grouped
+
+    def pending_vids(self, layout: EmbeddingLayout, store: EntityStore) -> set[DgVid]:
+        """所有半垂悬边上 `尚未匹配` 的端点"""
+
+        pending = {self.pending_vid(eid, layout, store) for _, eid in self.dangling}
+        pending.difference_update(layout.vs(self.base))
+        return pending
+
+    def update_valid_targets(
+        self,
+        candidates: CandidateIndex,
+        v_slot: int,
+        layout: EmbeddingLayout,
+        store: EntityStore,
+    ) -> list[DgVid]:
+        """更新 `合法扩张终点` (半垂悬边上尚未匹配, 且在候选点集中的点), 返回其 vid"""
+
+        targets = candidates.select(self.pending_vids(layout, store))
+        for v in targets:
+            store.add_v(v)
+        self.targets = tuple((v_slot, v.vid) for v in targets)
+        return [v.vid for v in targets]
+
+    def to_embedding(
+        self, layout: EmbeddingLayout, store: EntityStore
+    ) -> Optional[Embedding]:
+        """
+        连接扩张终点, 得到新的部分匹配 (仍然半垂悬的边被忽略)
+
+        - 某个槽位需要绑定多个 id 时返回 `None`: 这样的匹配不可能成为完整匹配
+        """
+
+        merged = list(self.base)
+
+        def bind(slot: int, data_id: int):
+            if merged[slot] is not None and merged[slot] != data_id:
+                return False
+            merged[slot] = data_id
+            return True
+
+        target_vids = set()
+        for slot, vid in self.targets:
+            if not bind(slot, vid):
+                return None
+            target_vids.add(vid)
+        for slot, eid in self.dangling:
+            if self.pending_vid(eid, layout, store) in target_vids and not bind(
+                slot, eid
+            ):
+                return None
+        return tuple(merged)
@@ -1,4 +1,12 @@
-from schema import DataEdge, DataVertex, Eid, PatternEdge, PatternVertex, Vid
+from schema import (
+    DataEdge,
+    DataVertex,
+    DenseId,
+    Eid,
+    PatternEdge,
+    PatternVertex,
+    Vid,
+)
 
 type PgVid = Vid
 """ 模式图.Vid """
@@ -8,10 +16,10 @@ type PgVertex = PatternVertex
 """ 模式图.Vertex """
 type PgEdge = PatternEdge
 """ 模式图.Edge """
-type DgVid = Vid
-""" 数据图.Vid """
-type DgEid = Eid
-""" 数据图.Eid """
+type DgVid = DenseId
+""" 数据图.Vid (稠密整数, 由 `StorageAdapter.interned()` 分配) """
+type DgEid = DenseId
+""" 数据图.Eid (稠密整数, 由 `StorageAdapter.interned()` 分配) """
 type DgVertex = DataVertex
 """ 数据图.Vertex """
 type DgEdge = DataEdge
@@ -0,0 +1,98 @@
+"""
+多进程并行执行: 按首个 Init 的点分片, 分片交给 `ProcessPoolExecutor` 的工作进程执行
+
+- 每个工作进程各自由 `adapter_factory` 构造存储适配器与执行引擎, 缓存互不共享
+    - `adapter_factory` 须可 pickle, 例如 `partial(SQLiteStorageAdapter, db_url)`,
+      `partial(CSRStorageAdapter.from_snapshot, snapshot_dir)`
+- 各进程的稠密 id 互不相同, 进程之间只传递存储中的字符串 id
+- 分片按 `首个 Init 的点` 的度数均衡 (LPT 贪心): 度数最大的点先分配, 每次放入当前最轻的分片,
+  超级点因此单独成片; 分片按权重降序提交, 最重的分片最先开始
+- 工作进程以 `spawn` 方式启动: `fork` 会复制 polars 等库的线程池状态, 子进程中再使用时可能死锁;
+  因此调用方的入口脚本需要 `if __name__ == "__main__":` 保护, 且运行期修改的 `config` 不会传给工作进程
+"""
+
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
+
+from schema import PlanData, Vid
+from schema.json_repr_typed_dict import PlanDict
+from storage.abc import StorageAdapter
+from utils.dyn_graph import DynGraph
+
+if TYPE_CHECKING:
+    from executor import ExecEngine
+
+type AdapterFactory = Callable[[], StorageAdapter]
+type ShardResult = int | list[DynGraph]
+
+SHARDS_PER_WORKER = 4
+""" 每个工作进程平均分到的分片数 (越多越均衡, 但每个分片都要重新执行一遍计划) """
+
+MP_START_METHOD = "spawn"
+""" 工作进程的启动方式 """
+
+
+def plan_shards(weights: dict[Vid, int], n_shards: int) -> list[list[Vid]]:
+    """
+    LPT 贪心: 把点按权重分成 `n_shards` 片 (空的分片被丢弃), 按分片权重降序返回
+
+    - 同一分片内的点保持 `weights` 中的顺序
+    """
+
+    order = {vid: i for i, vid in enumerate(weights)}
+    heap: list[tuple[int, int]] = [(0, i) for i in range(max(n_shards, 1))]
+    shards: list[list[Vid]] = [[] for _ in heap]
+    for vid in sorted(weights, key=lambda vid: -weights[vid]):
+        total, i = heapq.heappop(heap)
+        shards[i].append(vid)
+        heapq.heappush(heap, (total + weights[vid], i))
+
+    loads = {i: total for total, i in heap}
+    ranked = sorted(
+        (i for i, shard in enumerate(shards) if shard), key=lambda i: -loads[i]
+    )
+    return [sorted(shards[i], key=order.__getitem__) for i in ranked]
+
+
+""" ========== 工作进程 ========== """
+
+worker_engine: Optional["ExecEngine"] = None
+""" 工作进程内的执行引擎 (由 `init_worker` 构造, 进程内所有分片共用) """
+
+
+def init_worker(plan_dict: PlanDict, adapter_factory: AdapterFactory):
+    global worker_engine
+
+    from executor import ExecEngine
+
+    # 计划已由主进程优化过, 工作进程直接使用, 保证各分片执行同一份指令
+    worker_engine = ExecEngine.from_plan_dict(
+        plan_dict, adapter_factory(), optimize=False
+    )
+
+
+def run_shard(vids: list[Vid], count_only: bool) -> ShardResult:
+    if worker_engine is None:
+        raise RuntimeError("Worker engine is not initialized.")
+    return worker_engine.exec_shard(vids, count_only)
+
+
+def run_parallel(
+    plan_data: PlanData,
+    shards: list[list[Vid]],
+    adapter_factory: AdapterFactory,
+    max_workers: Optional[int],
+    count_only: bool,
+) -> list[ShardResult]:
+    """在进程池中执行各分片, 按提交顺序返回结果"""
+
+    with ProcessPoolExecutor(
+        max_workers,
+        mp_context=multiprocessing.get_context(MP_START_METHOD),
+        initializer=init_worker,
+        initargs=(plan_data.to_plan_dict(), adapter_factory),
+    ) as pool:
+        futures = [pool.submit(run_shard, shard, count_only) for shard in shards]
+        return [future.result() for future in futures]
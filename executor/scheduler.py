@@ -0,0 +1,139 @@
+"""
+按 `depend_on` 调度指令: 依赖都已完成的指令即可执行, 相互独立的子链
+(森林模式的各棵树, bi-6 中各自的 `f^` 链) 可以同时执行
+
+- 依赖图由 `target_var` (产出) 与 `depend_on` / 输入变量 (消费) 构造;
+  Report 汇总整个 F_pool, 依赖其之前的所有指令
+- 变量归属: 每个变量恰由一条指令产出; 被 `pop` 的变量 (f / C / T) 至多由一条指令消费,
+  且消费者一定在产出者完成之后才开始
+- A 桶按键归属: Intersect 从其输入的 A 桶中 `pop` 以目标点 (`instr.vid`) 为键的分组,
+  同一个 A 桶可以有多个消费者, 但每个 (A 变量, 目标点) 至多由一条指令消费
+- 因此同时执行的指令只会读写 `MatchingCtx` 各容器 (包括同一 A 桶的分组) 中不同的键,
+  实体仓库只做 `setdefault`
+- 线程调度 (`run_in_threads`): 查询存储时释放 GIL (SQLite / Neo4j 的 I/O),
+  各子链的查询得以相互重叠; 纯 Python 的扩张仍受 GIL 限制
+- 异步调度 (`run_async`): 每条指令一个任务, 等待其依赖的任务完成后执行
+"""
+
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable
+
+from schema import Instruction, InstructionType
+from schema.basic import STR_TUPLE_SPLITTER, VarPrefix
+
+CONSUMED_PREFIXES = {
+    VarPrefix.EnumerateTarget,
+    VarPrefix.IntersectCandidate,
+    VarPrefix.IntersectTarget,
+}
+""" 被消费者从容器中 `pop` 的变量 (f / C / T) """
+
+
+def var_prefix(var: str) -> VarPrefix:
+    return VarPrefix(var.split(STR_TUPLE_SPLITTER)[0])
+
+
+def inputs_of(instr: Instruction) -> list[str]:
+    return [instr.single_op] if instr.single_op else list(instr.multi_ops)
+
+
+class InstrDag:
+    """指令依赖图 (节点为指令在计划中的下标)"""
+
+    __slots__ = ("instructions", "deps", "dependents")
+
+    def __init__(self, instructions: list[Instruction]) -> None:
+        self.instructions = instructions
+        self.deps: list[set[int]] = []
+        self.dependents: list[list[int]] = [[] for _ in instructions]
+
+        producers: dict[str, int] = {}
+        consumers: dict[str, int] = {}
+        group_consumers: dict[tuple[str, str], int] = {}
+        for i, instr in enumerate(instructions):
+            if instr.type == InstructionType.Report:
+                deps = set(range(i))
+            else:
+                deps = set()
+                for var in {*instr.depend_on, *inputs_of(instr)}:
+                    if var not in producers:
+                        raise ValueError(
+                            f"Variable {var} is used by {instr.target_var} "
+                            f"before it is produced."
+                        )
+                    deps.add(producers[var])
+                for var in inputs_of(instr):
+                    if var_prefix(var) not in CONSUMED_PREFIXES:
+                        continue
+                    if var in consumers:
+                        raise ValueError(
+                            f"Variable {var} is consumed by more than one instruction."
+                        )
+                    consumers[var] = i
+                if instr.type == InstructionType.Intersect:
+                    for var in inputs_of(instr):
+                        if var_prefix(var) != VarPrefix.DbQueryTarget:
+                            continue
+                        if (var, instr.vid) in group_consumers:
+                            raise ValueError(
+                                f"Group {instr.vid} of {var} is consumed by more "
+                                f"than one instruction."
+                            )
+                        group_consumers[var, instr.vid] = i
+
+            if instr.target_var in producers:
+                raise ValueError(
+                    f"Variable {instr.target_var} is produced by more than one "
+                    f"instruction."
+                )
+            producers[instr.target_var] = i
+            self.deps.append(deps)
+            for dep in deps:
+                self.dependents[dep].append(i)
+
+    def run_in_threads(self, execute: Callable[[int], None], max_workers: int):
+        """
+        在线程池中执行: 依赖都已完成的指令立即提交 (同时就绪的按计划中的顺序提交)
+
+        - 某条指令抛出异常时, 不再提交新的指令, 等待已提交的指令结束后抛出
+        """
+
+        n_pending_deps = [len(deps) for deps in self.deps]
+        ready = [i for i, n in enumerate(n_pending_deps) if n == 0]
+
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="instr") as pool:
+            running: dict[Future[None], int] = {}
+            while ready or running:
+                for i in ready:
+                    running[pool.submit(execute, i)] = i
+                ready = []
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=running.__getitem__):
+                    i = running.pop(future)
+                    future.result()
+                    for j in self.dependents[i]:
+                        n_pending_deps[j] -= 1
+                        if n_pending_deps[j] == 0:
+                            ready.append(j)
+                ready.sort()
+
+    async def run_async(self, execute: Callable[[int], Awaitable[None]]):
+        """
+        在事件循环中执行: 每条指令一个任务, 先等待其依赖的任务
+
+        - 依赖一定在计划中更靠前, 创建任务时其依赖的任务都已创建
+        - 某条指令抛出异常时, 其余任务被取消
+        """
+
+        tasks: list[asyncio.Task[None]] = []
+
+        async def run(i: int):
+            for dep in self.deps[i]:
+                await tasks[dep]
+            await execute(i)
+
+        async with asyncio.TaskGroup() as group:
+            for i in range(len(self.instructions)):
+                tasks.append(group.create_task(run(i)))
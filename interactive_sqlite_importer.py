@@ -5,7 +5,13 @@ import polars as pl
 from sqlmodel import Session
 from tqdm import tqdm
 
-from storage.sqlite.db_entity import DB_Edge, DB_Vertex, init_db_with_clear
+from storage.csr.stats import write_stats_for
+from storage.sqlite.db_entity import (
+    DB_Edge,
+    DB_Vertex,
+    create_query_indexes,
+    init_db_with_clear,
+)
 
 ROOT = Path(__file__).parent.absolute()
 TEST_DATASET = ROOT / "data" / "ldbc-sn-interactive-sf01"
@@ -109,3 +115,9 @@ if __name__ == "__main__":
             if relationship_file.suffix != ".csv":
                 continue
             load_e(relationship_file, session)
+
+    # 导入结束后再统一建立查询索引
+    create_query_indexes(engine)
+
+    # 生成统计信息目录 (供计划优化器使用)
+    write_stats_for(DB_URL)
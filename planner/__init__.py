@@ -0,0 +1,84 @@
+from planner.cost import CostModel
+from planner.instructions import generate_instructions, has_self_loop
+from schema import PlanData, Vid
+from storage.abc import StorageAdapter
+
+MAX_DP_VERTICES = 12
+""" 模式点数不超过该值时, 按子集动态规划求最优顺序; 否则贪心 """
+
+
+class PlanOptimizer:
+    """
+    基于代价的执行计划优化器
+
+    - 用存储层的统计信息 (`count_v` / `count_e`) 估计各个匹配顺序的中间结果规模,
+      选出代价最小的顺序, 再重新生成指令序列
+    - 只在 `连通` 的前缀上扩张: 除非当前连通分量已经匹配完, 下一个点必须与已匹配的点相邻
+    - 模式中有自环边时不做优化, 保留计划原有的指令 (指令生成不支持自环)
+    """
+
+    def __init__(self, storage_adapter: StorageAdapter) -> None:
+        self.storage_adapter = storage_adapter
+
+    def optimize(self, plan_data: PlanData) -> PlanData:
+        if has_self_loop(plan_data.pattern_es.values()):
+            # 指令生成不支持自环, 保留计划原有的指令
+            return plan_data
+
+        matching_order = self.choose_matching_order(plan_data)
+        instructions = generate_instructions(
+            matching_order, plan_data.pattern_es.values()
+        )
+        return PlanData(
+            matching_order, plan_data.pattern_vs, plan_data.pattern_es, instructions
+        )
+
+    def choose_matching_order(self, plan_data: PlanData) -> list[Vid]:
+        model = CostModel(
+            plan_data.pattern_vs, plan_data.pattern_es, self.storage_adapter
+        )
+        vids = list(plan_data.pattern_vs)
+        neighbours: dict[Vid, set[Vid]] = {vid: set() for vid in vids}
+        for pattern_e in plan_data.pattern_es.values():
+            neighbours[pattern_e.src_vid].add(pattern_e.dst_vid)
+            neighbours[pattern_e.dst_vid].add(pattern_e.src_vid)
+
+        def could_extend(matched: frozenset[Vid], vid: Vid):
+            """`vid` 与已匹配的点相邻, 或已匹配的点不再有未匹配的邻居"""
+            frontier = set().union(*(neighbours[u] for u in matched)) - matched
+            return vid in frontier or not frontier
+
+        if len(vids) > MAX_DP_VERTICES:
+            return self.greedy_order(vids, model, could_extend)
+
+        # best[已匹配点集] = (代价, 匹配顺序)
+        best: dict[frozenset[Vid], tuple[float, list[Vid]]] = {frozenset(): (0.0, [])}
+        for _ in vids:
+            next_best: dict[frozenset[Vid], tuple[float, list[Vid]]] = {}
+            for matched, (cost, order) in best.items():
+                for vid in vids:
+                    if vid in matched or not could_extend(matched, vid):
+                        continue
+                    extended = matched | {vid}
+                    new_cost = cost + model.card(extended)
+                    if extended not in next_best or new_cost < next_best[extended][0]:
+                        next_best[extended] = (new_cost, order + [vid])
+            best = next_best
+
+        _, matching_order = best[frozenset(vids)]
+        return matching_order
+
+    @staticmethod
+    def greedy_order(vids: list[Vid], model: CostModel, could_extend) -> list[Vid]:
+        """每一步都选使下一个前缀规模最小的点"""
+
+        order: list[Vid] = []
+        matched: frozenset[Vid] = frozenset()
+        while len(order) < len(vids):
+            candidates = [
+                vid for vid in vids if vid not in matched and could_extend(matched, vid)
+            ]
+            vid = min(candidates, key=lambda vid: model.card(matched | {vid}))
+            order.append(vid)
+            matched = matched | {vid}
+        return order
@@ -0,0 +1,145 @@
+"""
+计划编译器: `resources/queries` 中的模式文件 -> BENU 风格的执行计划 (`PlanDict`)
+
+模式文件格式 (各段之间以空行分隔):
+
+```
+<点数> <边数> <点谓词数> <边谓词数>
+
+<vid> <label>                      # 每个点一行
+...
+
+<eid> <src_vid> <dst_vid> <label>  # 每条边一行
+...
+
+<vid / eid> <attr> <op><value>     # 先点谓词, 后边谓词; 例如 `tag name ='X'`, `person id =6`
+...
+```
+
+- `op`: `=`, `!=`, `>`, `>=`, `<`, `<=`
+- `value`: 单引号括起为字符串, 否则按整数 / 浮点数解析
+- 生成计划: `python -m planner.compiler <query.txt> [out.json] [vid1,vid2,...]`
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+from planner.instructions import generate_instructions
+from schema import PatternAttr, PatternEdge, PatternVertex, PlanData, PlanDict, Vid
+from schema.basic import AttrType, Op
+
+PREDICATE_PATTERN = re.compile(r"^(\S+)\s+(\S+)\s+(!=|>=|<=|=|>|<)\s*(.+)$")
+
+
+def parse_value(raw: str) -> tuple[int | float | str, AttrType]:
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] == "'":
+        return raw[1:-1], AttrType.String
+    try:
+        return int(raw), AttrType.Int
+    except ValueError:
+        pass
+    try:
+        return float(raw), AttrType.Float
+    except ValueError:
+        raise ValueError(f"Invalid predicate value: {raw!r}.") from None
+
+
+def parse_predicate(line: str) -> tuple[str, PatternAttr]:
+    """`<vid / eid> <attr> <op><value>` -> (vid / eid, 谓词)"""
+
+    matched = PREDICATE_PATTERN.match(line)
+    if not matched:
+        raise ValueError(f"Invalid predicate line: {line!r}.")
+    owner, key, op, raw_value = matched.groups()
+    value, attr_type = parse_value(raw_value)
+    return owner, PatternAttr(key, Op(op), value, attr_type)
+
+
+def parse_query(text: str) -> tuple[dict[Vid, PatternVertex], dict[str, PatternEdge]]:
+    """解析模式文件, 返回 (模式点, 模式边)"""
+
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        raise ValueError("Empty query.")
+    try:
+        n_vs, n_es, n_v_preds, n_e_preds = map(int, lines[0].split())
+    except ValueError:
+        raise ValueError(f"Invalid query header: {lines[0]!r}.") from None
+    body = lines[1:]
+    if len(body) != n_vs + n_es + n_v_preds + n_e_preds:
+        raise ValueError(
+            f"Query header {lines[0]!r} does not match the {len(body)} lines that follow."
+        )
+
+    v_lines = body[:n_vs]
+    e_lines = body[n_vs : n_vs + n_es]
+    v_pred_lines = body[n_vs + n_es : n_vs + n_es + n_v_preds]
+    e_pred_lines = body[n_vs + n_es + n_v_preds :]
+
+    pattern_vs: dict[Vid, PatternVertex] = {}
+    for line in v_lines:
+        vid, label = line.split()
+        pattern_vs[vid] = PatternVertex(vid, label)
+
+    pattern_es: dict[str, PatternEdge] = {}
+    for line in e_lines:
+        eid, src_vid, dst_vid, label = line.split()
+        for vid in (src_vid, dst_vid):
+            if vid not in pattern_vs:
+                raise ValueError(f"Edge {eid!r} refers to unknown vertex {vid!r}.")
+        pattern_es[eid] = PatternEdge(eid, label, src_vid, dst_vid)
+
+    for line in v_pred_lines:
+        vid, attr = parse_predicate(line)
+        if vid not in pattern_vs:
+            raise ValueError(f"Predicate refers to unknown vertex {vid!r}.")
+        pattern_vs[vid].attr = attr
+
+    for line in e_pred_lines:
+        eid, attr = parse_predicate(line)
+        if eid not in pattern_es:
+            raise ValueError(f"Predicate refers to unknown edge {eid!r}.")
+        pattern_es[eid].attr = attr
+
+    return pattern_vs, pattern_es
+
+
+def compile_plan(text: str, matching_order: Optional[list[Vid]] = None) -> PlanDict:
+    """
+    编译模式文件
+
+    - `matching_order` 缺省时按点的声明顺序; 执行前 `PlanOptimizer` 仍会按代价重新选择
+    """
+
+    pattern_vs, pattern_es = parse_query(text)
+    matching_order = list(pattern_vs) if matching_order is None else matching_order
+    if sorted(matching_order) != sorted(pattern_vs):
+        raise ValueError(
+            f"Matching order {matching_order} is not a permutation of "
+            f"the pattern vertices {list(pattern_vs)}."
+        )
+
+    instructions = generate_instructions(matching_order, pattern_es.values())
+    return PlanData(matching_order, pattern_vs, pattern_es, instructions).to_plan_dict()
+
+
+def main(
+    query_file: str,
+    plan_file: Optional[str] = None,
+    matching_order: Optional[str] = None,
+):
+    order = matching_order.split(",") if matching_order else None
+    plan_json = json.dumps(compile_plan(Path(query_file).read_text(), order), indent=4)
+    if not plan_file:
+        print(plan_json)
+        return
+    Path(plan_file).write_text(plan_json)
+    print(f"计划已写入 '{plan_file}'")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
@@ -0,0 +1,91 @@
+"""
+匹配顺序的代价模型
+
+- 部分匹配 (模式点集 `S`) 的规模按独立性假设估计:
+  `|S| = Π 候选点数(v) × Π 连接概率(e)`, `v ∈ S`, `e` 为两端都在 `S` 中的模式边
+    - 候选点数: 满足标签与属性谓词的数据点数
+    - 连接概率: `|(src_label) -[label]-> (dst_label)|` / (`|src_label|` × `|dst_label|`)
+- 一个匹配顺序的代价 = 所有前缀的规模之和 (即各步中间结果的总量)
+- 有统计信息目录 (`StorageAdapter.get_stats()`) 时, 点数 / 边数都由目录估计:
+  带谓词的按属性的取值分布折算 (见 `GraphStats.estimate_vertex_count`); 否则向存储层查询
+"""
+
+from functools import cached_property, lru_cache
+from math import prod
+from typing import Optional
+
+from config import DIRECTED_EDGE_SUPPORT
+from schema import Label, PatternAttr, PatternEdge, PatternVertex, Vid
+from storage.abc import StorageAdapter
+
+
+class CostModel:
+    """基于存储层统计信息的规模估计"""
+
+    def __init__(
+        self,
+        pattern_vs: dict[Vid, PatternVertex],
+        pattern_es: dict[str, PatternEdge],
+        storage_adapter: StorageAdapter,
+    ) -> None:
+        self.pattern_vs = pattern_vs
+        self.pattern_es = pattern_es
+        self.storage_adapter = storage_adapter
+
+    @cached_property
+    def v_cards(self) -> dict[Vid, float]:
+        """模式点 -> 候选点数"""
+
+        return {
+            vid: self.count_v(pattern_v.label, pattern_v.attr)
+            for vid, pattern_v in self.pattern_vs.items()
+        }
+
+    @cached_property
+    def e_probs(self) -> dict[str, float]:
+        """模式边 -> 连接概率 (任取一对满足标签的端点, 它们之间有这条边的概率)"""
+
+        probs: dict[str, float] = {}
+        for eid, pattern_e in self.pattern_es.items():
+            src_label = self.pattern_vs[pattern_e.src_vid].label
+            dst_label = self.pattern_vs[pattern_e.dst_vid].label
+            label, attr = pattern_e.label, pattern_e.attr
+            cnt = self.count_e(label, src_label, dst_label, attr)
+            # 不支持有向边时, 反方向的边同样会被匹配上
+            if not DIRECTED_EDGE_SUPPORT and src_label != dst_label:
+                cnt += self.count_e(label, dst_label, src_label, attr)
+            pairs = self.count_v(src_label) * self.count_v(dst_label)
+            probs[eid] = min(cnt / pairs, 1.0) if pairs else 0.0
+        return probs
+
+    """ ========== 计数: 有统计信息目录时优先查目录, 否则向存储层查询 ========== """
+
+    @cached_property
+    def stats(self):
+        return self.storage_adapter.get_stats()
+
+    def count_v(self, v_label: Label, v_attr: Optional[PatternAttr] = None) -> float:
+        if self.stats:
+            return self.stats.estimate_vertex_count(v_label, v_attr)
+        return self.storage_adapter.count_v(v_label, v_attr)
+
+    def count_e(
+        self,
+        e_label: Label,
+        src_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr],
+    ) -> float:
+        if self.stats:
+            return self.stats.estimate_edge_count(e_label, src_label, dst_label, e_attr)
+        return self.storage_adapter.count_e(e_label, src_label, dst_label, e_attr)
+
+    @lru_cache
+    def card(self, vids: frozenset[Vid]) -> float:
+        """部分匹配 (模式点集 `vids`) 的估计规模"""
+
+        return prod(self.v_cards[vid] for vid in vids) * prod(
+            self.e_probs[eid]
+            for eid, pattern_e in self.pattern_es.items()
+            if pattern_e.src_vid in vids and pattern_e.dst_vid in vids
+        )
@@ -0,0 +1,121 @@
+"""
+由 `匹配顺序` 生成 BENU 风格的指令序列
+
+- 对匹配顺序中的每个模式点 `v`:
+    - 之前没有邻居: `init` -> `f^v` (新的连通分量)
+    - 之前恰有一个邻居 `u`: `intersect(A^u)` -> `C^v`
+    - 之前有多个邻居: `intersect(A^u1, A^u2, ...)` -> `T^v`, 再 `intersect(T^v)` -> `C^v`
+    - `foreach(C^v)` -> `f^v`
+    - 之后还有邻居: `get_adj(f^v)` -> `A^v`, 只扩张连向 `之后的邻居` 的模式边
+- 最后 `report` 所有 `f^*`
+- `depend_on` 为各指令输入变量的传递闭包
+"""
+
+from typing import Iterable, Optional
+
+from schema import Instruction, InstructionType, PatternEdge, Vid
+from schema.basic import VarPrefix
+
+
+class InstructionBuilder:
+    """逐条追加指令, 同时维护每个变量的依赖闭包"""
+
+    def __init__(self) -> None:
+        self.instructions: list[Instruction] = []
+        self.closures: dict[str, set[str]] = {}
+
+    def emit(
+        self,
+        type: InstructionType,
+        vid: Vid,
+        target_var: str,
+        single_op: Optional[str] = None,
+        multi_ops: list[str] = [],
+        expand_eid_list: list[str] = [],
+    ):
+        inputs = [single_op] if single_op else multi_ops
+        depend_on = set(inputs).union(*(self.closures[var] for var in inputs))
+        self.closures[target_var] = depend_on
+        self.instructions.append(
+            Instruction(
+                vid=vid,
+                type=type,
+                expand_eid_list=list(expand_eid_list),
+                single_op=single_op,
+                multi_ops=list(multi_ops),
+                target_var=target_var,
+                depend_on=sorted(depend_on),
+            )
+        )
+
+
+def has_self_loop(pattern_es: Iterable[PatternEdge]) -> bool:
+    return any(pat_e.src_vid == pat_e.dst_vid for pat_e in pattern_es)
+
+
+def generate_instructions(
+    matching_order: list[Vid], pattern_es: Iterable[PatternEdge]
+) -> list[Instruction]:
+    """
+    按 `matching_order` 生成指令序列
+
+    - 不支持自环的模式边 (其两端是同一个模式点, 无法在 GetAdj 中扩张)
+    """
+
+    pos = {vid: idx for idx, vid in enumerate(matching_order)}
+    incident_es: dict[Vid, list[PatternEdge]] = {vid: [] for vid in matching_order}
+    for pat_e in pattern_es:
+        if has_self_loop([pat_e]):
+            raise ValueError(
+                f"Self-loop pattern edge {pat_e.eid!r} on {pat_e.src_vid!r} "
+                f"is not supported."
+            )
+        incident_es[pat_e.src_vid].append(pat_e)
+        incident_es[pat_e.dst_vid].append(pat_e)
+
+    def other_end(pat_e: PatternEdge, vid: Vid):
+        return pat_e.dst_vid if pat_e.src_vid == vid else pat_e.src_vid
+
+    builder = InstructionBuilder()
+    for vid in matching_order:
+        earlier = sorted(
+            {other_end(e, vid) for e in incident_es[vid]}
+            & set(matching_order[: pos[vid]]),
+            key=pos.__getitem__,
+        )
+        later_es = sorted(
+            e.eid for e in incident_es[vid] if pos[other_end(e, vid)] > pos[vid]
+        )
+
+        f_var = VarPrefix.EnumerateTarget + vid
+        if not earlier:
+            builder.emit(InstructionType.Init, vid, f_var)
+        else:
+            C_var = VarPrefix.IntersectCandidate + vid
+            A_vars = [VarPrefix.DbQueryTarget + u for u in earlier]
+            if len(A_vars) == 1:
+                builder.emit(InstructionType.Intersect, vid, C_var, single_op=A_vars[0])
+            else:
+                T_var = VarPrefix.IntersectTarget + vid
+                builder.emit(InstructionType.Intersect, vid, T_var, multi_ops=A_vars)
+                builder.emit(InstructionType.Intersect, vid, C_var, single_op=T_var)
+            builder.emit(InstructionType.Foreach, vid, f_var, single_op=C_var)
+
+        if later_es:
+            A_var = VarPrefix.DbQueryTarget + vid
+            builder.emit(
+                InstructionType.GetAdj,
+                vid,
+                A_var,
+                single_op=f_var,
+                expand_eid_list=later_es,
+            )
+
+    f_vars = sorted(VarPrefix.EnumerateTarget + vid for vid in matching_order)
+    builder.emit(
+        InstructionType.Report,
+        matching_order[-1] if matching_order else "",
+        VarPrefix.EnumerateTarget.value,
+        multi_ops=f_vars,
+    )
+    return builder.instructions
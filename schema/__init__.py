@@ -1,5 +1,5 @@
-from dataclasses import dataclass, field
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from typing import Optional, cast
 
 from schema.basic import (
     STR_TUPLE_SPLITTER,
@@ -11,6 +11,7 @@ from schema.basic import (
 )
 from schema.json_repr_typed_dict import (
     AttrInfo,
+    DisplayedAttr,
     DisplayedInstr,
     EInfo,
     PlanDict,
@@ -23,6 +24,8 @@ type Eid = str
 """ 边 id 类型 """
 type Label = str
 """ 标签类型  """
+type DenseId = int
+""" 稠密整数 id 类型 (由存储层分配, 执行器内部代替 `Vid` / `Eid` 使用) """
 
 
 @dataclass
@@ -56,6 +59,9 @@ class PatternAttr:
             return None
         return cls(attr, op, value, type)
 
+    def to_attr_info(self) -> DisplayedAttr:
+        return {"attr": self.key, "op": self.op, "value": self.value, "type": self.type}
+
     def __hash__(self) -> int:
         return hash(self.key)
 
@@ -89,6 +95,9 @@ class Instruction:
     def from_displayed_instr(cls, info: DisplayedInstr):
         return cls(**info)
 
+    def to_displayed_instr(self) -> DisplayedInstr:
+        return cast(DisplayedInstr, asdict(self))
+
     def is_single_op(self) -> bool:
         """是否为 `单输入变量` 操作"""
 
@@ -147,6 +156,10 @@ class PatternVertex(VertexBase):
         attr = v_info.get("attr", None)
         return cls(vid, label, PatternAttr.from_attr_info(attr))
 
+    def to_vertex_info(self) -> VInfo:
+        attr = self.attr.to_attr_info() if self.attr else None
+        return {"vid": self.vid, "label": self.label, "attr": attr}
+
     def __hash__(self) -> int:
         return hash(self.vid)
 
@@ -176,6 +189,15 @@ class PatternEdge(EdgeBase):
         attr = e_info.get("attr", None)
         return cls(eid, label, src_vid, dst_vid, PatternAttr.from_attr_info(attr))
 
+    def to_edge_info(self) -> EInfo:
+        return {
+            "eid": self.eid,
+            "src_vid": self.src_vid,
+            "dst_vid": self.dst_vid,
+            "label": self.label,
+            "attr": self.attr.to_attr_info() if self.attr else None,
+        }
+
     def __hash__(self) -> int:
         return hash(self.eid)
 
@@ -223,3 +245,17 @@ class PlanData:
             for info in plan_dict.get("instructions", [])
         ]
         return cls(matching_order, vertices, edges, instructions)
+
+    def to_plan_dict(self) -> PlanDict:
+        return {
+            "matching_order": self.matching_order,
+            "vertices": {
+                vid: pattern_v.to_vertex_info()
+                for vid, pattern_v in self.pattern_vs.items()
+            },
+            "edges": {
+                eid: pattern_e.to_edge_info()
+                for eid, pattern_e in self.pattern_es.items()
+            },
+            "instructions": [instr.to_displayed_instr() for instr in self.instructions],
+        }
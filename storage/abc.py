@@ -1,13 +1,65 @@
 from abc import ABC, abstractmethod
 from functools import lru_cache
+from typing import Iterable, Optional
 
-from schema import DataEdge, DataVertex, Label, PatternAttr, Vid
+from schema import DataEdge, DataVertex, DenseId, Eid, Label, PatternAttr, Vid
+from schema.basic import str_op_to_operator
+from storage.stats import GraphStats
 from utils.tracked_lru_cache import track_lru_cache_annotated
 
 
+type AdjWithEndpoints = tuple[dict[Vid, list[DataEdge]], dict[Vid, DataVertex]]
+""" ({ 边缘点 -> 邻接边 }, { 远端点 vid -> 远端点 }) """
+
+
+def merge_adj_with_endpoints(parts: Iterable[AdjWithEndpoints]) -> AdjWithEndpoints:
+    """合并分块加载的结果 (各块的 `边缘点` 互不相同)"""
+
+    adj_es: dict[Vid, list[DataEdge]] = {}
+    far_vs: dict[Vid, DataVertex] = {}
+    for part_es, part_vs in parts:
+        adj_es.update(part_es)
+        far_vs.update(part_vs)
+    return adj_es, far_vs
+
+
+def does_v_satisfy(v: DataVertex, v_label: Label, v_attr: Optional[PatternAttr]):
+    """点 `v` 是否满足 `v_label` (以及 `v_attr`)"""
+
+    if v.label != v_label:
+        return False
+    if not v_attr:
+        return True
+    if v_attr.key not in v.attrs:
+        return False
+    data_value = v.attrs[v_attr.key]
+    if type(data_value) is not type(v_attr.value):
+        return False
+    return str_op_to_operator(v_attr.op)(data_value, v_attr.value)
+
+
 class StorageAdapter(ABC):
     """`存储适配器` 抽象基类"""
 
+    def interned(self) -> "StorageAdapter":
+        """
+        `稠密整数 id` 版本的存储适配器 (详见 `storage.interning`)
+
+        - 默认用 `IdDict` 包装自身; 本身就有稠密 id 的存储 (如 CSR) 应覆盖
+        """
+
+        from storage.interning import IdDictStorageAdapter
+
+        return IdDictStorageAdapter(self)
+
+    def external_vid(self, vid: DenseId | Vid) -> Vid:
+        """执行器内部的 `vid` -> 字符串 `vid` (未做 id 映射时原样返回)"""
+        return str(vid)
+
+    def external_eid(self, eid: DenseId | Eid) -> Eid:
+        """执行器内部的 `eid` -> 字符串 `eid` (未做 id 映射时原样返回)"""
+        return str(eid)
+
     @abstractmethod
     @track_lru_cache_annotated
     @lru_cache
@@ -91,3 +143,164 @@ class StorageAdapter(ABC):
 
         根据 `dst_vid`, `label` 和 `attr` 加载边
         """
+
+    def load_e_by_src_vids(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[Vid, list[DataEdge]]:
+        """
+        ## GetAdj
+
+        根据一批 `src_vid`, `label` (以及 `attr`) 批量加载边
+
+        - 返回 { src_vid -> 边列表 }, 每个传入的 `src_vid` 都有对应项 (可能为空)
+        - 默认逐点调用 `load_e_by_src_vid(_with_attr)`, 子类应覆盖为少量批量查询
+        """
+
+        return {
+            src_vid: (
+                self.load_e_by_src_vid(src_vid, e_label)
+                if not e_attr
+                else self.load_e_by_src_vid_with_attr(src_vid, e_label, e_attr)
+            )
+            for src_vid in src_vids
+        }
+
+    def load_e_by_dst_vids(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[Vid, list[DataEdge]]:
+        """
+        ## GetAdj
+
+        根据一批 `dst_vid`, `label` (以及 `attr`) 批量加载边
+
+        - 返回 { dst_vid -> 边列表 }, 每个传入的 `dst_vid` 都有对应项 (可能为空)
+        - 默认逐点调用 `load_e_by_dst_vid(_with_attr)`, 子类应覆盖为少量批量查询
+        """
+
+        return {
+            dst_vid: (
+                self.load_e_by_dst_vid(dst_vid, e_label)
+                if not e_attr
+                else self.load_e_by_dst_vid_with_attr(dst_vid, e_label, e_attr)
+            )
+            for dst_vid in dst_vids
+        }
+
+    def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        """
+        ## GetAdj
+
+        同 `load_e_by_src_vids`, 但只保留 `dst` 满足 `dst_label` (以及 `dst_attr`) 的边
+
+        - 满足条件的 `dst` 与边在同一批中给出, 调用方不必再逐边 `get_v`
+        - 默认加载边之后逐个 (去重后的) `dst` 检查, 子类应覆盖为连接查询
+        """
+
+        adj_es = self.load_e_by_src_vids(src_vids, e_label, e_attr)
+        return self.filter_by_far_endpoints(adj_es, dst_label, dst_attr, is_src=True)
+
+    def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        """
+        ## GetAdj
+
+        同 `load_e_by_dst_vids`, 但只保留 `src` 满足 `src_label` (以及 `src_attr`) 的边
+
+        - 满足条件的 `src` 与边在同一批中给出, 调用方不必再逐边 `get_v`
+        - 默认加载边之后逐个 (去重后的) `src` 检查, 子类应覆盖为连接查询
+        """
+
+        adj_es = self.load_e_by_dst_vids(dst_vids, e_label, e_attr)
+        return self.filter_by_far_endpoints(adj_es, src_label, src_attr, is_src=False)
+
+    def filter_by_far_endpoints(
+        self,
+        adj_es: dict[Vid, list[DataEdge]],
+        far_label: Label,
+        far_attr: Optional[PatternAttr],
+        is_src: bool,
+    ) -> AdjWithEndpoints:
+        """按 `远端点` 过滤邻接边 (`is_src`: 边缘点为 `src`, 远端点为 `dst`)"""
+
+        far_vs: dict[Vid, Optional[DataVertex]] = {}
+        for es in adj_es.values():
+            for e in es:
+                far_vid = e.dst_vid if is_src else e.src_vid
+                if far_vid not in far_vs:
+                    far_v = self.get_v(far_vid)
+                    satisfied = does_v_satisfy(far_v, far_label, far_attr)
+                    far_vs[far_vid] = far_v if satisfied else None
+
+        filtered = {
+            vid: [e for e in es if far_vs[e.dst_vid if is_src else e.src_vid]]
+            for vid, es in adj_es.items()
+        }
+        return filtered, {vid: v for vid, v in far_vs.items() if v}
+
+    """ ========== 统计信息 (计划优化器使用) ========== """
+
+    def get_stats(self) -> Optional[GraphStats]:
+        """
+        ## Plan
+
+        统计信息目录 (详见 `storage.stats`), 没有时返回 `None`
+        """
+
+        return None
+
+    @track_lru_cache_annotated
+    @lru_cache
+    def count_v(self, v_label: Label, v_attr: Optional[PatternAttr] = None) -> int:
+        """
+        ## Plan
+
+        满足 `label` (以及 `attr`) 的顶点数
+
+        - 默认加载顶点再计数 (不带 `attr` 时加载整个标签, 执行时未必会以同样的参数加载),
+          子类应覆盖为聚合查询
+        """
+
+        if not v_attr:
+            return len(self.load_v(v_label))
+        return len(self.load_v_with_attr(v_label, v_attr))
+
+    @track_lru_cache_annotated
+    @lru_cache
+    def count_e(
+        self,
+        e_label: Label,
+        src_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> int:
+        """
+        ## Plan
+
+        `(src_label) -[e_label]-> (dst_label)` 的边数 (以及满足 `attr` 的)
+
+        - 默认加载 `src_label` 全部顶点的邻接边再检查终点, 子类应覆盖为聚合查询
+        """
+
+        src_vids = [v.vid for v in self.load_v(src_label)]
+        dst_vids = {v.vid for v in self.load_v(dst_label)}
+        adj_es = self.load_e_by_src_vids(src_vids, e_label, e_attr)
+        return sum(1 for es in adj_es.values() for e in es if e.dst_vid in dst_vids)
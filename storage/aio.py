@@ -0,0 +1,264 @@
+"""
+异步存储适配器 (供 `executor.aio` 使用)
+
+- 只包含执行期访问存储的接口: Init / Intersect 加载点, GetAdj 批量加载邻接边 (带远端点)
+- 延迟受限的后端 (如 Neo4j) 可以同时发出多个查询, 并发数由执行器的信号量限制
+- `interned()`: 稠密 id 在事件循环所在的线程中登记, 不与查询线程争用 `IdDict` 的锁
+- 同步的存储适配器可以用 `ThreadOffloadedStorageAdapter` 包装, 查询交给线程池执行
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional, override
+
+from schema import DataVertex, DenseId, Eid, Label, PatternAttr, Vid
+from storage.abc import AdjWithEndpoints, StorageAdapter
+from storage.interning import IdDictInterner, IdDictStorageAdapter
+
+
+class AsyncStorageAdapter(ABC):
+    """`异步存储适配器` 抽象基类 (各方法的语义与 `StorageAdapter` 中的同名方法相同)"""
+
+    def interned(self) -> "AsyncStorageAdapter":
+        """`稠密整数 id` 版本的异步存储适配器 (默认用 `IdDict` 包装自身)"""
+        return AsyncIdDictStorageAdapter(self)
+
+    def external_vid(self, vid: DenseId | Vid) -> Vid:
+        """执行器内部的 `vid` -> 字符串 `vid` (未做 id 映射时原样返回)"""
+        return str(vid)
+
+    def external_eid(self, eid: DenseId | Eid) -> Eid:
+        """执行器内部的 `eid` -> 字符串 `eid` (未做 id 映射时原样返回)"""
+        return str(eid)
+
+    async def close(self):
+        """释放连接等资源"""
+
+    @abstractmethod
+    async def load_v(self, v_label: Label) -> list[DataVertex]:
+        """
+        ## Init / Intersect
+
+        根据 `label` 加载顶点
+        """
+
+    @abstractmethod
+    async def load_v_with_attr(
+        self,
+        v_label: Label,
+        v_attr: PatternAttr,
+    ) -> list[DataVertex]:
+        """
+        ## Init / Intersect
+
+        根据 `label` 和 `attr` 加载顶点
+        """
+
+    @abstractmethod
+    async def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        """
+        ## GetAdj
+
+        根据一批 `src_vid` 加载边, 只保留 `dst` 满足 `dst_label` (以及 `dst_attr`) 的边
+        """
+
+    @abstractmethod
+    async def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        """
+        ## GetAdj
+
+        根据一批 `dst_vid` 加载边, 只保留 `src` 满足 `src_label` (以及 `src_attr`) 的边
+        """
+
+
+class AsyncIdDictStorageAdapter(IdDictInterner, AsyncStorageAdapter):
+    """
+    用 `IdDict` 包装任意异步存储适配器
+
+    - 与 `IdDictStorageAdapter` 相同, 但只在 `await` 返回之后 (事件循环线程中) 登记 id
+    - 点的加载结果按参数缓存 (协程不能用 `lru_cache`)
+    """
+
+    def __init__(self, inner: AsyncStorageAdapter) -> None:
+        super().__init__()
+        self.inner = inner
+        self.loaded_vs: dict[
+            tuple[Label, Optional[PatternAttr]], asyncio.Future[list[DataVertex]]
+        ] = {}
+
+    @override
+    def interned(self) -> "AsyncIdDictStorageAdapter":
+        return self
+
+    @override
+    def external_vid(self, vid: DenseId) -> Vid:
+        return self.vid_dict[vid]
+
+    @override
+    def external_eid(self, eid: DenseId) -> Eid:
+        return self.eid_dict[eid]
+
+    @override
+    async def close(self):
+        await self.inner.close()
+
+    async def load_v_cached(
+        self, v_label: Label, v_attr: Optional[PatternAttr]
+    ) -> list[DataVertex]:
+        """同一组参数只查询一次 (并发的调用共用同一个查询)"""
+
+        key = (v_label, v_attr)
+        loaded = self.loaded_vs.get(key)
+        if loaded is None:
+
+            async def load():
+                vertices = await (
+                    self.inner.load_v(v_label)
+                    if not v_attr
+                    else self.inner.load_v_with_attr(v_label, v_attr)
+                )
+                return self.intern_vertices(vertices)
+
+            loaded = self.loaded_vs[key] = asyncio.ensure_future(load())
+        return await loaded
+
+    @override
+    async def load_v(self, v_label: Label) -> list[DataVertex]:
+        return await self.load_v_cached(v_label, None)
+
+    @override
+    async def load_v_with_attr(
+        self,
+        v_label: Label,
+        v_attr: PatternAttr,
+    ) -> list[DataVertex]:
+        return await self.load_v_cached(v_label, v_attr)
+
+    @override
+    async def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[DenseId],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        src_vids = list(src_vids)
+        loaded = await self.inner.load_e_by_src_vids_to(
+            [self.vid_dict[vid] for vid in src_vids],
+            e_label,
+            dst_label,
+            e_attr,
+            dst_attr,
+        )
+        return self.intern_adj_with_endpoints(src_vids, loaded)
+
+    @override
+    async def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[DenseId],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        dst_vids = list(dst_vids)
+        loaded = await self.inner.load_e_by_dst_vids_from(
+            [self.vid_dict[vid] for vid in dst_vids],
+            e_label,
+            src_label,
+            e_attr,
+            src_attr,
+        )
+        return self.intern_adj_with_endpoints(dst_vids, loaded)
+
+
+class ThreadOffloadedStorageAdapter(AsyncStorageAdapter):
+    """
+    把同步存储适配器的查询交给线程池 (`asyncio.to_thread`), 不阻塞事件循环
+
+    - `inner` 须可在多个线程中同时使用 (如 `SQLiteStorageAdapter`: 每个线程各自的会话)
+    - `inner` 本身就有稠密 id (如 CSR) 时, `interned()` 直接包装其稠密 id 版本
+    """
+
+    def __init__(self, inner: StorageAdapter) -> None:
+        super().__init__()
+        self.inner = inner
+
+    @override
+    def interned(self) -> AsyncStorageAdapter:
+        dense = self.inner.interned()
+        if isinstance(dense, IdDictStorageAdapter):
+            # 改为在事件循环线程中登记: 不与查询线程争用 `IdDict` 的锁, 相同的点集查询也只执行一次
+            return super().interned()
+        return ThreadOffloadedStorageAdapter(dense)
+
+    @override
+    def external_vid(self, vid: DenseId | Vid) -> Vid:
+        return self.inner.external_vid(vid)
+
+    @override
+    def external_eid(self, eid: DenseId | Eid) -> Eid:
+        return self.inner.external_eid(eid)
+
+    @override
+    async def load_v(self, v_label: Label) -> list[DataVertex]:
+        return await asyncio.to_thread(self.inner.load_v, v_label)
+
+    @override
+    async def load_v_with_attr(
+        self,
+        v_label: Label,
+        v_attr: PatternAttr,
+    ) -> list[DataVertex]:
+        return await asyncio.to_thread(self.inner.load_v_with_attr, v_label, v_attr)
+
+    @override
+    async def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return await asyncio.to_thread(
+            self.inner.load_e_by_src_vids_to,
+            list(src_vids),
+            e_label,
+            dst_label,
+            e_attr,
+            dst_attr,
+        )
+
+    @override
+    async def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return await asyncio.to_thread(
+            self.inner.load_e_by_dst_vids_from,
+            list(dst_vids),
+            e_label,
+            src_label,
+            e_attr,
+            src_attr,
+        )
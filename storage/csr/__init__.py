@@ -0,0 +1,317 @@
+from functools import cached_property, lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Optional, override
+
+import numpy as np
+
+from schema import DataEdge, DataVertex, DenseId, Eid, Label, PatternAttr, Vid
+from storage.abc import AdjWithEndpoints, StorageAdapter
+from storage.csr.graph import EMPTY_IDS, CSRGraph
+from storage.csr.loader import load_frames_from_ldbc_csv, load_frames_from_sqlite
+from storage.csr.snapshot import open_snapshot
+from storage.interning import InternedStorageAdapter
+from storage.stats import GraphStats
+from utils.tracked_lru_cache import track_lru_cache_annotated
+
+
+class CSRStorageAdapter(StorageAdapter):
+    """
+    CSR 存储适配器
+
+    - 整张图一次性载入内存 (`CSRGraph`), 之后的查询都是数组切片, 不再访问数据库
+    - 由 `from_sqlite` / `from_ldbc_csv` 构造, 或由 `from_snapshot` 内存映射已有的快照
+    - 注意: 端点不存在的 `悬挂边` 在载入时即被丢弃
+    """
+
+    def __init__(self, graph: CSRGraph) -> None:
+        super().__init__()
+        self.graph = graph
+
+    @classmethod
+    def from_sqlite(cls, db_url: Optional[str] = None):
+        return cls(CSRGraph.from_frames(*load_frames_from_sqlite(db_url)))
+
+    @classmethod
+    def from_ldbc_csv(cls, data_dir: Path):
+        return cls(CSRGraph.from_frames(*load_frames_from_ldbc_csv(data_dir)))
+
+    @classmethod
+    def from_snapshot(cls, snapshot_dir: Path, mmap: bool = True):
+        return cls(open_snapshot(snapshot_dir, mmap))
+
+    @override
+    def interned(self) -> InternedStorageAdapter:
+        return DenseCSRStorageAdapter(self.graph)
+
+    """ ========== id 转换 (`DenseCSRStorageAdapter` 覆盖为直接使用稠密 id) ========== """
+
+    def find_v(self, vid: Vid) -> Optional[int]:
+        return self.graph.find_v(vid)
+
+    def to_vids(self, vs: np.ndarray) -> list:
+        return self.graph.vids.take(vs.tolist())
+
+    def to_eids(self, es: np.ndarray) -> list:
+        return self.graph.eids.take(es.tolist())
+
+    """ ========== """
+
+    def to_data_vertices(self, vs: np.ndarray, v_label: Label) -> list[DataVertex]:
+        """稠密 id -> `DataVertex` (`vs` 中的点均属于 `v_label`)"""
+
+        graph = self.graph
+        attrs = graph.collect_attrs(graph.v_attr_columns.get(v_label, []), vs)
+        return [
+            DataVertex(vid=vid, label=v_label, attrs=v_attrs)
+            for vid, v_attrs in zip(self.to_vids(vs), attrs)
+        ]
+
+    def to_data_edges(self, es: np.ndarray, e_label: Label) -> list[DataEdge]:
+        """稠密 id -> `DataEdge` (`es` 中的边均属于 `e_label`)"""
+
+        graph = self.graph
+        attrs = graph.collect_attrs(graph.e_attr_columns.get(e_label, []), es)
+        return [
+            DataEdge(
+                eid=eid,
+                label=e_label,
+                src_vid=src_vid,
+                dst_vid=dst_vid,
+                attrs=e_attrs,
+            )
+            for eid, src_vid, dst_vid, e_attrs in zip(
+                self.to_eids(es),
+                self.to_vids(graph.e_src[es]),
+                self.to_vids(graph.e_dst[es]),
+                attrs,
+            )
+        ]
+
+    def filter_es(self, es: np.ndarray, e_label: Label, e_attr: PatternAttr):
+        column = self.graph.find_attr_column(self.graph.e_attr_columns, e_label, e_attr)
+        return es[column.mask(es, e_attr)] if column else EMPTY_IDS
+
+    def adj_es(self, vid: Vid, e_label: Label, is_src: bool) -> np.ndarray:
+        """`vid` 在 `e_label` 下的出边 (`is_src`) / 入边"""
+
+        v = self.find_v(vid)
+        adjacency = (self.graph.fwd if is_src else self.graph.rev).get(e_label)
+        if v is None or adjacency is None:
+            return EMPTY_IDS
+        return adjacency.edges_of(v)
+
+    def load_e_by_vids_with_far(
+        self,
+        vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr],
+        is_src: bool,
+        far_label: Label,
+        far_attr: Optional[PatternAttr],
+    ) -> AdjWithEndpoints:
+        """
+        批量加载边, 并按 `远端点` 的标签 (以及属性) 过滤
+
+        - 标签 / 属性都按数组掩码判断; 全部边与远端点各只构造一次
+        """
+
+        graph = self.graph
+        vids = list(vids)
+        if far_label not in graph.v_labels:
+            return {vid: [] for vid in vids}, {}
+        far_code = graph.v_labels.index(far_label)
+        far_column = (
+            graph.find_attr_column(graph.v_attr_columns, far_label, far_attr)
+            if far_attr
+            else None
+        )
+
+        all_es: list[np.ndarray] = []
+        for vid in vids:
+            es = self.adj_es(vid, e_label, is_src)
+            if e_attr:
+                es = self.filter_es(es, e_label, e_attr)
+            far = (graph.e_dst if is_src else graph.e_src)[es]
+            mask = graph.v_label_codes[far] == far_code
+            if far_attr:
+                mask &= (
+                    far_column.mask(far, far_attr)
+                    if far_column
+                    else np.zeros(len(far), dtype=bool)
+                )
+            all_es.append(es[mask])
+
+        es = np.concatenate(all_es) if all_es else EMPTY_IDS
+        edges = iter(self.to_data_edges(es, e_label))
+        result = {
+            vid: list(islice(edges, len(vid_es))) for vid, vid_es in zip(vids, all_es)
+        }
+
+        far_vs = np.unique((graph.e_dst if is_src else graph.e_src)[es])
+        vertices = self.to_data_vertices(far_vs, far_label)
+        return result, {v.vid: v for v in vertices}
+
+    @override
+    def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return self.load_e_by_vids_with_far(
+            src_vids, e_label, e_attr, True, dst_label, dst_attr
+        )
+
+    @override
+    def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return self.load_e_by_vids_with_far(
+            dst_vids, e_label, e_attr, False, src_label, src_attr
+        )
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def get_v(self, vid: Vid) -> DataVertex:
+        v = self.find_v(vid)
+        if v is None:
+            raise RuntimeError(f"DataVertex (vid: {vid}) not found.")
+        vs = np.array([v])
+        return self.to_data_vertices(vs, self.graph.v_label(v))[0]
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_v(self, v_label: Label) -> list[DataVertex]:
+        vs = self.graph.label_vs.get(v_label, EMPTY_IDS)
+        return self.to_data_vertices(vs, v_label)
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_v_with_attr(
+        self,
+        v_label: Label,
+        v_attr: PatternAttr,
+    ) -> list[DataVertex]:
+        graph = self.graph
+        column = graph.find_attr_column(graph.v_attr_columns, v_label, v_attr)
+        if not column:
+            return []
+        vs = graph.label_vs.get(v_label, EMPTY_IDS)
+        return self.to_data_vertices(vs[column.mask(vs, v_attr)], v_label)
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_src_vid(self, src_vid: Vid, e_label: Label) -> list[DataEdge]:
+        return self.to_data_edges(self.adj_es(src_vid, e_label, True), e_label)
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_dst_vid(self, dst_vid: Vid, e_label: Label) -> list[DataEdge]:
+        return self.to_data_edges(self.adj_es(dst_vid, e_label, False), e_label)
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_src_vid_with_attr(
+        self,
+        src_vid: Vid,
+        e_label: Label,
+        e_attr: PatternAttr,
+    ) -> list[DataEdge]:
+        es = self.filter_es(self.adj_es(src_vid, e_label, True), e_label, e_attr)
+        return self.to_data_edges(es, e_label)
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_dst_vid_with_attr(
+        self,
+        dst_vid: Vid,
+        e_label: Label,
+        e_attr: PatternAttr,
+    ) -> list[DataEdge]:
+        es = self.filter_es(self.adj_es(dst_vid, e_label, False), e_label, e_attr)
+        return self.to_data_edges(es, e_label)
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def count_e(
+        self,
+        e_label: Label,
+        src_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> int:
+        graph = self.graph
+        adjacency = graph.fwd.get(e_label)
+        if adjacency is None or not {src_label, dst_label} <= set(graph.v_labels):
+            return 0
+        es = (
+            adjacency.eids
+            if not e_attr
+            else self.filter_es(adjacency.eids, e_label, e_attr)
+        )
+        src_code = graph.v_labels.index(src_label)
+        dst_code = graph.v_labels.index(dst_label)
+        matched = (graph.v_label_codes[graph.e_src[es]] == src_code) & (
+            graph.v_label_codes[graph.e_dst[es]] == dst_code
+        )
+        return int(np.count_nonzero(matched))
+
+    @override
+    def get_stats(self) -> Optional[GraphStats]:
+        return self.stats
+
+    @cached_property
+    def stats(self) -> GraphStats:
+        # 整张图已在内存 (或已映射), 直接由数组统计; `DenseCSRStorageAdapter` 同样适用
+        from storage.csr.stats import collect_stats
+
+        return collect_stats(self.graph)
+
+
+class DenseCSRStorageAdapter(CSRStorageAdapter, InternedStorageAdapter):
+    """
+    `稠密整数 id` 版本的 CSR 存储适配器
+
+    - 直接使用 `CSRGraph` 自身的稠密 id (点: `vid` 序号, 边: 载入序号), 不必另建字典,
+      查询时也不再解码字符串
+    """
+
+    @override
+    def interned(self) -> InternedStorageAdapter:
+        return self
+
+    @override
+    def external_vid(self, vid: DenseId | Vid) -> Vid:
+        return self.graph.vids[int(vid)]
+
+    @override
+    def external_eid(self, eid: DenseId | Eid) -> Eid:
+        return self.graph.eids[int(eid)]
+
+    @override
+    def find_v(self, vid: DenseId) -> Optional[int]:
+        return vid if 0 <= vid < len(self.graph.vids) else None
+
+    @override
+    def to_vids(self, vs: np.ndarray) -> list:
+        return vs.tolist()
+
+    @override
+    def to_eids(self, es: np.ndarray) -> list:
+        return es.tolist()
@@ -0,0 +1,315 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import polars as pl
+
+from schema import Label, PatternAttr, Vid
+from schema.basic import str_op_to_operator
+
+type Attr = int | float | str
+type AttrDict = dict[str, Attr]
+
+ID_DTYPE = np.int32
+""" 稠密 id (点 / 边) 的类型 """
+OFFSET_DTYPE = np.int64
+""" 偏移量的类型 """
+
+EMPTY_IDS = np.empty(0, dtype=ID_DTYPE)
+
+
+@dataclass
+class StringColumn:
+    """
+    变长字符串列
+
+    - 与 Arrow 的 `large_utf8` 同构: 所有字符串的 UTF-8 字节首尾相接存放在 `data` 中,
+      第 `i` 个字符串为 `data[offsets[i] : offsets[i + 1]]`
+    - 只由 `numpy` 数组构成, 可以直接落盘 / 内存映射
+    """
+
+    data: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_series(cls, series: pl.Series):
+        series = series.cast(pl.Utf8)
+        offsets = np.zeros(len(series) + 1, dtype=OFFSET_DTYPE)
+        np.cumsum(series.str.len_bytes().to_numpy(), out=offsets[1:])
+        data = np.frombuffer("".join(series.to_list()).encode(), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return self.data[start:end].tobytes().decode()
+
+    def take(self, ids: Iterable[int]) -> list[str]:
+        return [self[i] for i in ids]
+
+    def index(self, value: str) -> Optional[int]:
+        """二分查找 `value` 的位置 (要求列已排序), 不存在则返回 `None`"""
+
+        idx = bisect_left(self, value)
+        return idx if idx < len(self) and self[idx] == value else None
+
+
+@dataclass
+class AttrColumn:
+    """
+    属性列: 某个 `标签` 下, 同名同类型属性的全部取值
+
+    - `ids` 为属主 (点 / 边) 的稠密 id, 升序; `values[i]` 为 `ids[i]` 的属性值
+    - `type` 与 `BaseAttribute.type` 一致 ("int" / "float" / "str")
+    """
+
+    key: str
+    type: str
+    ids: np.ndarray
+    values: np.ndarray | StringColumn
+
+    def lookup(self, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """返回 (`ids` 在本列中的位置, 是否存在)"""
+
+        pos = np.searchsorted(self.ids, ids)
+        clipped = np.minimum(pos, max(len(self.ids) - 1, 0))
+        found = (pos < len(self.ids)) & (self.ids[clipped] == ids)
+        return clipped, found
+
+    def take(self, pos: np.ndarray) -> list[Attr]:
+        if isinstance(self.values, StringColumn):
+            return self.values.take(pos.tolist())
+        return self.values[pos].tolist()
+
+    def mask(self, ids: np.ndarray, pattern_attr: PatternAttr) -> np.ndarray:
+        """`ids` 中满足 `pattern_attr` 的掩码 (没有该属性的一律不满足)"""
+
+        pos, found = self.lookup(ids)
+        if type(pattern_attr.value).__name__ != self.type:
+            return np.zeros(len(ids), dtype=bool)
+
+        operator = str_op_to_operator(pattern_attr.op)
+        satisfied = np.zeros(len(ids), dtype=bool)
+        if isinstance(self.values, StringColumn):
+            satisfied[found] = [
+                operator(value, pattern_attr.value) for value in self.take(pos[found])
+            ]
+        else:
+            satisfied[found] = operator(self.values[pos[found]], pattern_attr.value)
+        return satisfied
+
+
+@dataclass
+class Adjacency:
+    """
+    某个边标签下的邻接表 (双重压缩的 CSR, 即 DCSR)
+
+    - 只为 `至少有一条该标签边` 的端点保存偏移量, 标签众多时不必为每个标签开 |V| + 1 的数组
+    - `vids` 升序; 端点 `vids[i]` 的边为 `eids[offsets[i] : offsets[i + 1]]`
+    """
+
+    vids: np.ndarray
+    offsets: np.ndarray
+    eids: np.ndarray
+
+    @classmethod
+    def from_endpoints(cls, endpoints: np.ndarray, eids: np.ndarray):
+        """由 (端点, 边) 对构造, 同一端点的边保持 `eids` 中的相对顺序"""
+
+        order = np.argsort(endpoints, kind="stable")
+        endpoints, eids = endpoints[order], eids[order]
+        vids, starts = np.unique(endpoints, return_index=True)
+        offsets = np.append(starts, len(endpoints)).astype(OFFSET_DTYPE)
+        return cls(vids.astype(ID_DTYPE), offsets, eids.astype(ID_DTYPE))
+
+    def edges_of(self, v: int) -> np.ndarray:
+        idx = np.searchsorted(self.vids, v)
+        if idx >= len(self.vids) or self.vids[idx] != v:
+            return EMPTY_IDS
+        return self.eids[self.offsets[idx] : self.offsets[idx + 1]]
+
+
+@dataclass
+class CSRGraph:
+    """
+    按标签划分的 CSR 图
+
+    - 点按 `vid` 升序编号为稠密 id (`0 .. |V| - 1`), 边按载入顺序编号
+    - 每个边标签各有一份正向 (`fwd`, 以 `src` 为端点) / 反向 (`rev`, 以 `dst` 为端点) 邻接表
+    - 属性按 `(标签, 属性名, 类型)` 列式存储
+    """
+
+    vids: StringColumn
+    v_labels: list[Label]
+    v_label_codes: np.ndarray
+    label_vs: dict[Label, np.ndarray]
+    v_attr_columns: dict[Label, list[AttrColumn]]
+
+    eids: StringColumn
+    e_labels: list[Label]
+    e_label_codes: np.ndarray
+    e_src: np.ndarray
+    e_dst: np.ndarray
+    fwd: dict[Label, Adjacency]
+    rev: dict[Label, Adjacency]
+    e_attr_columns: dict[Label, list[AttrColumn]]
+
+    def find_v(self, vid: Vid) -> Optional[int]:
+        """`vid` -> 稠密 id"""
+        return self.vids.index(vid)
+
+    def v_label(self, v: int) -> Label:
+        return self.v_labels[self.v_label_codes[v]]
+
+    def find_attr_column(
+        self, columns: dict[Label, list[AttrColumn]], label: Label, attr: PatternAttr
+    ) -> Optional[AttrColumn]:
+        value_type = type(attr.value).__name__
+        for column in columns.get(label, []):
+            if column.key == attr.key and column.type == value_type:
+                return column
+        return None
+
+    @staticmethod
+    def collect_attrs(columns: list[AttrColumn], ids: np.ndarray) -> list[AttrDict]:
+        """批量取出 `ids` 的属性字典 (按列向量化查找)"""
+
+        attrs: list[AttrDict] = [{} for _ in range(len(ids))]
+        for column in columns:
+            pos, found = column.lookup(ids)
+            rows = np.flatnonzero(found)
+            for row, value in zip(rows.tolist(), column.take(pos[rows])):
+                attrs[row][column.key] = value
+        return attrs
+
+    @classmethod
+    def from_frames(
+        cls,
+        vertices: pl.DataFrame,
+        edges: pl.DataFrame,
+        v_attrs: pl.DataFrame,
+        e_attrs: pl.DataFrame,
+    ):
+        """
+        由 `长表` 构造
+
+        - `vertices`: [vid, label]
+        - `edges`: [eid, label, src_vid, dst_vid] (端点不存在的 `悬挂边` 会被丢弃)
+        - `v_attrs` / `e_attrs`: [vid / eid, key, type, value, int_value, float_value],
+          列含义与 `BaseAttribute` 一致
+        """
+
+        vertices = (
+            vertices.unique("vid", keep="first", maintain_order=True)
+            .sort("vid")
+            .with_row_index("v", offset=0)
+        )
+        v_labels = sorted(vertices.get_column("label").unique().to_list())
+        v_label_codes = (
+            vertices.get_column("label")
+            .cast(pl.Enum(v_labels))
+            .to_physical()
+            .to_numpy()
+            .astype(np.int16)
+        )
+        label_vs = {
+            str(label): df.get_column("v").to_numpy().astype(ID_DTYPE)
+            for (label,), df in vertices.partition_by(
+                "label", as_dict=True, maintain_order=True
+            ).items()
+        }
+
+        v_index = vertices.select("vid", "v")
+        edges = (
+            edges.join(
+                v_index.rename({"vid": "src_vid", "v": "src"}),
+                on="src_vid",
+                maintain_order="left",
+            )
+            .join(
+                v_index.rename({"vid": "dst_vid", "v": "dst"}),
+                on="dst_vid",
+                maintain_order="left",
+            )
+            .unique("eid", keep="first", maintain_order=True)
+            .with_row_index("e", offset=0)
+        )
+        e_labels = sorted(edges.get_column("label").unique().to_list())
+        e_label_codes = (
+            edges.get_column("label")
+            .cast(pl.Enum(e_labels))
+            .to_physical()
+            .to_numpy()
+            .astype(np.int16)
+        )
+        e_src = edges.get_column("src").to_numpy().astype(ID_DTYPE)
+        e_dst = edges.get_column("dst").to_numpy().astype(ID_DTYPE)
+        fwd: dict[Label, Adjacency] = {}
+        rev: dict[Label, Adjacency] = {}
+        for code, label in enumerate(e_labels):
+            eids = np.flatnonzero(e_label_codes == code)
+            fwd[label] = Adjacency.from_endpoints(e_src[eids], eids)
+            rev[label] = Adjacency.from_endpoints(e_dst[eids], eids)
+
+        v_attr_columns = build_attr_columns(
+            v_attrs.join(vertices, on="vid", maintain_order="left").rename(
+                {"v": "owner"}
+            )
+        )
+        e_attr_columns = build_attr_columns(
+            e_attrs.join(
+                edges.select("eid", "label", "e"), on="eid", maintain_order="left"
+            ).rename({"e": "owner"})
+        )
+
+        return cls(
+            vids=StringColumn.from_series(vertices.get_column("vid")),
+            v_labels=v_labels,
+            v_label_codes=v_label_codes,
+            label_vs=label_vs,
+            v_attr_columns=v_attr_columns,
+            eids=StringColumn.from_series(edges.get_column("eid")),
+            e_labels=e_labels,
+            e_label_codes=e_label_codes,
+            e_src=e_src,
+            e_dst=e_dst,
+            fwd=fwd,
+            rev=rev,
+            e_attr_columns=e_attr_columns,
+        )
+
+
+def build_attr_columns(attrs: pl.DataFrame) -> dict[Label, list[AttrColumn]]:
+    """
+    将 `长表` 形式的属性 [owner, label, key, type, value, int_value, float_value]
+    按 `(标签, 属性名, 类型)` 拆成属性列
+
+    - 同一属主的同名属性出现多次时, 以最后一次为准 (与 `get_attributes` 的字典覆盖一致)
+    """
+
+    columns: dict[Label, list[AttrColumn]] = {}
+    groups = attrs.partition_by(["label", "key", "type"], as_dict=True)
+    for (label, key, type_name), df in sorted(groups.items()):
+        df = df.unique("owner", keep="last", maintain_order=True).sort("owner")
+        ids = df.get_column("owner").to_numpy().astype(ID_DTYPE)
+        if type_name == "int":
+            values = (
+                df.select(
+                    pl.coalesce("int_value", pl.col("value").cast(pl.Int64))
+                ).to_series()
+            ).to_numpy()
+        elif type_name == "float":
+            values = (
+                df.select(
+                    pl.coalesce("float_value", pl.col("value").cast(pl.Float64))
+                ).to_series()
+            ).to_numpy()
+        else:
+            values = StringColumn.from_series(df.get_column("value"))
+        columns.setdefault(str(label), []).append(
+            AttrColumn(str(key), str(type_name), ids, values)
+        )
+    return columns
@@ -0,0 +1,176 @@
+"""
+将数据源读成 `CSRGraph.from_frames` 所需的 `长表`
+
+- `load_frames_from_sqlite`: 读取 `SQLiteStorageAdapter` 使用的数据库
+- `load_frames_from_ldbc_csv`: 直接读取 LDBC SNB BI 的 CSV (目录布局与 `bi_sqlite_importer` 一致)
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+import polars as pl
+from sqlalchemy import make_url
+
+from config import SIMPLE_TEST_SQL_DB_URL
+from storage.sqlite.db_entity import init_db
+
+type GraphFrames = tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame, pl.DataFrame]
+""" (vertices, edges, v_attrs, e_attrs) """
+
+V_SCHEMA = {"vid": pl.Utf8, "label": pl.Utf8}
+E_SCHEMA = {"eid": pl.Utf8, "label": pl.Utf8, "src_vid": pl.Utf8, "dst_vid": pl.Utf8}
+ATTR_SCHEMA = {
+    "key": pl.Utf8,
+    "type": pl.Utf8,
+    "value": pl.Utf8,
+    "int_value": pl.Int64,
+    "float_value": pl.Float64,
+}
+
+ID_COLUMN_PREFIXES = (":ID", ":START_ID", ":END_ID")
+
+
+def load_frames_from_sqlite(db_url: Optional[str] = None) -> GraphFrames:
+    """读取 SQLite 数据库 (必要时先完成 `migrate_db` 迁移)"""
+
+    db_url = SIMPLE_TEST_SQL_DB_URL if not db_url else db_url
+    init_db(db_url).dispose()
+
+    db_path = make_url(db_url).database
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+
+        def read(query: str, schema: dict[str, pl.DataType]):
+            return pl.read_database(query, conn, schema_overrides=schema).select(
+                schema.keys()
+            )
+
+        attr_columns = "key, type, value, int_value, float_value"
+        return (
+            read("SELECT vid, label FROM db_vertex", V_SCHEMA),
+            read("SELECT eid, label, src_vid, dst_vid FROM db_edge", E_SCHEMA),
+            read(
+                f"SELECT vid, {attr_columns} FROM vertex_attribute",
+                {"vid": pl.Utf8, **ATTR_SCHEMA},
+            ),
+            read(
+                f"SELECT eid, {attr_columns} FROM edge_attribute",
+                {"eid": pl.Utf8, **ATTR_SCHEMA},
+            ),
+        )
+
+
+def typed_attr_columns(columns: list[str]) -> dict[str, tuple[str, str]]:
+    """
+    CSV 列名 -> (类型, 属性名)
+
+    - 规则与 `bi_sqlite_importer.to_typed_attrs` 一致: `int` / `long` 为整数,
+      `float` 为浮点数, 其余 (包括不带类型的列) 一律视作字符串
+    """
+
+    typed_columns: dict[str, tuple[str, str]] = {}
+    for col in columns:
+        if col.startswith(ID_COLUMN_PREFIXES) or col in (":TYPE", ":LABEL"):
+            continue
+        if ":" not in col:
+            typed_columns[col] = ("str", col)
+            continue
+
+        name, type_info = col.split(":", 1)
+        if type_info in ("int", "long"):
+            typed_columns[col] = ("int", name)
+        elif type_info == "float":
+            typed_columns[col] = ("float", name)
+        else:
+            typed_columns[col] = ("str", name)
+    return typed_columns
+
+
+def melt_attrs(df: pl.DataFrame, owner: str) -> pl.DataFrame:
+    """将宽表的属性列展开成 [owner, key, type, value, int_value, float_value] 长表"""
+
+    frames: list[pl.DataFrame] = []
+    attr_cols = [col for col in df.columns if col != owner]
+    for col, (type_name, name) in typed_attr_columns(attr_cols).items():
+        value = pl.col(col)
+        frames.append(
+            df.filter(value.is_not_null()).select(
+                pl.col(owner),
+                pl.lit(name).alias("key"),
+                pl.lit(type_name).alias("type"),
+                value.cast(pl.Utf8).alias("value"),
+                (value.cast(pl.Int64) if type_name == "int" else pl.lit(None))
+                .cast(pl.Int64)
+                .alias("int_value"),
+                (value.cast(pl.Float64) if type_name == "float" else pl.lit(None))
+                .cast(pl.Float64)
+                .alias("float_value"),
+            )
+        )
+    if not frames:
+        return pl.DataFrame(schema={owner: pl.Utf8, **ATTR_SCHEMA})
+    return pl.concat(frames)
+
+
+def load_frames_from_ldbc_csv(data_dir: Path) -> GraphFrames:
+    """
+    读取 LDBC SNB BI 的 CSV
+
+    - `nodes/<Scope>/*.csv`: `vid` 为 `<Scope>^<:ID>`
+    - `relationships/<Src>_<label>_<Dst>/*.csv`: `eid` 为 `<src_vid> -> <dst_vid> @ <n>`,
+      `n` 为同一文件内同一对端点的重复序号
+    """
+
+    vertices: list[pl.DataFrame] = []
+    v_attrs: list[pl.DataFrame] = []
+    for file_path in sorted((data_dir / "nodes").glob("**/*.csv")):
+        df = pl.read_csv(file_path, separator="|")
+        scope = file_path.parent.stem
+        id_col = next(c for c in df.columns if c.startswith(f":ID({scope})"))
+        df = df.with_columns(
+            (pl.lit(f"{scope}^") + pl.col(id_col).cast(pl.Utf8)).alias("vid")
+        )
+        vertices.append(df.select("vid", pl.col(":LABEL").cast(pl.Utf8).alias("label")))
+        v_attrs.append(melt_attrs(df.drop(id_col), "vid"))
+
+    edges: list[pl.DataFrame] = []
+    e_attrs: list[pl.DataFrame] = []
+    for file_path in sorted((data_dir / "relationships").glob("**/*.csv")):
+        df = pl.read_csv(file_path, separator="|")
+        src_scope, _, dst_scope = file_path.parent.stem.split("_")[:3]
+        src_col = next(c for c in df.columns if c.startswith(f":START_ID({src_scope})"))
+        dst_col = next(c for c in df.columns if c.startswith(f":END_ID({dst_scope})"))
+        df = df.with_columns(
+            (pl.lit(f"{src_scope}^") + pl.col(src_col).cast(pl.Utf8)).alias("src_vid"),
+            (pl.lit(f"{dst_scope}^") + pl.col(dst_col).cast(pl.Utf8)).alias("dst_vid"),
+        ).with_columns(
+            (
+                pl.col("src_vid")
+                + " -> "
+                + pl.col("dst_vid")
+                + " @ "
+                + pl.int_range(pl.len()).over("src_vid", "dst_vid").cast(pl.Utf8)
+            ).alias("eid")
+        )
+        edges.append(
+            df.select(
+                "eid",
+                pl.col(":TYPE").cast(pl.Utf8).alias("label"),
+                "src_vid",
+                "dst_vid",
+            )
+        )
+        e_attrs.append(
+            melt_attrs(df.drop(src_col, dst_col, "src_vid", "dst_vid"), "eid")
+        )
+
+    return (
+        pl.concat(vertices) if vertices else pl.DataFrame(schema=V_SCHEMA),
+        pl.concat(edges) if edges else pl.DataFrame(schema=E_SCHEMA),
+        pl.concat(v_attrs)
+        if v_attrs
+        else pl.DataFrame(schema={"vid": pl.Utf8, **ATTR_SCHEMA}),
+        pl.concat(e_attrs)
+        if e_attrs
+        else pl.DataFrame(schema={"eid": pl.Utf8, **ATTR_SCHEMA}),
+    )
@@ -0,0 +1,224 @@
+"""
+`CSRGraph` 快照 (落盘 + 内存映射)
+
+- 快照是一个目录: `meta.json` 记录标签 / 属性列等元数据, 每个数组各自是一个 `.npy` 文件
+- 打开时以 `np.load(mmap_mode="r")` 映射, 启动几乎不耗时; 页面按需载入,
+  多个进程打开同一份快照时共享操作系统的页缓存
+- 生成快照: `python -m storage.csr.snapshot <sqlite_db_url | ldbc_bi_csv_dir> <snapshot_dir>`
+- `meta.json` 记录生成时数据源的指纹 (`storage.fingerprint`), 数据源变化后快照视为过期
+"""
+
+import json
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+from sqlalchemy import make_url
+
+from storage.csr.graph import Adjacency, AttrColumn, CSRGraph, StringColumn
+from storage.csr.loader import load_frames_from_ldbc_csv, load_frames_from_sqlite
+from storage.fingerprint import source_fingerprint
+
+SNAPSHOT_VERSION = 1
+""" 快照格式版本 (不兼容时拒绝打开) """
+
+META_FILE = "meta.json"
+
+
+def snapshot_dir_for(db_url: str) -> Path:
+    """SQLite 数据库对应的默认快照目录 (`<db 文件>.csr`)"""
+
+    db_path = make_url(db_url).database
+    if not db_path:
+        raise ValueError(f"Cannot derive snapshot dir from '{db_url}'.")
+    return Path(f"{db_path}.csr")
+
+
+def write_snapshot(
+    graph: CSRGraph, snapshot_dir: Path, fingerprint: Optional[str] = None
+):
+    """
+    将 `graph` 写成快照
+
+    - 先写到同级的临时目录, 全部写完后再替换, 不会留下写了一半的快照
+    - `fingerprint`: 生成 `graph` 时数据源的指纹 (见 `open_or_build_snapshot`)
+    """
+
+    tmp_dir = snapshot_dir.with_name(snapshot_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    def save(name: str, array: np.ndarray):
+        np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(array))
+
+    def save_strings(name: str, column: StringColumn):
+        save(f"{name}.data", column.data)
+        save(f"{name}.offsets", column.offsets)
+
+    def save_attr_columns(prefix: str, columns: dict[str, list[AttrColumn]]):
+        meta: dict[str, list[dict[str, str]]] = {}
+        for label_idx, (label, label_columns) in enumerate(columns.items()):
+            meta[label] = []
+            for col_idx, column in enumerate(label_columns):
+                name = f"{prefix}.{label_idx}.{col_idx}"
+                save(f"{name}.ids", column.ids)
+                if isinstance(column.values, StringColumn):
+                    save_strings(f"{name}.values", column.values)
+                else:
+                    save(f"{name}.values", column.values)
+                meta[label].append({"key": column.key, "type": column.type})
+        return meta
+
+    def save_adjacency(prefix: str, adjacency: dict[str, Adjacency]):
+        labels = list(adjacency)
+        for label_idx, label in enumerate(labels):
+            name = f"{prefix}.{label_idx}"
+            save(f"{name}.vids", adjacency[label].vids)
+            save(f"{name}.offsets", adjacency[label].offsets)
+            save(f"{name}.eids", adjacency[label].eids)
+        return labels
+
+    save_strings("vids", graph.vids)
+    save("v_label_codes", graph.v_label_codes)
+    for label_idx, (label, vs) in enumerate(graph.label_vs.items()):
+        save(f"label_vs.{label_idx}", vs)
+    save_strings("eids", graph.eids)
+    save("e_label_codes", graph.e_label_codes)
+    save("e_src", graph.e_src)
+    save("e_dst", graph.e_dst)
+
+    meta: dict[str, Any] = {
+        "version": SNAPSHOT_VERSION,
+        "source_fingerprint": fingerprint,
+        "v_labels": graph.v_labels,
+        "e_labels": graph.e_labels,
+        "label_vs": list(graph.label_vs),
+        "fwd": save_adjacency("fwd", graph.fwd),
+        "rev": save_adjacency("rev", graph.rev),
+        "v_attr_columns": save_attr_columns("v_attr", graph.v_attr_columns),
+        "e_attr_columns": save_attr_columns("e_attr", graph.e_attr_columns),
+    }
+    (tmp_dir / META_FILE).write_text(json.dumps(meta, ensure_ascii=False))
+
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    tmp_dir.rename(snapshot_dir)
+
+
+def open_snapshot(snapshot_dir: Path, mmap: bool = True) -> CSRGraph:
+    """
+    打开快照
+
+    - `mmap=True` 时所有数组都是只读的 `np.memmap`, 不会整体读入内存
+    """
+
+    meta = json.loads((snapshot_dir / META_FILE).read_text())
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise RuntimeError(
+            f"Unsupported CSR snapshot version {meta.get('version')} "
+            f"(expected {SNAPSHOT_VERSION}): '{snapshot_dir}'."
+        )
+
+    def load(name: str) -> np.ndarray:
+        return np.load(snapshot_dir / f"{name}.npy", mmap_mode="r" if mmap else None)
+
+    def load_strings(name: str):
+        return StringColumn(load(f"{name}.data"), load(f"{name}.offsets"))
+
+    def load_attr_columns(prefix: str, columns_meta: dict[str, list[dict[str, str]]]):
+        columns: dict[str, list[AttrColumn]] = {}
+        for label_idx, (label, label_columns) in enumerate(columns_meta.items()):
+            columns[label] = []
+            for col_idx, column in enumerate(label_columns):
+                name = f"{prefix}.{label_idx}.{col_idx}"
+                values = (
+                    load_strings(f"{name}.values")
+                    if column["type"] == "str"
+                    else load(f"{name}.values")
+                )
+                columns[label].append(
+                    AttrColumn(
+                        column["key"], column["type"], load(f"{name}.ids"), values
+                    )
+                )
+        return columns
+
+    def load_adjacency(prefix: str, labels: list[str]):
+        return {
+            label: Adjacency(
+                load(f"{prefix}.{label_idx}.vids"),
+                load(f"{prefix}.{label_idx}.offsets"),
+                load(f"{prefix}.{label_idx}.eids"),
+            )
+            for label_idx, label in enumerate(labels)
+        }
+
+    return CSRGraph(
+        vids=load_strings("vids"),
+        v_labels=meta["v_labels"],
+        v_label_codes=load("v_label_codes"),
+        label_vs={
+            label: load(f"label_vs.{label_idx}")
+            for label_idx, label in enumerate(meta["label_vs"])
+        },
+        v_attr_columns=load_attr_columns("v_attr", meta["v_attr_columns"]),
+        eids=load_strings("eids"),
+        e_labels=meta["e_labels"],
+        e_label_codes=load("e_label_codes"),
+        e_src=load("e_src"),
+        e_dst=load("e_dst"),
+        fwd=load_adjacency("fwd", meta["fwd"]),
+        rev=load_adjacency("rev", meta["rev"]),
+        e_attr_columns=load_attr_columns("e_attr", meta["e_attr_columns"]),
+    )
+
+
+def snapshot_fingerprint(snapshot_dir: Path) -> Optional[str]:
+    """快照记录的数据源指纹 (快照不存在或未记录时返回 `None`)"""
+
+    meta_file = snapshot_dir / META_FILE
+    if not meta_file.exists():
+        return None
+    return json.loads(meta_file.read_text()).get("source_fingerprint")
+
+
+def open_or_build_snapshot(
+    snapshot_dir: Path,
+    source: str,
+    build: Optional[Callable[[], CSRGraph]] = None,
+    mmap: bool = True,
+) -> CSRGraph:
+    """
+    打开 `source` 的快照; 快照不存在或已过期 (指纹与 `source` 当前的指纹不符) 时,
+    先 `build()` (默认 `build_graph(source)`) 再重写快照
+    """
+
+    fingerprint = source_fingerprint(source)
+    if fingerprint is None:
+        raise ValueError(f"Snapshot source '{source}' does not exist.")
+
+    if snapshot_fingerprint(snapshot_dir) != fingerprint:
+        graph = build() if build else build_graph(source)
+        # 载入时可能先迁移数据库 (`init_db`), 指纹在载入之后再取
+        write_snapshot(graph, snapshot_dir, source_fingerprint(source))
+    return open_snapshot(snapshot_dir, mmap)
+
+
+def build_graph(source: str) -> CSRGraph:
+    """`source` 为 SQLite 数据库 URL 或 LDBC BI CSV 目录"""
+
+    if source.startswith("sqlite"):
+        return CSRGraph.from_frames(*load_frames_from_sqlite(source))
+    return CSRGraph.from_frames(*load_frames_from_ldbc_csv(Path(source)))
+
+
+def main(source: str, snapshot_dir: Optional[str] = None):
+    out_dir = Path(snapshot_dir) if snapshot_dir else snapshot_dir_for(source)
+    graph = build_graph(source)
+    write_snapshot(graph, out_dir, source_fingerprint(source))
+    print(f"快照已写入 '{out_dir}'")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
@@ -0,0 +1,146 @@
+"""
+由 `CSRGraph` 收集统计信息 (`storage.stats.GraphStats`)
+
+- 所有统计都是对稠密 id 数组的向量化运算, 不逐点访问数据库
+- 生成统计信息: `python -m storage.csr.stats <sqlite_db_url | ldbc_bi_csv_dir> [out]`
+"""
+
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from storage.csr.graph import AttrColumn, CSRGraph, StringColumn
+from storage.csr.snapshot import build_graph
+from storage.fingerprint import source_fingerprint
+from storage.stats import (
+    AttrStats,
+    DegreeStats,
+    EdgeStats,
+    GraphStats,
+    stats_file_for,
+)
+
+HISTOGRAM_BUCKETS = 16
+""" 数值属性等深直方图的桶数 """
+
+MOST_COMMON_VALUES = 16
+""" 字符串属性保留的最常见取值个数 """
+
+
+def degree_stats(degrees: np.ndarray) -> DegreeStats:
+    if not len(degrees):
+        return DegreeStats(avg=0.0, max=0, p50=0.0, p90=0.0, p99=0.0)
+    p50, p90, p99 = np.percentile(degrees, [50, 90, 99]).tolist()
+    return DegreeStats(
+        avg=float(degrees.mean()), max=int(degrees.max()), p50=p50, p90=p90, p99=p99
+    )
+
+
+def collect_edge_stats(graph: CSRGraph) -> list[EdgeStats]:
+    """按 `(src_label, label, dst_label)` 分组统计边数与出 / 入度"""
+
+    n_vertices = len(graph.vids)
+    n_v_labels = max(len(graph.v_labels), 1)
+    label_vs = {graph.v_labels.index(label): vs for label, vs in graph.label_vs.items()}
+
+    edge_stats: list[EdgeStats] = []
+    for label, adjacency in graph.fwd.items():
+        es = adjacency.eids
+        src, dst = graph.e_src[es], graph.e_dst[es]
+        # (src_label, dst_label) 编码为一个整数, 一次 `unique` 完成分组
+        pair_codes = (
+            graph.v_label_codes[src].astype(np.int64) * n_v_labels
+            + graph.v_label_codes[dst]
+        )
+        for pair_code in np.unique(pair_codes).tolist():
+            src_code, dst_code = divmod(pair_code, n_v_labels)
+            selected = pair_codes == pair_code
+            out_degrees = np.bincount(src[selected], minlength=n_vertices)
+            in_degrees = np.bincount(dst[selected], minlength=n_vertices)
+            edge_stats.append(
+                EdgeStats(
+                    label=label,
+                    src_label=graph.v_labels[src_code],
+                    dst_label=graph.v_labels[dst_code],
+                    count=int(np.count_nonzero(selected)),
+                    out_degree=degree_stats(out_degrees[label_vs[src_code]]),
+                    in_degree=degree_stats(in_degrees[label_vs[dst_code]]),
+                )
+            )
+    return edge_stats
+
+
+def collect_attr_stats(label: str, column: AttrColumn) -> AttrStats:
+    stats = AttrStats(
+        label=label, key=column.key, type=column.type, count=len(column.ids), distinct=0
+    )
+    if not len(column.ids):
+        return stats
+
+    if isinstance(column.values, StringColumn):
+        values, counts = np.unique(
+            np.array(column.values.take(range(len(column.values))), dtype=object),
+            return_counts=True,
+        )
+        order = np.argsort(-counts, kind="stable")[:MOST_COMMON_VALUES]
+        stats.distinct = len(values)
+        stats.min, stats.max = str(values[0]), str(values[-1])
+        stats.histogram = [(str(values[i]), int(counts[i])) for i in order]
+        return stats
+
+    values = np.asarray(column.values)
+    stats.distinct = len(np.unique(values))
+    stats.min, stats.max = values.min().item(), values.max().item()
+    bounds = np.unique(
+        np.quantile(values, np.linspace(0, 1, HISTOGRAM_BUCKETS + 1), method="lower")
+    )
+    if len(bounds) < 2:
+        stats.histogram = [(stats.max, len(values))]
+        return stats
+    counts, _ = np.histogram(values, bins=bounds)
+    stats.histogram = [
+        (bound, int(cnt)) for bound, cnt in zip(bounds[1:].tolist(), counts.tolist())
+    ]
+    return stats
+
+
+def collect_stats(graph: CSRGraph, fingerprint: Optional[str] = None) -> GraphStats:
+    return GraphStats(
+        vertex_counts={label: len(vs) for label, vs in graph.label_vs.items()},
+        edges=collect_edge_stats(graph),
+        v_attrs=[
+            collect_attr_stats(label, column)
+            for label, columns in graph.v_attr_columns.items()
+            for column in columns
+        ],
+        e_attrs=[
+            collect_attr_stats(label, column)
+            for label, columns in graph.e_attr_columns.items()
+            for column in columns
+        ],
+        source_fingerprint=fingerprint,
+    )
+
+
+def write_stats_for(db_url: str) -> Path:
+    """为 SQLite 数据库生成统计信息文件 (导入脚本结束时调用)"""
+
+    stats_file = stats_file_for(db_url)
+    graph = build_graph(db_url)
+    # 载入时可能先迁移数据库 (`init_db`), 指纹在载入之后再取
+    collect_stats(graph, source_fingerprint(db_url)).save(stats_file)
+    return stats_file
+
+
+def main(source: str, stats_file: Optional[str] = None):
+    out_file = Path(stats_file) if stats_file else stats_file_for(source)
+    graph = build_graph(source)
+    # 载入时可能先迁移数据库 (`init_db`), 指纹在载入之后再取
+    collect_stats(graph, source_fingerprint(source)).save(out_file)
+    print(f"统计信息已写入 '{out_file}'")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
@@ -0,0 +1,43 @@
+"""
+数据源指纹: 快照 / 统计信息等派生文件记录生成时数据源的指纹, 使用前比对, 不符即视为过期
+
+- 指纹由数据源文件的大小与修改时间计算, 不读取文件内容
+- 数据源与 `storage.csr.snapshot.build_graph` 相同: SQLite 数据库 URL 或 LDBC BI CSV 目录
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import make_url
+
+
+def source_files(source: str) -> list[Path]:
+    """
+    数据源包含的文件 (SQLite: 数据库文件及其 WAL; CSV 目录: 目录下的全部文件)
+
+    - 内存数据库没有文件
+    """
+
+    if source.startswith("sqlite"):
+        db_path = make_url(source).database
+        if not db_path or db_path == ":memory:":
+            return []
+        path = Path(db_path)
+        return [p for p in (path, Path(f"{db_path}-wal")) if p.exists()]
+
+    return sorted(p for p in Path(source).rglob("*") if p.is_file())
+
+
+def source_fingerprint(source: str) -> Optional[str]:
+    """数据源的指纹 (数据源不存在或没有文件时返回 `None`)"""
+
+    files = source_files(source)
+    if not files:
+        return None
+
+    digest = hashlib.sha1()
+    for path in files:
+        stat = path.stat()
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
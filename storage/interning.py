@@ -0,0 +1,261 @@
+import threading
+from functools import lru_cache
+from typing import Iterable, Optional, override
+
+from schema import DataEdge, DataVertex, DenseId, Eid, Label, PatternAttr, Vid
+from storage.abc import AdjWithEndpoints, StorageAdapter
+from storage.stats import GraphStats
+from utils.tracked_lru_cache import track_lru_cache_annotated
+
+
+class IdDict:
+    """
+    `字符串 id` <-> `稠密整数 id` 字典
+
+    - 按首次出现的顺序分配 `0, 1, 2, ...`
+    - 可在多个线程中同时登记 (GetAdj 预取): 只有未登记过的 id 才加锁
+    """
+
+    __slots__ = ("ids", "strs", "lock")
+
+    def __init__(self) -> None:
+        self.ids: dict[str, DenseId] = {}
+        self.strs: list[str] = []
+        self.lock = threading.Lock()
+
+    def intern(self, s: str) -> DenseId:
+        dense_id = self.ids.get(s)
+        if dense_id is None:
+            with self.lock:
+                dense_id = self.ids.get(s)
+                if dense_id is None:
+                    self.strs.append(s)
+                    dense_id = self.ids[s] = len(self.strs) - 1
+        return dense_id
+
+    def __getitem__(self, dense_id: DenseId) -> str:
+        return self.strs[dense_id]
+
+    def __len__(self) -> int:
+        return len(self.strs)
+
+
+class InternedStorageAdapter(StorageAdapter):
+    """
+    `稠密整数 id` 版本的存储适配器 (执行器内部使用)
+
+    - 接收 / 返回的 `vid`, `eid` (包括 `DataEdge.src_vid / dst_vid`) 均为稠密整数
+    - 输出结果时经 `external_vid / external_eid` 还原为字符串 id
+    """
+
+    @override
+    def interned(self) -> "InternedStorageAdapter":
+        return self
+
+
+class IdDictInterner:
+    """
+    把查询结果中出现的 `vid`, `eid` 登记到 `IdDict`, 换成稠密整数
+
+    - 同步 (`IdDictStorageAdapter`) 与异步 (`storage.aio`) 的包装共用
+    """
+
+    def __init__(self) -> None:
+        self.vid_dict = IdDict()
+        self.eid_dict = IdDict()
+
+    def intern_vertices(self, vertices: list[DataVertex]) -> list[DataVertex]:
+        intern_vid = self.vid_dict.intern
+        return [
+            DataVertex(vid=intern_vid(v.vid), label=v.label, attrs=v.attrs)
+            for v in vertices
+        ]
+
+    def intern_edges(self, edges: list[DataEdge]) -> list[DataEdge]:
+        intern_vid, intern_eid = self.vid_dict.intern, self.eid_dict.intern
+        return [
+            DataEdge(
+                eid=intern_eid(e.eid),
+                label=e.label,
+                src_vid=intern_vid(e.src_vid),
+                dst_vid=intern_vid(e.dst_vid),
+                attrs=e.attrs,
+            )
+            for e in edges
+        ]
+
+    def intern_adj_with_endpoints(
+        self, vids: list[DenseId], loaded: AdjWithEndpoints
+    ) -> AdjWithEndpoints:
+        adj_es, far_vs = loaded
+        return (
+            {vid: self.intern_edges(adj_es[self.vid_dict[vid]]) for vid in vids},
+            {v.vid: v for v in self.intern_vertices(list(far_vs.values()))},
+        )
+
+
+class IdDictStorageAdapter(IdDictInterner, InternedStorageAdapter):
+    """
+    用 `IdDict` 包装任意存储适配器 (SQLite / Neo4j 等)
+
+    - 查询时把稠密整数还原为字符串再交给 `inner`, 结果中出现的 id 一律登记到字典中
+    """
+
+    def __init__(self, inner: StorageAdapter) -> None:
+        IdDictInterner.__init__(self)
+        InternedStorageAdapter.__init__(self)
+        self.inner = inner
+
+    @override
+    def external_vid(self, vid: DenseId) -> Vid:
+        return self.vid_dict[vid]
+
+    @override
+    def external_eid(self, eid: DenseId) -> Eid:
+        return self.eid_dict[eid]
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def get_v(self, vid: DenseId) -> DataVertex:
+        return self.intern_vertices([self.inner.get_v(self.vid_dict[vid])])[0]
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_v(self, v_label: Label) -> list[DataVertex]:
+        return self.intern_vertices(self.inner.load_v(v_label))
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_v_with_attr(
+        self,
+        v_label: Label,
+        v_attr: PatternAttr,
+    ) -> list[DataVertex]:
+        return self.intern_vertices(self.inner.load_v_with_attr(v_label, v_attr))
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_src_vid(self, src_vid: DenseId, e_label: Label) -> list[DataEdge]:
+        src = self.vid_dict[src_vid]
+        return self.intern_edges(self.inner.load_e_by_src_vid(src, e_label))
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_dst_vid(self, dst_vid: DenseId, e_label: Label) -> list[DataEdge]:
+        dst = self.vid_dict[dst_vid]
+        return self.intern_edges(self.inner.load_e_by_dst_vid(dst, e_label))
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_src_vid_with_attr(
+        self,
+        src_vid: DenseId,
+        e_label: Label,
+        e_attr: PatternAttr,
+    ) -> list[DataEdge]:
+        src = self.vid_dict[src_vid]
+        return self.intern_edges(
+            self.inner.load_e_by_src_vid_with_attr(src, e_label, e_attr)
+        )
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def load_e_by_dst_vid_with_attr(
+        self,
+        dst_vid: DenseId,
+        e_label: Label,
+        e_attr: PatternAttr,
+    ) -> list[DataEdge]:
+        dst = self.vid_dict[dst_vid]
+        return self.intern_edges(
+            self.inner.load_e_by_dst_vid_with_attr(dst, e_label, e_attr)
+        )
+
+    @override
+    def load_e_by_src_vids(
+        self,
+        src_vids: Iterable[DenseId],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[DenseId, list[DataEdge]]:
+        src_vids = list(src_vids)
+        loaded = self.inner.load_e_by_src_vids(
+            [self.vid_dict[vid] for vid in src_vids], e_label, e_attr
+        )
+        return {vid: self.intern_edges(loaded[self.vid_dict[vid]]) for vid in src_vids}
+
+    @override
+    def load_e_by_dst_vids(
+        self,
+        dst_vids: Iterable[DenseId],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[DenseId, list[DataEdge]]:
+        dst_vids = list(dst_vids)
+        loaded = self.inner.load_e_by_dst_vids(
+            [self.vid_dict[vid] for vid in dst_vids], e_label, e_attr
+        )
+        return {vid: self.intern_edges(loaded[self.vid_dict[vid]]) for vid in dst_vids}
+
+    @override
+    def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[DenseId],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        src_vids = list(src_vids)
+        loaded = self.inner.load_e_by_src_vids_to(
+            [self.vid_dict[vid] for vid in src_vids],
+            e_label,
+            dst_label,
+            e_attr,
+            dst_attr,
+        )
+        return self.intern_adj_with_endpoints(src_vids, loaded)
+
+    @override
+    def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[DenseId],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        dst_vids = list(dst_vids)
+        loaded = self.inner.load_e_by_dst_vids_from(
+            [self.vid_dict[vid] for vid in dst_vids],
+            e_label,
+            src_label,
+            e_attr,
+            src_attr,
+        )
+        return self.intern_adj_with_endpoints(dst_vids, loaded)
+
+    @override
+    def count_v(self, v_label: Label, v_attr: Optional[PatternAttr] = None) -> int:
+        return self.inner.count_v(v_label, v_attr)
+
+    @override
+    def count_e(
+        self,
+        e_label: Label,
+        src_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> int:
+        return self.inner.count_e(e_label, src_label, dst_label, e_attr)
+
+    @override
+    def get_stats(self) -> Optional[GraphStats]:
+        return self.inner.get_stats()
@@ -1,12 +1,88 @@
 from functools import lru_cache
-from typing import Any, LiteralString, cast, override
+from typing import Any, Iterable, LiteralString, Optional, cast, override
 
-from neo4j import GraphDatabase, Query
+from neo4j import AsyncGraphDatabase, GraphDatabase, Query
 from schema import DataEdge, DataVertex, Label, PatternAttr, Vid
-from storage.abc import StorageAdapter
+from storage.abc import AdjWithEndpoints, StorageAdapter
+from storage.aio import AsyncStorageAdapter
 from utils.tracked_lru_cache import track_lru_cache_annotated
 
 
+""" ========== 查询文本与结果解析 (同步 / 异步适配器共用) ========== """
+
+
+def load_v_query(v_label: Label, v_attr: Optional[PatternAttr]) -> LiteralString:
+    """按 `label` (以及 `attr`) 加载点"""
+
+    attr_clause = f"WHERE {v_attr.to_neo4j_where_sub_sentence('v')}" if v_attr else ""
+    query = f"""
+        MATCH (v:{v_label})
+        {attr_clause}
+        RETURN elementId(v) as vid, v
+    """
+    return cast(LiteralString, query)
+
+
+def to_vertices(results: list[dict[str, Any]], v_label: Label) -> list[DataVertex]:
+    return [
+        Neo4jStorageAdapter.node_to_vertex(str(result["vid"]), v_label, result["v"])
+        for result in results
+    ]
+
+
+def adj_with_far_query(
+    e_label: Label,
+    e_attr: Optional[PatternAttr],
+    is_src: bool,
+    far_label: Label,
+    far_attr: Optional[PatternAttr],
+) -> LiteralString:
+    """`UNWIND $vids` 批量加载邻接边, 在 `MATCH` 中约束 `远端点` 的标签 (以及属性)"""
+
+    end, far_end = ("src", "dst") if is_src else ("dst", "src")
+    attr_clause = f"AND {e_attr.to_neo4j_where_sub_sentence('e')}" if e_attr else ""
+    far_attr_clause = (
+        f"AND {far_attr.to_neo4j_where_sub_sentence(far_end)}" if far_attr else ""
+    )
+    src_label, dst_label = ("", f":{far_label}") if is_src else (f":{far_label}", "")
+    query = f"""
+        UNWIND $vids AS vid
+        MATCH (src{src_label})-[e:{e_label}]->(dst{dst_label})
+        WHERE elementId({end}) = vid
+        {attr_clause}
+        {far_attr_clause}
+        RETURN
+            elementId(e) AS eid,
+            properties(e) AS props,
+            elementId(src) AS src_vid,
+            elementId(dst) AS dst_vid,
+            {far_end} AS far
+    """
+    return cast(LiteralString, query)
+
+
+def to_adj_with_endpoints(
+    vids: list[Vid],
+    results: list[dict[str, Any]],
+    e_label: Label,
+    is_src: bool,
+    far_label: Label,
+) -> AdjWithEndpoints:
+    """`adj_with_far_query` 的结果 -> ({ 边缘点 -> 邻接边 }, { 远端点 vid -> 远端点 })"""
+
+    edges: dict[Vid, list[DataEdge]] = {vid: [] for vid in vids}
+    far_vs: dict[Vid, DataVertex] = {}
+    for result in results:
+        eid = str(result["eid"])
+        edge = Neo4jStorageAdapter.relationship_to_edge(eid, e_label, result)
+        edges[edge.src_vid if is_src else edge.dst_vid].append(edge)
+        far_vid = edge.dst_vid if is_src else edge.src_vid
+        far_vs[far_vid] = Neo4jStorageAdapter.node_to_vertex(
+            far_vid, far_label, result["far"]
+        )
+    return edges, far_vs
+
+
 class Neo4jStorageAdapter(StorageAdapter):
     """
     Neo4j 存储适配器
@@ -25,14 +101,15 @@ class Neo4jStorageAdapter(StorageAdapter):
         super().__init__()
         self.driver = GraphDatabase.driver(url, auth=(username, password))
 
-    def execute_query(self, query: Query | LiteralString) -> list[dict[str, Any]]:
+    def execute_query(
+        self, query: Query | LiteralString, **params: Any
+    ) -> list[dict[str, Any]]:
         with self.driver.session() as session:
-            result = session.run(query)
+            result = session.run(query, params)
             return [record.data() for record in result]
 
-    def node_to_vertex(
-        self, vid: str, v_label: str, props: dict[str, Any]
-    ) -> DataVertex:
+    @staticmethod
+    def node_to_vertex(vid: str, v_label: str, props: dict[str, Any]) -> DataVertex:
         attrs: dict[str, int | float | str] = {}
         for name, val in props.items():
             typed_val = str(val)
@@ -44,8 +121,9 @@ class Neo4jStorageAdapter(StorageAdapter):
 
         return DataVertex(vid=vid, label=v_label, attrs=attrs)
 
+    @staticmethod
     def relationship_to_edge(
-        self, eid: str, e_label: str, result: dict[str, Any]
+        eid: str, e_label: str, result: dict[str, Any]
     ) -> DataEdge:
         src_vid = str(result["src_vid"])
         dst_vid = str(result["dst_vid"])
@@ -93,21 +171,8 @@ class Neo4jStorageAdapter(StorageAdapter):
     @track_lru_cache_annotated
     @lru_cache
     def load_v(self, v_label: Label) -> list[DataVertex]:
-        query = f""" 
-            MATCH (v:{v_label})
-            RETURN elementId(v) as vid, v
-        """
-        results = self.execute_query(cast(LiteralString, query))
-        if not results:
-            return []
-
-        vertices: list[DataVertex] = []
-        for result in results:
-            props = result["v"]
-            vid = str(result["vid"])
-            vertices.append(self.node_to_vertex(vid, v_label, props))
-
-        return vertices
+        results = self.execute_query(load_v_query(v_label, None))
+        return to_vertices(results, v_label)
 
     @override
     @track_lru_cache_annotated
@@ -117,22 +182,8 @@ class Neo4jStorageAdapter(StorageAdapter):
         v_label: Label,
         v_attr: PatternAttr,
     ) -> list[DataVertex]:
-        query = f"""
-            MATCH (v:{v_label})
-            WHERE {v_attr.to_neo4j_where_sub_sentence("v")}
-            RETURN elementId(v) as vid, v
-        """
-        results = self.execute_query(cast(LiteralString, query))
-        if not results:
-            return []
-
-        vertices: list[DataVertex] = []
-        for result in results:
-            props = result["v"]
-            vid = str(result["vid"])
-            vertices.append(self.node_to_vertex(vid, v_label, props))
-
-        return vertices
+        results = self.execute_query(load_v_query(v_label, v_attr))
+        return to_vertices(results, v_label)
 
     @override
     @track_lru_cache_annotated
@@ -241,3 +292,222 @@ class Neo4jStorageAdapter(StorageAdapter):
             edges.append(self.relationship_to_edge(eid, e_label, result))
 
         return edges
+
+    def load_e_by_vids(
+        self,
+        vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr],
+        is_src: bool,
+    ) -> dict[Vid, list[DataEdge]]:
+        """`UNWIND $vids` 一次查询加载整批边, 再按 `src_vid` / `dst_vid` 分组"""
+
+        end = "src" if is_src else "dst"
+        attr_clause = f"AND {e_attr.to_neo4j_where_sub_sentence('e')}" if e_attr else ""
+        query = f"""
+            UNWIND $vids AS vid
+            MATCH (src)-[e:{e_label}]->(dst)
+            WHERE elementId({end}) = vid
+            {attr_clause}
+            RETURN
+                elementId(e) AS eid,
+                properties(e) AS props,
+                elementId(src) AS src_vid,
+                elementId(dst) AS dst_vid
+        """
+        edges: dict[Vid, list[DataEdge]] = {vid: [] for vid in vids}
+        if not edges:
+            return edges
+
+        results = self.execute_query(cast(LiteralString, query), vids=list(edges))
+        for result in results:
+            eid = str(result["eid"])
+            edge = self.relationship_to_edge(eid, e_label, result)
+            edges[edge.src_vid if is_src else edge.dst_vid].append(edge)
+
+        return edges
+
+    def load_e_by_vids_with_far(
+        self,
+        vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr],
+        is_src: bool,
+        far_label: Label,
+        far_attr: Optional[PatternAttr],
+    ) -> AdjWithEndpoints:
+        """同 `load_e_by_vids`, 在 `MATCH` 中约束 `远端点` 的标签 (以及属性), 并一并返回远端点"""
+
+        vids = list(dict.fromkeys(vids))
+        if not vids:
+            return {}, {}
+
+        query = adj_with_far_query(e_label, e_attr, is_src, far_label, far_attr)
+        results = self.execute_query(query, vids=vids)
+        return to_adj_with_endpoints(vids, results, e_label, is_src, far_label)
+
+    @override
+    def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return self.load_e_by_vids_with_far(
+            src_vids, e_label, e_attr, True, dst_label, dst_attr
+        )
+
+    @override
+    def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return self.load_e_by_vids_with_far(
+            dst_vids, e_label, e_attr, False, src_label, src_attr
+        )
+
+    @override
+    def load_e_by_src_vids(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[Vid, list[DataEdge]]:
+        return self.load_e_by_vids(src_vids, e_label, e_attr, is_src=True)
+
+    @override
+    def load_e_by_dst_vids(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[Vid, list[DataEdge]]:
+        return self.load_e_by_vids(dst_vids, e_label, e_attr, is_src=False)
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def count_v(self, v_label: Label, v_attr: Optional[PatternAttr] = None) -> int:
+        attr_clause = (
+            f"WHERE {v_attr.to_neo4j_where_sub_sentence('v')}" if v_attr else ""
+        )
+        query = f"""
+            MATCH (v:{v_label})
+            {attr_clause}
+            RETURN count(v) AS cnt
+        """
+        results = self.execute_query(cast(LiteralString, query))
+        return int(results[0]["cnt"]) if results else 0
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def count_e(
+        self,
+        e_label: Label,
+        src_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> int:
+        attr_clause = (
+            f"WHERE {e_attr.to_neo4j_where_sub_sentence('e')}" if e_attr else ""
+        )
+        query = f"""
+            MATCH (:{src_label})-[e:{e_label}]->(:{dst_label})
+            {attr_clause}
+            RETURN count(e) AS cnt
+        """
+        results = self.execute_query(cast(LiteralString, query))
+        return int(results[0]["cnt"]) if results else 0
+
+
+class AsyncNeo4jStorageAdapter(AsyncStorageAdapter):
+    """
+    异步 Neo4j 存储适配器 (使用驱动的异步 API)
+
+    - 每个查询各自一个会话 (会话不能并发使用), 并发的查询由驱动的连接池分配连接
+    - 查询文本与 `Neo4jStorageAdapter` 相同
+    """
+
+    def __init__(
+        self,
+        url: str = "bolt://localhost:7687",
+        username: str = "neo4j",
+        password: str = "12345678",
+    ) -> None:
+        super().__init__()
+        self.driver = AsyncGraphDatabase.driver(url, auth=(username, password))
+
+    async def execute_query(
+        self, query: Query | LiteralString, **params: Any
+    ) -> list[dict[str, Any]]:
+        async with self.driver.session() as session:
+            result = await session.run(query, params)
+            return [record.data() async for record in result]
+
+    @override
+    async def close(self):
+        await self.driver.close()
+
+    @override
+    async def load_v(self, v_label: Label) -> list[DataVertex]:
+        results = await self.execute_query(load_v_query(v_label, None))
+        return to_vertices(results, v_label)
+
+    @override
+    async def load_v_with_attr(
+        self,
+        v_label: Label,
+        v_attr: PatternAttr,
+    ) -> list[DataVertex]:
+        results = await self.execute_query(load_v_query(v_label, v_attr))
+        return to_vertices(results, v_label)
+
+    async def load_e_by_vids_with_far(
+        self,
+        vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr],
+        is_src: bool,
+        far_label: Label,
+        far_attr: Optional[PatternAttr],
+    ) -> AdjWithEndpoints:
+        vids = list(dict.fromkeys(vids))
+        if not vids:
+            return {}, {}
+
+        query = adj_with_far_query(e_label, e_attr, is_src, far_label, far_attr)
+        results = await self.execute_query(query, vids=vids)
+        return to_adj_with_endpoints(vids, results, e_label, is_src, far_label)
+
+    @override
+    async def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return await self.load_e_by_vids_with_far(
+            src_vids, e_label, e_attr, True, dst_label, dst_attr
+        )
+
+    @override
+    async def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return await self.load_e_by_vids_with_far(
+            dst_vids, e_label, e_attr, False, src_label, src_attr
+        )
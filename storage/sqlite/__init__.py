@@ -1,48 +1,320 @@
+import threading
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import Optional, override
+from typing import Iterable, Optional, Sequence, override
 
-from sqlmodel import Session, select
+from sqlalchemy import Connection, Select, bindparam, func
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, select
 
+from config import SIMPLE_TEST_SQL_DB_URL, SQLITE_IMMUTABLE, USE_CORE_MODE
 from schema import DataEdge, DataVertex, Label, PatternAttr, Vid
-from storage.abc import StorageAdapter
-from storage.sqlite.db_entity import DB_Edge, DB_Vertex, init_db
+from storage.abc import AdjWithEndpoints, StorageAdapter
+from storage.aio import ThreadOffloadedStorageAdapter
+from storage.fingerprint import source_fingerprint
+from storage.sqlite.db_entity import (
+    CORE_SELECT_E_ATTRS_BY_EIDS,
+    CORE_SELECT_V_ATTRS_BY_VIDS,
+    DB_Edge,
+    DB_Vertex,
+    Edge_Attribute,
+    Vertex_Attribute,
+    chunked,
+    get_attributes_batch_core,
+    init_read_only_db,
+)
+from storage.stats import GraphStats, stats_file_for
 from utils.tracked_lru_cache import track_lru_cache_annotated
 
+""" ========== 预编译语句 (只构造一次, 参数通过 `bindparam` 传入) ========== """
+
+SELECT_V_BY_VID = select(DB_Vertex).where(DB_Vertex.vid == bindparam("vid"))
+SELECT_V_BY_LABEL = select(DB_Vertex).where(DB_Vertex.label == bindparam("label"))
+SELECT_V_BY_VIDS = select(DB_Vertex).where(
+    col(DB_Vertex.vid).in_(bindparam("vids", expanding=True))
+)
+SELECT_E_BY_SRC_VID = (
+    select(DB_Edge)
+    .where(DB_Edge.label == bindparam("label"))
+    .where(DB_Edge.src_vid == bindparam("vid"))
+)
+SELECT_E_BY_DST_VID = (
+    select(DB_Edge)
+    .where(DB_Edge.label == bindparam("label"))
+    .where(DB_Edge.dst_vid == bindparam("vid"))
+)
+SELECT_E_BY_SRC_VIDS = (
+    select(DB_Edge)
+    .where(DB_Edge.label == bindparam("label"))
+    .where(col(DB_Edge.src_vid).in_(bindparam("vids", expanding=True)))
+)
+SELECT_E_BY_DST_VIDS = (
+    select(DB_Edge)
+    .where(DB_Edge.label == bindparam("label"))
+    .where(col(DB_Edge.dst_vid).in_(bindparam("vids", expanding=True)))
+)
+
+
+@lru_cache
+def select_v_by_label_with_attr(v_attr: PatternAttr):
+    """预编译语句: 按 `label` 和 `attr` 加载点 (谓词下推到属性表)"""
+    return SELECT_V_BY_LABEL.where(
+        col(DB_Vertex.vid).in_(Vertex_Attribute.select_vids_satisfying(v_attr))
+    )
+
+
+@lru_cache
+def select_e_by_src_vid_with_attr(e_attr: PatternAttr):
+    """预编译语句: 按 `src_vid`, `label` 和 `attr` 加载边 (谓词下推到属性表)"""
+    return SELECT_E_BY_SRC_VID.where(
+        col(DB_Edge.eid).in_(Edge_Attribute.select_eids_satisfying(e_attr))
+    )
+
+
+@lru_cache
+def select_e_by_dst_vid_with_attr(e_attr: PatternAttr):
+    """预编译语句: 按 `dst_vid`, `label` 和 `attr` 加载边 (谓词下推到属性表)"""
+    return SELECT_E_BY_DST_VID.where(
+        col(DB_Edge.eid).in_(Edge_Attribute.select_eids_satisfying(e_attr))
+    )
+
+
+@lru_cache
+def select_e_by_vids(is_src: bool, e_attr: Optional[PatternAttr]):
+    """预编译语句: 按一批 `src_vid` / `dst_vid`, `label` (以及 `attr`) 加载边"""
+    query = SELECT_E_BY_SRC_VIDS if is_src else SELECT_E_BY_DST_VIDS
+    if not e_attr:
+        return query
+    return query.where(
+        col(DB_Edge.eid).in_(Edge_Attribute.select_eids_satisfying(e_attr))
+    )
+
+
+FAR_VERTEX = aliased(DB_Vertex)
+
+
+@lru_cache
+def select_e_by_vids_with_far(
+    is_src: bool, e_attr: Optional[PatternAttr], far_attr: Optional[PatternAttr]
+):
+    """预编译语句: 同 `select_e_by_vids`, 并连接 `远端点` 按 `far_label` (以及 `far_attr`) 过滤"""
+    far_vid = DB_Edge.dst_vid if is_src else DB_Edge.src_vid
+    query = (
+        select_e_by_vids(is_src, e_attr)
+        .join(FAR_VERTEX, col(FAR_VERTEX.vid) == far_vid)
+        .where(FAR_VERTEX.label == bindparam("far_label"))
+    )
+    if not far_attr:
+        return query
+    return query.where(
+        col(FAR_VERTEX.vid).in_(Vertex_Attribute.select_vids_satisfying(far_attr))
+    )
+
+
+""" ========== 统计查询 (计划优化器使用) ========== """
+
+COUNT_V_BY_LABEL = (
+    select(func.count())
+    .select_from(DB_Vertex)
+    .where(DB_Vertex.label == bindparam("label"))
+)
+
+
+@lru_cache
+def count_v_by_label(v_attr: Optional[PatternAttr]):
+    """预编译语句: 按 `label` (以及 `attr`) 统计点数"""
+    if not v_attr:
+        return COUNT_V_BY_LABEL
+    return COUNT_V_BY_LABEL.where(
+        select(Vertex_Attribute.vid)
+        .where(Vertex_Attribute.vid == DB_Vertex.vid)
+        .where(Vertex_Attribute.satisfy_pattern_attr_clause(v_attr))
+        .exists()
+    )
+
+
+SRC_VERTEX = aliased(DB_Vertex)
+DST_VERTEX = aliased(DB_Vertex)
+COUNT_E_BY_LABELS = (
+    select(func.count())
+    .select_from(DB_Edge)
+    .join(SRC_VERTEX, col(SRC_VERTEX.vid) == DB_Edge.src_vid)
+    .join(DST_VERTEX, col(DST_VERTEX.vid) == DB_Edge.dst_vid)
+    .where(DB_Edge.label == bindparam("label"))
+    .where(SRC_VERTEX.label == bindparam("src_label"))
+    .where(DST_VERTEX.label == bindparam("dst_label"))
+)
+
+
+@lru_cache
+def count_e_by_labels(e_attr: Optional[PatternAttr]):
+    """预编译语句: 按 `label`, 端点标签 (以及 `attr`) 统计边数"""
+    if not e_attr:
+        return COUNT_E_BY_LABELS
+    return COUNT_E_BY_LABELS.where(
+        col(DB_Edge.eid).in_(Edge_Attribute.select_eids_satisfying(e_attr))
+    )
+
+
+""" ========== `Core` 模式: 同样的查询条件, 只取列元组 ========== """
+
+V_COLUMNS = (col(DB_Vertex.vid), col(DB_Vertex.label))
+E_COLUMNS = (
+    col(DB_Edge.eid),
+    col(DB_Edge.label),
+    col(DB_Edge.src_vid),
+    col(DB_Edge.dst_vid),
+)
+
+
+@lru_cache
+def to_core_select(query: Select, is_vertex: bool) -> Select:
+    """将 ORM 实体查询改写为只取列的 `Core` 查询 (保留 `WHERE` 条件)"""
+    return query.with_only_columns(*(V_COLUMNS if is_vertex else E_COLUMNS))
+
 
 class SQLiteStorageAdapter(StorageAdapter):
-    """SQLite 存储适配器"""
+    """
+    SQLite 存储适配器
 
-    def __init__(self, db_url: Optional[str] = None) -> None:
+    - 每个线程复用同一个 `Session`, 不再逐次创建
+    - 引擎为只读引擎, 新连接建立时即设置读优化的 `PRAGMA`, 详见 `init_read_only_db`
+    - `use_core_mode=True` 时走 `SQLAlchemy Core`: 直接查询元组并构造 `DataVertex` / `DataEdge`,
+      跳过 ORM 实例化与 identity map
+    - 统计信息读取自数据库旁的 `<db 文件>.stats.json` (由导入脚本生成)
+    """
+
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        immutable: bool = SQLITE_IMMUTABLE,
+        use_core_mode: bool = USE_CORE_MODE,
+    ) -> None:
         super().__init__()
-        self.engine = init_db() if not db_url else init_db(db_url)
+        self.db_url = SIMPLE_TEST_SQL_DB_URL if not db_url else db_url
+        self.engine = init_read_only_db(self.db_url, immutable=immutable)
+        self.use_core_mode = use_core_mode
+        self._local = threading.local()
+
+    @contextmanager
+    def reuse_session(self):
+        """
+        取出当前线程复用的 `Session`
+
+        - 退出时 `close()`: 清空 identity map 并把连接归还连接池 (不长期持有读事务),
+          `Session` 对象本身留待下次复用
+        """
+
+        session: Optional[Session] = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = Session(self.engine)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    @contextmanager
+    def reuse_connection(self):
+        """
+        取出当前线程复用的 `Connection` (`Core` 模式)
+
+        - 连接一直保持签出; 退出时 `rollback()` 结束本次读事务, 不长期持有共享锁
+        """
+
+        conn: Optional[Connection] = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = self._local.conn = self.engine.connect()
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+    def fetch_vertices(self, query: Select, params: dict) -> list[DataVertex]:
+        """执行 `DB_Vertex` 查询, 按 `use_core_mode` 选择 ORM / `Core` 路径"""
+
+        if not self.use_core_mode:
+            with self.reuse_session() as session:
+                db_vertices = session.exec(query, params=params).all()
+                return self.to_data_vertices(session, db_vertices)
+
+        with self.reuse_connection() as conn:
+            rows = conn.execute(to_core_select(query, True), params).all()
+            attrs_map = get_attributes_batch_core(
+                conn, CORE_SELECT_V_ATTRS_BY_VIDS, (vid for vid, _ in rows)
+            )
+            return [
+                DataVertex(vid=vid, label=label, attrs=attrs_map[vid])
+                for vid, label in rows
+            ]
+
+    def fetch_edges(self, query: Select, params: dict) -> list[DataEdge]:
+        """执行 `DB_Edge` 查询, 按 `use_core_mode` 选择 ORM / `Core` 路径"""
+
+        if not self.use_core_mode:
+            with self.reuse_session() as session:
+                db_edges = session.exec(query, params=params).all()
+                return self.to_data_edges(session, db_edges)
+
+        with self.reuse_connection() as conn:
+            rows = conn.execute(to_core_select(query, False), params).all()
+            attrs_map = get_attributes_batch_core(
+                conn, CORE_SELECT_E_ATTRS_BY_EIDS, (row[0] for row in rows)
+            )
+            return [
+                DataEdge(
+                    eid=eid,
+                    label=label,
+                    src_vid=src_vid,
+                    dst_vid=dst_vid,
+                    attrs=attrs_map[eid],
+                )
+                for eid, label, src_vid, dst_vid in rows
+            ]
+
+    @staticmethod
+    def to_data_vertices(
+        session: Session, db_vertices: Sequence[DB_Vertex]
+    ) -> list[DataVertex]:
+        """将 `DB_Vertex` 结果集转换为 `DataVertex` (属性一次性批量加载)"""
+
+        attrs_map = DB_Vertex.get_attributes_batch(
+            session, (v.vid for v in db_vertices)
+        )
+        return [
+            DataVertex(vid=v.vid, label=v.label, attrs=attrs_map[v.vid])
+            for v in db_vertices
+        ]
+
+    @staticmethod
+    def to_data_edges(session: Session, db_edges: Sequence[DB_Edge]) -> list[DataEdge]:
+        """将 `DB_Edge` 结果集转换为 `DataEdge` (属性一次性批量加载)"""
+
+        attrs_map = DB_Edge.get_attributes_batch(session, (e.eid for e in db_edges))
+        return [
+            DataEdge(
+                eid=e.eid,
+                label=e.label,
+                src_vid=e.src_vid,
+                dst_vid=e.dst_vid,
+                attrs=attrs_map[e.eid],
+            )
+            for e in db_edges
+        ]
 
     @override
     @track_lru_cache_annotated
     @lru_cache
     def get_v(self, vid: Vid) -> DataVertex:
-        query = select(DB_Vertex).where(DB_Vertex.vid == vid)
-        with Session(self.engine) as session:
-            db_vertex = session.exec(query).first()
-            if not db_vertex:
-                raise RuntimeError(f"DataVertex (vid: {vid}) not found.")
-            attrs = db_vertex.get_attributes(session)
-        return DataVertex(vid=db_vertex.vid, label=db_vertex.label, attrs=attrs)
+        data_vertices = self.fetch_vertices(SELECT_V_BY_VID, {"vid": vid})
+        if not data_vertices:
+            raise RuntimeError(f"DataVertex (vid: {vid}) not found.")
+        return data_vertices[0]
 
     @override
     @track_lru_cache_annotated
     @lru_cache
     def load_v(self, v_label: Label) -> list[DataVertex]:
-        query = select(DB_Vertex).where(DB_Vertex.label == v_label)
-        with Session(self.engine) as session:
-            db_vertices = session.exec(query).all()
-            return [
-                DataVertex(
-                    vid=db_vertex.vid,
-                    label=db_vertex.label,
-                    attrs=db_vertex.get_attributes(session),
-                )
-                for db_vertex in db_vertices
-            ]
+        return self.fetch_vertices(SELECT_V_BY_LABEL, {"label": v_label})
 
     @override
     @track_lru_cache_annotated
@@ -52,62 +324,21 @@ class SQLiteStorageAdapter(StorageAdapter):
         v_label: Label,
         v_attr: PatternAttr,
     ) -> list[DataVertex]:
-        query = select(DB_Vertex).where(DB_Vertex.label == v_label)
-        with Session(self.engine) as session:
-            db_vertices = session.exec(query).all()
-            return [
-                DataVertex(
-                    vid=db_vertex.vid,
-                    label=db_vertex.label,
-                    attrs=db_vertex.get_attributes(session),
-                )
-                for db_vertex in db_vertices
-                if v_attr.is_data_attrs_satisfied(db_vertex.get_attributes(session))
-            ]
+        # 谓词下推: 由 SQLite 在属性表上完成过滤, 只返回满足条件的点
+        query = select_v_by_label_with_attr(v_attr)
+        return self.fetch_vertices(query, {"label": v_label})
 
     @override
     @track_lru_cache_annotated
     @lru_cache
     def load_e_by_src_vid(self, src_vid: Vid, e_label: Label) -> list[DataEdge]:
-        query = (
-            select(DB_Edge)
-            .where(DB_Edge.label == e_label)
-            .where(DB_Edge.src_vid == src_vid)
-        )
-        with Session(self.engine) as session:
-            db_edges = session.exec(query).all()
-            return [
-                DataEdge(
-                    eid=db_edge.eid,
-                    label=db_edge.label,
-                    src_vid=db_edge.src_vid,
-                    dst_vid=db_edge.dst_vid,
-                    attrs=db_edge.get_attributes(session),
-                )
-                for db_edge in db_edges
-            ]
+        return self.fetch_edges(SELECT_E_BY_SRC_VID, {"label": e_label, "vid": src_vid})
 
     @override
     @track_lru_cache_annotated
     @lru_cache
     def load_e_by_dst_vid(self, dst_vid: Vid, e_label: Label) -> list[DataEdge]:
-        query = (
-            select(DB_Edge)
-            .where(DB_Edge.label == e_label)
-            .where(DB_Edge.dst_vid == dst_vid)
-        )
-        with Session(self.engine) as session:
-            db_edges = session.exec(query).all()
-            return [
-                DataEdge(
-                    eid=db_edge.eid,
-                    label=db_edge.label,
-                    src_vid=db_edge.src_vid,
-                    dst_vid=db_edge.dst_vid,
-                    attrs=db_edge.get_attributes(session),
-                )
-                for db_edge in db_edges
-            ]
+        return self.fetch_edges(SELECT_E_BY_DST_VID, {"label": e_label, "vid": dst_vid})
 
     @override
     @track_lru_cache_annotated
@@ -118,24 +349,9 @@ class SQLiteStorageAdapter(StorageAdapter):
         e_label: Label,
         e_attr: PatternAttr,
     ) -> list[DataEdge]:
-        query = (
-            select(DB_Edge)
-            .where(DB_Edge.label == e_label)
-            .where(DB_Edge.src_vid == src_vid)
-        )
-        with Session(self.engine) as session:
-            db_edges = session.exec(query).all()
-        return [
-            DataEdge(
-                eid=db_edge.eid,
-                label=db_edge.label,
-                src_vid=db_edge.src_vid,
-                dst_vid=db_edge.dst_vid,
-                attrs=db_edge.get_attributes(session),
-            )
-            for db_edge in db_edges
-            if e_attr.is_data_attrs_satisfied(db_edge.get_attributes(session))
-        ]
+        # 谓词下推: 由 SQLite 在属性表上完成过滤, 只返回满足条件的边
+        query = select_e_by_src_vid_with_attr(e_attr)
+        return self.fetch_edges(query, {"label": e_label, "vid": src_vid})
 
     @override
     @track_lru_cache_annotated
@@ -146,21 +362,141 @@ class SQLiteStorageAdapter(StorageAdapter):
         e_label: Label,
         e_attr: PatternAttr,
     ) -> list[DataEdge]:
-        query = (
-            select(DB_Edge)
-            .where(DB_Edge.label == e_label)
-            .where(DB_Edge.dst_vid == dst_vid)
+        # 谓词下推: 由 SQLite 在属性表上完成过滤, 只返回满足条件的边
+        query = select_e_by_dst_vid_with_attr(e_attr)
+        return self.fetch_edges(query, {"label": e_label, "vid": dst_vid})
+
+    def load_e_by_vids(
+        self,
+        vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr],
+        is_src: bool,
+    ) -> dict[Vid, list[DataEdge]]:
+        """按 `IN (...)` 分块批量加载边, 再按 `src_vid` / `dst_vid` 分组"""
+
+        query = select_e_by_vids(is_src, e_attr)
+        result: dict[Vid, list[DataEdge]] = {vid: [] for vid in vids}
+        for chunk in chunked(result):
+            for e in self.fetch_edges(query, {"label": e_label, "vids": chunk}):
+                result[e.src_vid if is_src else e.dst_vid].append(e)
+        return result
+
+    @override
+    def load_e_by_src_vids(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[Vid, list[DataEdge]]:
+        return self.load_e_by_vids(src_vids, e_label, e_attr, is_src=True)
+
+    @override
+    def load_e_by_dst_vids(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> dict[Vid, list[DataEdge]]:
+        return self.load_e_by_vids(dst_vids, e_label, e_attr, is_src=False)
+
+    def load_e_by_vids_with_far(
+        self,
+        vids: Iterable[Vid],
+        e_label: Label,
+        e_attr: Optional[PatternAttr],
+        is_src: bool,
+        far_label: Label,
+        far_attr: Optional[PatternAttr],
+    ) -> AdjWithEndpoints:
+        """同 `load_e_by_vids`, `远端点` 的过滤在 SQL 中完成, 之后再批量取出远端点"""
+
+        query = select_e_by_vids_with_far(is_src, e_attr, far_attr)
+        params = {"label": e_label, "far_label": far_label}
+        result: dict[Vid, list[DataEdge]] = {vid: [] for vid in vids}
+        far_vids: dict[Vid, None] = {}
+        for chunk in chunked(result):
+            for e in self.fetch_edges(query, {**params, "vids": chunk}):
+                result[e.src_vid if is_src else e.dst_vid].append(e)
+                far_vids[e.dst_vid if is_src else e.src_vid] = None
+
+        far_vs: dict[Vid, DataVertex] = {}
+        for chunk in chunked(far_vids):
+            for v in self.fetch_vertices(SELECT_V_BY_VIDS, {"vids": chunk}):
+                far_vs[v.vid] = v
+        return result, far_vs
+
+    @override
+    def load_e_by_src_vids_to(
+        self,
+        src_vids: Iterable[Vid],
+        e_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        dst_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return self.load_e_by_vids_with_far(
+            src_vids, e_label, e_attr, True, dst_label, dst_attr
         )
-        with Session(self.engine) as session:
-            db_edges = session.exec(query).all()
-        return [
-            DataEdge(
-                eid=db_edge.eid,
-                label=db_edge.label,
-                src_vid=db_edge.src_vid,
-                dst_vid=db_edge.dst_vid,
-                attrs=db_edge.get_attributes(session),
-            )
-            for db_edge in db_edges
-            if e_attr.is_data_attrs_satisfied(db_edge.get_attributes(session))
-        ]
+
+    @override
+    def load_e_by_dst_vids_from(
+        self,
+        dst_vids: Iterable[Vid],
+        e_label: Label,
+        src_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+        src_attr: Optional[PatternAttr] = None,
+    ) -> AdjWithEndpoints:
+        return self.load_e_by_vids_with_far(
+            dst_vids, e_label, e_attr, False, src_label, src_attr
+        )
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def count_v(self, v_label: Label, v_attr: Optional[PatternAttr] = None) -> int:
+        # 只取一个标量, `ORM` / `Core` 模式都直接走连接
+        with self.reuse_connection() as conn:
+            query = count_v_by_label(v_attr)
+            return conn.execute(query, {"label": v_label}).scalar_one()
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def count_e(
+        self,
+        e_label: Label,
+        src_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> int:
+        # 只取一个标量, `ORM` / `Core` 模式都直接走连接
+        params = {"label": e_label, "src_label": src_label, "dst_label": dst_label}
+        with self.reuse_connection() as conn:
+            return conn.execute(count_e_by_labels(e_attr), params).scalar_one()
+
+    @override
+    @track_lru_cache_annotated
+    @lru_cache
+    def get_stats(self) -> Optional[GraphStats]:
+        # 数据库重新导入后, 指纹不符, 旧的统计信息不再使用
+        return GraphStats.load(
+            stats_file_for(self.db_url), source_fingerprint(self.db_url)
+        )
+
+
+class AsyncSQLiteStorageAdapter(ThreadOffloadedStorageAdapter):
+    """
+    异步 SQLite 存储适配器: 查询交给线程池中的 `SQLiteStorageAdapter`
+
+    - 每个线程各自复用一个会话 / 连接, 多个查询可以同时进行
+    """
+
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        immutable: bool = SQLITE_IMMUTABLE,
+        use_core_mode: bool = USE_CORE_MODE,
+    ) -> None:
+        super().__init__(SQLiteStorageAdapter(db_url, immutable, use_core_mode))
@@ -1,11 +1,32 @@
 from functools import lru_cache
-from typing import Optional
-
-from sqlmodel import Field, Relationship, Session, SQLModel, create_engine, select
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    Engine,
+    Select,
+    bindparam,
+    event,
+    make_url,
+    text,
+)
+from sqlmodel import (
+    Field,
+    Relationship,
+    Session,
+    SQLModel,
+    col,
+    create_engine,
+    select,
+)
 
 from config import (
     SIMPLE_TEST_SQL_DB_URL,
     SQLITE_ATTR_USE_FOREIGN_KEY,
+    SQLITE_CACHE_SIZE,
+    SQLITE_IMMUTABLE,
+    SQLITE_MMAP_SIZE,
     SQLITE_SCHEMA_USE_RELATIONSHIP,
 )
 from schema import PatternAttr
@@ -15,24 +36,73 @@ from utils.tracked_lru_cache import track_lru_cache_annotated
 type Attr = int | float | str
 type AttrDict = dict[str, Attr]
 
+SQLITE_IN_CHUNK_SIZE = 900
+""" `IN (...)` 子句单次绑定的参数上限 (低于 SQLite 默认的 999) """
+
+
+def chunked[T](items: Iterable[T], size: int = SQLITE_IN_CHUNK_SIZE):
+    """将 `items` 按 `size` 切块 (用于 `IN (...)` 批量查询)"""
+
+    chunk: list[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
 class BaseAttribute(SQLModel):
+    """
+    属性 (基类)
+
+    - `value` 总是保存值的字符串形式, `type` 保存值的类型名
+    - 数值另存一份到 `int_value` / `float_value`, 以便 `(key, 数值)` 复合索引支持范围查询
+    """
+
     id: Optional[int] = Field(default=None, primary_key=True)
     key: str = Field(index=True)
     value: str
     type: str
+    int_value: Optional[int] = Field(default=None)
+    float_value: Optional[float] = Field(default=None)
 
     __table_args__ = {"sqlite_autoincrement": True}
 
+    @staticmethod
+    def typed_columns(value: Attr) -> dict[str, Any]:
+        """属性值 -> 属性表中的 `value` / `type` / `int_value` / `float_value` 列"""
+
+        return {
+            "value": str(value),
+            "type": type(value).__name__,
+            "int_value": value if isinstance(value, int) else None,
+            "float_value": value if isinstance(value, float) else None,
+        }
+
+    @staticmethod
+    def to_typed_value(
+        value: str,
+        type: str,
+        int_value: Optional[int] = None,
+        float_value: Optional[float] = None,
+    ) -> Attr:
+        """由属性表中的列还原属性值 (兼容尚未回填 `数值列` 的旧数据)"""
+
+        if type == "int":
+            return int_value if int_value is not None else int(value)
+        elif type == "float":
+            return float_value if float_value is not None else float(value)
+        else:
+            return value
+
     @property
     def typed_value(self) -> Attr:
         """获取属性值"""
-        if self.type == "int":
-            return int(self.value)
-        elif self.type == "float":
-            return float(self.value)
-        else:
-            return self.value
+        return self.to_typed_value(
+            self.value, self.type, self.int_value, self.float_value
+        )
 
     def could_satisfy_pattern_attr(self, pattern_attr: PatternAttr) -> bool:
         if self.key != pattern_attr.key:
@@ -42,6 +112,33 @@ class BaseAttribute(SQLModel):
         operator = str_op_to_operator(pattern_attr.op)
         return operator(self.typed_value, pattern_attr.value)
 
+    @classmethod
+    def satisfy_pattern_attr_clause(
+        cls, pattern_attr: PatternAttr
+    ) -> ColumnElement[bool]:
+        """
+        将 `PatternAttr` 编译为 SQL 条件 (作用于属性表)
+
+        - 与 `could_satisfy_pattern_attr` 语义一致: `key` 相同, `type` 相同, 再比较值
+        - 数值直接比较 `int_value` / `float_value` (非空即意味着类型匹配),
+          这样 `(key, 数值)` 复合索引可以直接完成范围扫描
+        """
+
+        value = pattern_attr.value
+        operator = str_op_to_operator(pattern_attr.op)
+        key_clause = col(cls.key) == pattern_attr.key
+
+        if isinstance(value, int):
+            return key_clause & operator(col(cls.int_value), value)
+        elif isinstance(value, float):
+            return key_clause & operator(col(cls.float_value), value)
+        else:
+            return (
+                key_clause
+                & operator(col(cls.value), value)
+                & (col(cls.type) == type(value).__name__)
+            )
+
 
 class DB_Vertex(SQLModel, table=True):
     """顶点 (没有属性)"""
@@ -63,7 +160,7 @@ class DB_Vertex(SQLModel, table=True):
         attributes: list[Vertex_Attribute] = []
         for key, value in self._pending_attrs.items():
             attr = Vertex_Attribute(
-                vid=self.vid, key=key, value=str(value), type=type(value).__name__
+                vid=self.vid, key=key, **Vertex_Attribute.typed_columns(value)
             )
             session.add(attr)
             attributes.append(attr)
@@ -93,6 +190,23 @@ class DB_Vertex(SQLModel, table=True):
         attrs = session.exec(stmt).all()
         return {attr.key: attr.typed_value for attr in attrs} if attrs else {}
 
+    @staticmethod
+    def get_attributes_batch(
+        session: Session, vids: Iterable[str]
+    ) -> dict[str, AttrDict]:
+        """
+        批量获取所有属性值
+
+        - 按 `IN (...)` 分块, 一次性查出整个结果集的属性, 避免 `N+1` 查询
+        - 返回 { vid -> AttrDict }, 没有属性的点对应空字典
+        """
+
+        result: dict[str, AttrDict] = {vid: {} for vid in vids}
+        for chunk in chunked(result):
+            for attr in session.exec(SELECT_V_ATTRS_BY_VIDS, params={"ids": chunk}):
+                result[attr.vid][attr.key] = attr.typed_value
+        return result
+
     def __hash__(self) -> int:
         return hash(self.vid)
 
@@ -102,8 +216,8 @@ class DB_Edge(SQLModel, table=True):
 
     eid: str = Field(primary_key=True)
     label: str = Field(index=True)
-    src_vid: str = Field(index=True)
-    dst_vid: str = Field(index=True)
+    src_vid: str  # 由 `ADJACENCY_INDEXES` 覆盖
+    dst_vid: str  # 由 `ADJACENCY_INDEXES` 覆盖
 
     def __init__(
         self,
@@ -125,7 +239,7 @@ class DB_Edge(SQLModel, table=True):
 
         for key, value in self._pending_attrs.items():
             attr = Edge_Attribute(
-                eid=self.eid, key=key, value=str(value), type=type(value).__name__
+                eid=self.eid, key=key, **Edge_Attribute.typed_columns(value)
             )
             session.add(attr)
             attributes.append(attr)
@@ -155,6 +269,23 @@ class DB_Edge(SQLModel, table=True):
         attrs = session.exec(stmt).all()
         return {attr.key: attr.typed_value for attr in attrs} if attrs else {}
 
+    @staticmethod
+    def get_attributes_batch(
+        session: Session, eids: Iterable[str]
+    ) -> dict[str, AttrDict]:
+        """
+        批量获取所有属性值
+
+        - 按 `IN (...)` 分块, 一次性查出整个结果集的属性, 避免 `N+1` 查询
+        - 返回 { eid -> AttrDict }, 没有属性的边对应空字典
+        """
+
+        result: dict[str, AttrDict] = {eid: {} for eid in eids}
+        for chunk in chunked(result):
+            for attr in session.exec(SELECT_E_ATTRS_BY_EIDS, params={"ids": chunk}):
+                result[attr.eid][attr.key] = attr.typed_value
+        return result
+
     def __hash__(self) -> int:
         return hash(self.eid)
 
@@ -170,6 +301,11 @@ class Vertex_Attribute(BaseAttribute, table=True):
         if SQLITE_SCHEMA_USE_RELATIONSHIP:
             self.vertex: DB_Vertex = Relationship(back_populates="attributes")
 
+    @classmethod
+    def select_vids_satisfying(cls, pattern_attr: PatternAttr):
+        """子查询: 满足 `pattern_attr` 的所有 `vid`"""
+        return select(cls.vid).where(cls.satisfy_pattern_attr_clause(pattern_attr))
+
     def __hash__(self) -> int:
         vid_hashed = hash(self.vid)
         return vid_hashed ^ hash(self.id) if self.id else vid_hashed
@@ -186,14 +322,158 @@ class Edge_Attribute(BaseAttribute, table=True):
         if SQLITE_SCHEMA_USE_RELATIONSHIP:
             self.edge: DB_Edge = Relationship(back_populates="attributes")
 
+    @classmethod
+    def select_eids_satisfying(cls, pattern_attr: PatternAttr):
+        """子查询: 满足 `pattern_attr` 的所有 `eid`"""
+        return select(cls.eid).where(cls.satisfy_pattern_attr_clause(pattern_attr))
+
     def __hash__(self) -> int:
         eid_hashed = hash(self.eid)
         return eid_hashed ^ hash(self.id) if self.id else eid_hashed
 
 
+SELECT_V_ATTRS_BY_VIDS = select(Vertex_Attribute).where(
+    col(Vertex_Attribute.vid).in_(bindparam("ids", expanding=True))
+)
+""" 预编译语句: 批量加载点属性 """
+
+SELECT_E_ATTRS_BY_EIDS = select(Edge_Attribute).where(
+    col(Edge_Attribute.eid).in_(bindparam("ids", expanding=True))
+)
+""" 预编译语句: 批量加载边属性 """
+
+ATTR_COLUMNS = ("key", "value", "type", "int_value", "float_value")
+""" `Core` 模式下从属性表读取的列 (顺序即 `to_typed_value` 之前的元组布局) """
+
+CORE_SELECT_V_ATTRS_BY_VIDS = select(
+    col(Vertex_Attribute.vid),
+    *(col(getattr(Vertex_Attribute, c)) for c in ATTR_COLUMNS),
+).where(col(Vertex_Attribute.vid).in_(bindparam("ids", expanding=True)))
+""" 预编译语句 (`Core`): 批量加载点属性, 返回元组 """
+
+CORE_SELECT_E_ATTRS_BY_EIDS = select(
+    col(Edge_Attribute.eid), *(col(getattr(Edge_Attribute, c)) for c in ATTR_COLUMNS)
+).where(col(Edge_Attribute.eid).in_(bindparam("ids", expanding=True)))
+""" 预编译语句 (`Core`): 批量加载边属性, 返回元组 """
+
+
+def get_attributes_batch_core(
+    conn: Connection, query: Select, ids: Iterable[str]
+) -> dict[str, AttrDict]:
+    """
+    `Core` 模式下批量获取所有属性值 (`DB_Vertex / DB_Edge.get_attributes_batch` 的元组版本)
+
+    - `query` 为 `CORE_SELECT_V_ATTRS_BY_VIDS` 或 `CORE_SELECT_E_ATTRS_BY_EIDS`
+    - 直接读取元组, 不构造 ORM 实例
+    """
+
+    to_typed_value = BaseAttribute.to_typed_value
+    result: dict[str, AttrDict] = {id: {} for id in ids}
+    for chunk in chunked(result):
+        for owner, key, value, type, int_value, float_value in conn.execute(
+            query, {"ids": chunk}
+        ):
+            result[owner][key] = to_typed_value(value, type, int_value, float_value)
+    return result
+
+
+ATTRIBUTE_TABLES = {"vertex_attribute": "vid", "edge_attribute": "eid"}
+""" 属性表 -> 所属实体的 id 列 """
+
+ADJACENCY_INDEXES: dict[str, tuple[str, tuple[str, ...]]] = {
+    "ix_db_edge_src_adj": ("db_edge", ("src_vid", "label", "dst_vid", "eid")),
+    "ix_db_edge_dst_adj": ("db_edge", ("dst_vid", "label", "src_vid", "eid")),
+}
+"""
+邻接索引 (正向 / 反向)
+- 对应 `(label, src_vid)` / `(label, dst_vid)` 上的邻居查询, 两个等值列打头
+- 包含边的全部列, 邻居查询只需扫描索引 (覆盖索引), 不必回表
+"""
+
+ATTRIBUTE_INDEXES: dict[str, tuple[str, tuple[str, ...]]] = {
+    f"ix_{table}_{'_'.join(columns)}": (table, columns)
+    for table, owner in ATTRIBUTE_TABLES.items()
+    for columns in (
+        ("key", "int_value", owner),
+        ("key", "float_value", owner),
+        ("key", "value", "type", owner),
+    )
+}
+"""
+属性索引
+- 末尾带上 `vid` / `eid`, 谓词子查询可以只扫描索引 (覆盖索引)
+"""
+
+QUERY_INDEXES = ADJACENCY_INDEXES | ATTRIBUTE_INDEXES
+"""
+查询用的复合索引
+- { 索引名 -> (表名, 列) }
+- 不放进 `__table_args__`, 而是在 `批量导入结束后` 统一创建, 避免导入时反复维护索引
+"""
+
+LEGACY_INDEXES = ("ix_db_edge_src_vid", "ix_db_edge_dst_vid")
+""" 旧版本 `DB_Edge` 上的单列索引, 已被 `ADJACENCY_INDEXES` 取代 """
+
+
+def create_query_indexes(engine: Engine):
+    """创建 `QUERY_INDEXES` 中的全部索引 (已存在则跳过)"""
+
+    with engine.begin() as conn:
+        for name, (table, columns) in QUERY_INDEXES.items():
+            conn.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                )
+            )
+        for name in LEGACY_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text("ANALYZE"))
+
+
+def migrate_db(engine: Engine):
+    """
+    迁移旧版本的 `.db` 文件
+
+    - 为属性表补上 `int_value` / `float_value` 列, 并从 `value` 回填
+    - 补建 `QUERY_INDEXES` (邻接索引 + 属性索引), 并删除被取代的 `LEGACY_INDEXES`
+    """
+
+    with engine.begin() as conn:
+        for table in ATTRIBUTE_TABLES:
+            columns = {
+                row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))
+            }
+            for column, sql_type, attr_type in (
+                ("int_value", "INTEGER", "int"),
+                ("float_value", "FLOAT", "float"),
+            ):
+                if column in columns:
+                    continue
+                conn.execute(
+                    text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+                )
+                conn.execute(
+                    text(
+                        f"UPDATE {table} SET {column} = CAST(value AS {sql_type}) "
+                        f"WHERE type = '{attr_type}'"
+                    )
+                )
+
+        existing_indexes = {
+            row[0]
+            for row in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index'")
+            )
+        }
+
+    if not existing_indexes.issuperset(QUERY_INDEXES):
+        create_query_indexes(engine)
+
+
 def init_db(db_url: Optional[str] = None, echo: bool = False):
     engine = create_engine(SIMPLE_TEST_SQL_DB_URL if not db_url else db_url, echo=echo)
     SQLModel.metadata.create_all(engine)
+    migrate_db(engine)
     return engine
 
 
@@ -202,3 +482,41 @@ def init_db_with_clear(db_url: Optional[str] = None, echo: bool = False):
     SQLModel.metadata.drop_all(engine)
     SQLModel.metadata.create_all(engine)
     return engine
+
+
+def init_read_only_db(
+    db_url: Optional[str] = None,
+    immutable: bool = SQLITE_IMMUTABLE,
+    echo: bool = False,
+):
+    """
+    初始化 `查询期` 使用的只读引擎
+
+    - 先经由 `init_db` 完成建表与迁移, 之后的连接一律只读
+    - 每个新连接都会设置读优化的 `PRAGMA` (`query_only` / `mmap_size` / `cache_size`)
+    - `immutable=True` 时以 `file:...?immutable=1` 的 URI 打开, SQLite 不再加锁也不再检查文件变更
+    """
+
+    db_url = SIMPLE_TEST_SQL_DB_URL if not db_url else db_url
+    init_db(db_url).dispose()
+
+    url = make_url(db_url)
+    if immutable and url.database and url.database != ":memory:":
+        url = url.set(
+            database=f"file:{url.database}",
+            query={**url.query, "mode": "ro", "immutable": "1", "uri": "true"},
+        )
+    engine = create_engine(url, echo=echo)
+    event.listen(engine, "connect", set_read_pragmas)
+    return engine
+
+
+def set_read_pragmas(dbapi_connection: Any, _connection_record: Any):
+    """`connect` 事件: 为新连接设置读优化的 `PRAGMA`"""
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
@@ -0,0 +1,300 @@
+"""
+图统计信息
+
+- 计划优化器 (`planner.cost`) 使用点数 / 边数, 以及属性的取值分布 (估计带谓词的规模);
+  度数分布只记录在目录中, 暂无使用者
+- 由导入脚本或 `python -m storage.csr.stats <sqlite_db_url | ldbc_bi_csv_dir> [out]` 生成,
+  以 JSON 存放在数据库旁 (`<db 文件>.stats.json`)
+- 存储适配器通过 `StorageAdapter.get_stats()` 提供
+- 文件记录生成时数据源的指纹 (`storage.fingerprint`), 数据库重新导入后视为过期
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import make_url
+
+from schema import Label, Op, PatternAttr
+
+type Attr = int | float | str
+
+STATS_VERSION = 1
+""" 统计信息格式版本 (不兼容时视为不存在) """
+
+
+def stats_file_for(db_url: str) -> Path:
+    """SQLite 数据库对应的统计信息文件 (`<db 文件>.stats.json`)"""
+
+    db_path = make_url(db_url).database
+    if not db_path:
+        raise ValueError(f"Cannot derive stats file from '{db_url}'.")
+    return Path(f"{db_path}.stats.json")
+
+
+@dataclass
+class DegreeStats:
+    """度数分布 (统计范围为该标签的全部点, 包括度数为 0 的点)"""
+
+    avg: float
+    max: int
+    p50: float
+    p90: float
+    p99: float
+
+
+@dataclass
+class EdgeStats:
+    """`(src_label) -[label]-> (dst_label)` 的边数与出 / 入度分布"""
+
+    label: Label
+    src_label: Label
+    dst_label: Label
+    count: int
+    out_degree: DegreeStats
+    in_degree: DegreeStats
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]):
+        return cls(
+            **{
+                **d,
+                "out_degree": DegreeStats(**d["out_degree"]),
+                "in_degree": DegreeStats(**d["in_degree"]),
+            }
+        )
+
+
+@dataclass
+class AttrStats:
+    """
+    某个标签下, 同名同类型属性的取值分布
+
+    - `count`: 有该属性的点 / 边数; `distinct`: 不同取值数
+    - `histogram`:
+        - 数值: 等深直方图, `[(桶上界, 桶内个数), ...]`, 第一个桶的下界为 `min`
+        - 字符串: 最常见的取值, `[(取值, 个数), ...]`, 按个数降序
+    """
+
+    label: Label
+    key: str
+    type: str
+    count: int
+    distinct: int
+    min: Optional[Attr] = None
+    max: Optional[Attr] = None
+    histogram: list[tuple[Attr, int]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]):
+        return cls(
+            **{**d, "histogram": [(bound, cnt) for bound, cnt in d["histogram"]]}
+        )
+
+    def estimate(self, op: Op, value: Attr) -> float:
+        """估计满足 `属性 op value` 的点 / 边数 (取值类型与 `type` 不符时为 0)"""
+
+        if not self.count or type(value).__name__ != self.type:
+            return 0.0
+        eq = self.estimate_eq(value)
+        match op:
+            case Op.Eq:
+                return eq
+            case Op.Ne:
+                return self.count - eq
+            case Op.Le:
+                return self.estimate_le(value)
+            case Op.Lt:
+                return max(self.estimate_le(value) - eq, 0.0)
+            case Op.Gt:
+                return self.count - self.estimate_le(value)
+            case Op.Ge:
+                return self.count - max(self.estimate_le(value) - eq, 0.0)
+
+    def estimate_eq(self, value: Attr) -> float:
+        """
+        取值恰为 `value` 的个数
+
+        - 整数: 按所在桶内的不同取值均分; 桶内的不同取值数按全局比例估计,
+          且不多于桶覆盖的整数个数 (重复很多的取值独占一个窄桶)
+        - 浮点数: 按不同取值均分
+        - 字符串: 最常见的取值直接查表, 其余按不同取值均分
+        """
+
+        assert self.min is not None and self.max is not None
+        if value < self.min or value > self.max:
+            return 0.0
+        if self.type == "int":
+            _, cnt, lower, upper, is_last = self.bucket_of(value)
+            width = upper - lower + is_last
+            return cnt / max(min(width, self.distinct * cnt / self.count), 1)
+        if self.type == "float":
+            return self.count / self.distinct
+
+        listed = dict(self.histogram)
+        if value in listed:
+            return float(listed[value])
+        rest_count = self.count - sum(listed.values())
+        rest_distinct = self.distinct - len(listed)
+        return rest_count / rest_distinct if rest_distinct > 0 else 0.0
+
+    def estimate_le(self, value: Attr) -> float:
+        """
+        取值不大于 `value` 的个数
+
+        - 数值: 累加之前的桶, 所在的桶内按线性插值
+        - 字符串: 最常见的取值直接累加, 其余按同样的比例估计
+        """
+
+        assert self.min is not None and self.max is not None
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return float(self.count)
+
+        if self.type == "str":
+            listed = sum(cnt for _, cnt in self.histogram)
+            satisfied = sum(cnt for v, cnt in self.histogram if v <= value)
+            ratio = satisfied / listed if listed else 0.5
+            return satisfied + (self.count - listed) * ratio
+
+        before, cnt, lower, upper, is_last = self.bucket_of(value)
+        if self.type == "int":
+            ratio = (value - lower + 1) / max(upper - lower + is_last, 1)
+        else:
+            ratio = (value - lower) / (upper - lower) if upper > lower else 1.0
+        return before + cnt * min(ratio, 1.0)
+
+    def bucket_of(self, value: Any) -> tuple[int, int, Any, Any, bool]:
+        """
+        数值所在的桶: (之前各桶的个数, 桶内个数, 下界, 上界, 是否为最后一个桶)
+
+        - 桶为左闭右开区间, 最后一个桶包含上界 (与 `numpy.histogram` 一致)
+        """
+
+        before, lower = 0, self.min
+        for idx, (upper, cnt) in enumerate(self.histogram):
+            is_last = idx == len(self.histogram) - 1
+            if value < upper or is_last:
+                return before, cnt, lower, upper, is_last
+            before, lower = before + cnt, upper
+        raise ValueError(f"Attribute {self.key!r} of {self.label!r} has no histogram.")
+
+
+@dataclass
+class GraphStats:
+    """统计信息目录"""
+
+    vertex_counts: dict[Label, int]
+    edges: list[EdgeStats]
+    v_attrs: list[AttrStats]
+    e_attrs: list[AttrStats]
+    source_fingerprint: Optional[str] = None
+    """ 生成时数据源的指纹 (由内存中的图直接统计时为 `None`) """
+
+    @cached_property
+    def edge_index(self) -> dict[tuple[Label, Label, Label], EdgeStats]:
+        return {(e.label, e.src_label, e.dst_label): e for e in self.edges}
+
+    def vertex_count(self, v_label: Label) -> int:
+        return self.vertex_counts.get(v_label, 0)
+
+    def edge_stats(
+        self, e_label: Label, src_label: Label, dst_label: Label
+    ) -> Optional[EdgeStats]:
+        return self.edge_index.get((e_label, src_label, dst_label))
+
+    def edge_count(self, e_label: Label, src_label: Label, dst_label: Label) -> int:
+        stats = self.edge_stats(e_label, src_label, dst_label)
+        return stats.count if stats else 0
+
+    def v_attr_stats(self, v_label: Label, key: str) -> list[AttrStats]:
+        return [s for s in self.v_attrs if s.label == v_label and s.key == key]
+
+    def e_attr_stats(self, e_label: Label, key: str) -> list[AttrStats]:
+        return [s for s in self.e_attrs if s.label == e_label and s.key == key]
+
+    """ ========== 带谓词的规模估计 (计划优化器使用) ========== """
+
+    def estimate_vertex_count(
+        self, v_label: Label, v_attr: Optional[PatternAttr] = None
+    ) -> float:
+        """满足 `label` (以及 `attr`) 的顶点数"""
+
+        if not v_attr:
+            return float(self.vertex_count(v_label))
+        return sum(
+            stats.estimate(v_attr.op, v_attr.value)
+            for stats in self.v_attr_stats(v_label, v_attr.key)
+        )
+
+    def estimate_edge_count(
+        self,
+        e_label: Label,
+        src_label: Label,
+        dst_label: Label,
+        e_attr: Optional[PatternAttr] = None,
+    ) -> float:
+        """
+        `(src_label) -[e_label]-> (dst_label)` 中满足 `attr` 的边数
+
+        - 边属性只按边的标签统计: 假设谓词与端点标签无关, 按同样的比例折算
+        """
+
+        count = self.edge_count(e_label, src_label, dst_label)
+        if not e_attr or not count:
+            return float(count)
+        total = sum(e.count for e in self.edges if e.label == e_label)
+        satisfied = sum(
+            stats.estimate(e_attr.op, e_attr.value)
+            for stats in self.e_attr_stats(e_label, e_attr.key)
+        )
+        return count * min(satisfied / total, 1.0)
+
+    """ ========== 读写 ========== """
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": STATS_VERSION,
+            "source_fingerprint": self.source_fingerprint,
+            "vertex_counts": self.vertex_counts,
+            "edges": [asdict(e) for e in self.edges],
+            "v_attrs": [asdict(s) for s in self.v_attrs],
+            "e_attrs": [asdict(s) for s in self.e_attrs],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]):
+        return cls(
+            vertex_counts=d["vertex_counts"],
+            edges=[EdgeStats.from_dict(e) for e in d["edges"]],
+            v_attrs=[AttrStats.from_dict(s) for s in d["v_attrs"]],
+            e_attrs=[AttrStats.from_dict(s) for s in d["e_attrs"]],
+            source_fingerprint=d.get("source_fingerprint"),
+        )
+
+    def save(self, path: Path):
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(
+        cls, path: Path, fingerprint: Optional[str] = None
+    ) -> Optional["GraphStats"]:
+        """
+        读取统计信息 (文件不存在, 版本不符, 或已过期时返回 `None`)
+
+        - `fingerprint`: 数据源当前的指纹; 给定时, 与文件中记录的指纹不符即视为过期
+        """
+
+        if not path.exists():
+            return None
+        d = json.loads(path.read_text())
+        if d.get("version") != STATS_VERSION:
+            return None
+        if fingerprint is not None and d.get("source_fingerprint") != fingerprint:
+            return None
+        return cls.from_dict(d)
@@ -1,18 +1,56 @@
+from functools import cache
+
 from config import LDBC_SNB_INTERACTIVE_SQL_DB_URL, SCRIPT_DIR, WHICH_DB
 from executor import ExecEngine
+from storage.abc import StorageAdapter
+from storage.csr import CSRStorageAdapter
+from storage.csr.snapshot import open_or_build_snapshot, snapshot_dir_for
 from storage.neo4j import Neo4jStorageAdapter
 from storage.sqlite import SQLiteStorageAdapter
 from utils.tracked_lru_cache import clear_all_tracked_caches
 
 PLAN_DIR = SCRIPT_DIR / "resources" / "plan"
+QUERY_DIR = SCRIPT_DIR / "resources" / "queries"
+
+
+@cache
+def csr_storage_adapter():
+    # CSR 图只载入一次, 各个查询共用; 快照保留到下次运行, 之后直接内存映射
+    # (数据库重新导入后, 指纹不符, 快照自动重建)
+    return CSRStorageAdapter(
+        open_or_build_snapshot(
+            snapshot_dir_for(LDBC_SNB_INTERACTIVE_SQL_DB_URL),
+            LDBC_SNB_INTERACTIVE_SQL_DB_URL,
+        )
+    )
+
+
+def storage_adapter() -> StorageAdapter:
+    match WHICH_DB:
+        case "SQLite":
+            return SQLiteStorageAdapter(db_url=LDBC_SNB_INTERACTIVE_SQL_DB_URL)
+        case "CSR":
+            return csr_storage_adapter()
+        case "Neo4j":
+            return Neo4jStorageAdapter()
 
 
 def exec(plan_name: str):
     result = ExecEngine.from_json(
         (PLAN_DIR / plan_name).read_text(),
-        storage_adapter=SQLiteStorageAdapter(db_url=LDBC_SNB_INTERACTIVE_SQL_DB_URL)
-        if WHICH_DB == "SQLite"
-        else Neo4jStorageAdapter(),
+        storage_adapter=storage_adapter(),
+    ).exec()
+
+    ExecEngine.project_all_ids(result)
+    print(f"\nCOUNT(result) = {len(result)}\n")
+    clear_all_tracked_caches()
+
+
+def exec_query(query_name: str):
+    # 直接由模式文件编译计划, 不经过外部工具链
+    result = ExecEngine.from_query(
+        (QUERY_DIR / query_name).read_text(),
+        storage_adapter=storage_adapter(),
     ).exec()
 
     ExecEngine.project_all_ids(result)
@@ -53,3 +91,8 @@ def test_bi_11_on_sf01():
 def test_bi_14_on_sf01():
     plan_name = "ldbc-bi-14.json"
     exec(plan_name)
+
+
+def test_compiled_bi_6_on_sf01():
+    query_name = "ldbc-bi-6.txt"
+    exec_query(query_name)
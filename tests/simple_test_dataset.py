@@ -1,16 +1,68 @@
-from config import SCRIPT_DIR
+import asyncio
+from dataclasses import replace
+from typing import override
+
+import pytest
+
+import config
+import executor
+from config import SCRIPT_DIR, SIMPLE_TEST_SQL_DB_URL
 from executor import ExecEngine
+from executor.aio import AsyncExecEngine
+from executor.scheduler import InstrDag
+from planner import PlanOptimizer
+from planner.compiler import compile_plan
+from planner.cost import CostModel
+from schema import InstructionType, PatternEdge, PlanData
+from schema.basic import VarPrefix
 from sqlite_dg_builder.bi_6 import BI6Builder
 from sqlite_dg_builder.ic_4 import IC4Builder
 from sqlite_dg_builder.ic_5 import IC5Builder
 from sqlite_dg_builder.more_triangles import MoreTriangleDgBuilder
 from sqlite_dg_builder.triangles import TriangleDgBuilder
-from storage.sqlite import SQLiteStorageAdapter
+from storage.csr import CSRStorageAdapter
+from storage.csr.snapshot import open_or_build_snapshot
+from storage.csr.stats import write_stats_for
+from storage.sqlite import AsyncSQLiteStorageAdapter, SQLiteStorageAdapter
 from utils.tracked_lru_cache import clear_all_tracked_caches
 
 PLAN_DIR = SCRIPT_DIR / "resources" / "plan"
 
 
+class FrontierCountingStorageAdapter(SQLiteStorageAdapter):
+    """记录 GetAdj 查询的边缘点总数"""
+
+    n_frontier_vids = 0
+
+    @override
+    def load_e_by_src_vids_to(self, src_vids, *args, **kwargs):
+        src_vids = list(src_vids)
+        self.n_frontier_vids += len(src_vids)
+        return super().load_e_by_src_vids_to(src_vids, *args, **kwargs)
+
+    @override
+    def load_e_by_dst_vids_from(self, dst_vids, *args, **kwargs):
+        dst_vids = list(dst_vids)
+        self.n_frontier_vids += len(dst_vids)
+        return super().load_e_by_dst_vids_from(dst_vids, *args, **kwargs)
+
+
+class VertexLoadCountingStorageAdapter(SQLiteStorageAdapter):
+    """记录加载点的查询次数"""
+
+    n_vertex_loads = 0
+
+    @override
+    def load_v(self, *args, **kwargs):
+        self.n_vertex_loads += 1
+        return super().load_v(*args, **kwargs)
+
+    @override
+    def load_v_with_attr(self, *args, **kwargs):
+        self.n_vertex_loads += 1
+        return super().load_v_with_attr(*args, **kwargs)
+
+
 def test_triangle_forest():
     TriangleDgBuilder().build()
     result = ExecEngine.from_json(
@@ -66,3 +118,226 @@ def test_minimized_bi_6():
     ExecEngine.project_all_ids(result)
     print(f"\nCOUNT(result) = {len(result)}\n")
     clear_all_tracked_caches()
+
+
+def test_minimized_bi_6_first_match():
+    BI6Builder().build()
+    plan_json = (PLAN_DIR / "ldbc-bi-6.json").read_text()
+    full_adapter = FrontierCountingStorageAdapter()
+    all_results = ExecEngine.from_json(plan_json, full_adapter).exec()
+    clear_all_tracked_caches()
+
+    # 只取第一个匹配: 首个 Init (Tag) 只有一个点, 流水线执行在分片内部即停下
+    adapter = FrontierCountingStorageAdapter()
+    result = list(ExecEngine.from_json(plan_json, adapter).iter_matches(limit=1))
+
+    ExecEngine.project_all_ids(result)
+    print(f"\nCOUNT(result) = {len(result)}\n")
+    assert len(result) == 1 < len(all_results)
+    assert adapter.n_frontier_vids < full_adapter.n_frontier_vids
+    clear_all_tracked_caches()
+
+
+def test_minimized_ic_4_count():
+    IC4Builder().build()
+    plan_json = (PLAN_DIR / "ldbc-ic-4-single-directed-knows.json").read_text()
+    # 计数模式不构造匹配结果, 数目应与完整执行一致
+    count = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).count()
+    clear_all_tracked_caches()
+    result = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+
+    print(f"\nCOUNT(result) = {count}\n")
+    assert count == len(result)
+    clear_all_tracked_caches()
+
+
+def test_more_triangle_forest_count(monkeypatch):
+    MoreTriangleDgBuilder().build()
+    plan_json = (PLAN_DIR / "forest.json").read_text()
+    result = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+    clear_all_tracked_caches()
+
+    # 森林: 各连通分量的计数相乘; 每个分片只含一个点, 各分片共用候选点集索引
+    monkeypatch.setattr(executor, "SHARD_BATCH_SIZE", 1)
+    engine = ExecEngine.from_json(plan_json, SQLiteStorageAdapter())
+    count = engine.count()
+
+    print(f"\nCOUNT(result) = {count}\n")
+    assert count == len(result) > 0
+    assert len(engine.matching_ctx.candidate_indexes) == len(
+        {
+            (pattern_v.label, pattern_v.attr)
+            for instr in engine.plan_data.instructions
+            if instr.type == InstructionType.Intersect
+            and (pattern_v := engine.plan_data.pattern_vs[instr.vid])
+        }
+    )
+    clear_all_tracked_caches()
+
+
+def test_minimized_ic_5_parallel():
+    IC5Builder().build()
+    plan_json = (PLAN_DIR / "ldbc-ic-5-single-directed-knows.json").read_text()
+    result = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+    clear_all_tracked_caches()
+
+    # 按首个 Init 的点分片, 在工作进程中执行 (每个进程各自构造存储适配器)
+    engine = ExecEngine.from_json(plan_json, SQLiteStorageAdapter())
+    parallel_result = engine.exec_parallel(SQLiteStorageAdapter, max_workers=2)
+    count = engine.count_parallel(SQLiteStorageAdapter, max_workers=2)
+
+    print(f"\nCOUNT(result) = {count}\n")
+    assert len(parallel_result) == count == len(result)
+    clear_all_tracked_caches()
+
+
+def test_minimized_ic_5_async():
+    IC5Builder().build()
+    plan_json = (PLAN_DIR / "ldbc-ic-5-single-directed-knows.json").read_text()
+    result = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+    clear_all_tracked_caches()
+
+    # 异步执行: 边缘点逐个切块, 各块的邻接边同时查询
+    engine = AsyncExecEngine.from_json(
+        plan_json, AsyncSQLiteStorageAdapter(), SQLiteStorageAdapter()
+    )
+    engine.frontier_chunk_size = 1
+    async_result = asyncio.run(engine.exec())
+    count = asyncio.run(engine.count())
+
+    # 计数与执行共用同一组候选点集索引, 每个 (标签, 属性) 只构造一次
+    print(f"\nCOUNT(result) = {len(async_result)}\n")
+    assert len(async_result) == count == len(result)
+    assert len(engine.matching_ctx.candidate_indexes) == len(
+        {
+            (pattern_v.label, pattern_v.attr)
+            for instr in engine.plan_data.instructions
+            if instr.type == InstructionType.Intersect
+            and instr.is_single_op()
+            and (pattern_v := engine.plan_data.pattern_vs[instr.vid])
+        }
+    )
+    clear_all_tracked_caches()
+
+
+def test_more_triangle_forest_scheduled(monkeypatch):
+    MoreTriangleDgBuilder().build()
+    plan_json = (PLAN_DIR / "forest.json").read_text()
+    result = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+    clear_all_tracked_caches()
+
+    # 按 `depend_on` 调度: 森林的两棵树同时执行
+    monkeypatch.setattr(executor, "INSTR_SCHEDULER_WORKERS", 2)
+    scheduled = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+
+    print(f"\nCOUNT(result) = {len(scheduled)}\n")
+    assert [g.v_entities for g in scheduled] == [g.v_entities for g in result]
+    clear_all_tracked_caches()
+
+
+def test_minimized_ic_5_prefetch_chunked(monkeypatch):
+    IC5Builder().build()
+    plan_json = (PLAN_DIR / "ldbc-ic-5-single-directed-knows.json").read_text()
+    result = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+    clear_all_tracked_caches()
+
+    # GetAdj 预取: 边缘点逐个切块, 各块的邻接边在线程池中加载
+    monkeypatch.setattr(config, "GETADJ_PREFETCH_WORKERS", 2)
+    monkeypatch.setattr(config, "GETADJ_PREFETCH_CHUNK_SIZE", 1)
+    prefetched = ExecEngine.from_json(plan_json, SQLiteStorageAdapter()).exec()
+
+    print(f"\nCOUNT(result) = {len(prefetched)}\n")
+    assert [g.v_entities for g in prefetched] == [g.v_entities for g in result]
+    assert [g.e_entities for g in prefetched] == [g.e_entities for g in result]
+    clear_all_tracked_caches()
+
+
+def test_snapshot_rebuilt_after_reimport(tmp_path):
+    snapshot_dir = tmp_path / "graph.csr"
+    TriangleDgBuilder().build()
+    graph = open_or_build_snapshot(snapshot_dir, SIMPLE_TEST_SQL_DB_URL)
+    n_triangle_vs = len(graph.vids)
+
+    # 重新导入后, 快照记录的指纹与数据库不符, 自动重建
+    MoreTriangleDgBuilder().build()
+    graph = open_or_build_snapshot(snapshot_dir, SIMPLE_TEST_SQL_DB_URL)
+    assert len(graph.vids) == len(CSRStorageAdapter.from_sqlite().graph.vids)
+    assert len(graph.vids) != n_triangle_vs
+
+
+def test_self_loop_pattern_keeps_plan():
+    query = "2 2 0 0\n\nu Person\nv Person\n\na u v knows\nb u u knows\n"
+    with pytest.raises(ValueError):
+        compile_plan(query)
+
+    # 优化器不为自环生成指令, 保留计划原有的指令
+    plan_data = PlanData.from_plan_dict(compile_plan(query.replace("b u u", "b u v")))
+    plan_data.pattern_es["b"] = PatternEdge("b", "knows", "u", "u")
+    assert PlanOptimizer(SQLiteStorageAdapter()).optimize(plan_data) is plan_data
+
+
+def test_stats_ignored_after_reimport():
+    TriangleDgBuilder().build()
+    stats_file = write_stats_for(SIMPLE_TEST_SQL_DB_URL)
+    assert SQLiteStorageAdapter().get_stats() is not None
+    clear_all_tracked_caches()
+
+    # 重新导入后, 统计信息记录的指纹与数据库不符, 视为不存在
+    MoreTriangleDgBuilder().build()
+    assert SQLiteStorageAdapter().get_stats() is None
+    stats_file.unlink()
+    clear_all_tracked_caches()
+
+
+def test_scheduler_rejects_shared_a_group():
+    plan_data = ExecEngine.from_json(
+        (PLAN_DIR / "forest.json").read_text(), SQLiteStorageAdapter()
+    ).plan_data
+    instructions = plan_data.instructions
+    InstrDag(instructions)
+
+    # 两条 Intersect 弹出同一 A 桶中同一目标点的分组: 并发执行时会相互争抢
+    i, instr = next(
+        (i, instr)
+        for i, instr in enumerate(instructions)
+        if instr.type == InstructionType.Intersect and instr.single_op
+        if instr.single_op.startswith(VarPrefix.DbQueryTarget)
+    )
+    duplicated = replace(instr, target_var=f"{instr.target_var}'")
+    with pytest.raises(ValueError, match="consumed by more than one"):
+        InstrDag([*instructions[: i + 1], duplicated, *instructions[i + 1 :]])
+    clear_all_tracked_caches()
+
+
+def test_optimizer_counts_without_loading():
+    IC4Builder().build()
+    storage_adapter = VertexLoadCountingStorageAdapter()
+    plan_data = ExecEngine.from_json(
+        (PLAN_DIR / "ldbc-ic-4-single-directed-knows.json").read_text(),
+        storage_adapter,
+    ).plan_data
+
+    # 没有统计信息目录时, 点数由聚合查询得到, 不加载任何点
+    assert storage_adapter.get_stats() is None
+    PlanOptimizer(storage_adapter).optimize(plan_data)
+    assert storage_adapter.n_vertex_loads == 0
+    clear_all_tracked_caches()
+
+
+def test_cost_model_estimates_predicates_from_stats():
+    IC4Builder().build()
+    stats_file = write_stats_for(SIMPLE_TEST_SQL_DB_URL)
+    storage_adapter = SQLiteStorageAdapter()
+    plan_data = ExecEngine.from_json(
+        (PLAN_DIR / "ldbc-ic-4-single-directed-knows.json").read_text(),
+        storage_adapter,
+    ).plan_data
+
+    # 有统计信息目录时, 带谓词的候选点数由属性的取值分布估计, 不再向存储层查询
+    model = CostModel(plan_data.pattern_vs, plan_data.pattern_es, storage_adapter)
+    v_cards = model.v_cards
+    assert storage_adapter.count_v.cache_info().currsize == 0
+    for vid, pattern_v in plan_data.pattern_vs.items():
+        assert v_cards[vid] == storage_adapter.count_v(pattern_v.label, pattern_v.attr)
+    stats_file.unlink()
+    clear_all_tracked_caches()
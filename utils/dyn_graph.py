@@ -1,5 +1,5 @@
-from dataclasses import dataclass, field
-from typing import Any
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable
 
 from schema import DataEdge, DataVertex, EdgeBase, Eid, VertexBase, Vid
 
@@ -288,6 +288,44 @@ class DynGraph[VType: VertexBase = DataVertex, EType: EdgeBase = DataEdge]:
 
         return set(self.get_e_from_eid(eid) for eid in eids)
 
+    def remap_ids(
+        self, vid_map: Callable[[Vid], Vid], eid_map: Callable[[Eid], Eid]
+    ) -> "DynGraph[VType, EType]":
+        """重新映射所有 `vid` / `eid` (例如: 执行器内部的稠密整数 id -> 字符串 id)"""
+
+        return DynGraph(
+            v_entities={
+                vid_map(vid): replace(v, vid=vid_map(vid))
+                for vid, v in self.v_entities.items()
+            },
+            e_entities={
+                eid_map(eid): replace(
+                    e,
+                    eid=eid_map(eid),
+                    src_vid=vid_map(e.src_vid),
+                    dst_vid=vid_map(e.dst_vid),
+                )
+                for eid, e in self.e_entities.items()
+            },
+            v_2_pattern={vid_map(vid): pat for vid, pat in self.v_2_pattern.items()},
+            pattern_2_vs={
+                pat: {vid_map(vid) for vid in vs}
+                for pat, vs in self.pattern_2_vs.items()
+            },
+            e_2_pattern={eid_map(eid): pat for eid, pat in self.e_2_pattern.items()},
+            pattern_2_es={
+                pat: {eid_map(eid) for eid in es}
+                for pat, es in self.pattern_2_es.items()
+            },
+            adj_table={
+                vid_map(vid): VNode(
+                    e_in={eid_map(eid) for eid in v_node.e_in},
+                    e_out={eid_map(eid) for eid in v_node.e_out},
+                )
+                for vid, v_node in self.adj_table.items()
+            },
+        )
+
     def __le__(self, other: "DynGraph[VType, EType]"):
         """self 是否为 other 的子图"""
 
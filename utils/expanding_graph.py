@@ -15,6 +15,8 @@ class ExpandGraph[VType: VertexBase = DataVertex, EType: EdgeBase = DataEdge]:
     - 主要用于存储含有 `半垂悬边` 的图.
     - 事实上, 这个类可以存储 `无垂悬边` 的图.
         - 它必须是某个 `有半垂悬边` 的图, 连接数个 `顶点` 后形成的.
+    - 执行器已改用 `executor.matching_ctx.embedding.Expanding`,
+      这里只作为 `bench.partial_match_extension` 的对照
     """
 
     dyn_graph: DynGraph[VType, EType]